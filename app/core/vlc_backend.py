@@ -1,23 +1,204 @@
 import vlc, threading, time
+from collections import deque
+from qtpy.QtCore import QObject, Signal
 from app.util.logger import setup_app_logger
+from app.util.metrics import REGISTRY
+
+PRELOAD_PARSE_TIMEOUT_MS = 5000
+PRELOAD_HEAD_BYTES = 8 * 1024 * 1024  # read ahead so the container header/first clusters are in the OS cache
+PRELOAD_TAIL_BYTES = 1024 * 1024  # MP4 moov atoms and MKV cues often sit at the end
+
+
+def _warm_file(path):
+    """Pull the start and end of `path` into the OS file cache."""
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(0)
+        remaining = min(size, PRELOAD_HEAD_BYTES)
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        if size > PRELOAD_HEAD_BYTES + PRELOAD_TAIL_BYTES:
+            f.seek(size - PRELOAD_TAIL_BYTES)
+            f.read(PRELOAD_TAIL_BYTES)
+
+
+TIME_SIGNAL_MS = 100  # minimum spacing of time_changed emissions
+PREVIEW_OPEN_TIMEOUT = 1.0  # seconds to wait for a preview's length before seeking anyway
+PREVIEW_POLL = 0.05
+SLOW_COMMAND_MS = 200  # main-player commands slower than this are logged
+
+
+class PlayerSignals(QObject):
+    """Main-player libvlc events as Qt signals. Emitted from libvlc's event thread;
+    connections to GUI objects are queued, so slots run on the GUI thread and may call libvlc."""
+    time_changed = Signal(int)  # ms
+    length_changed = Signal(int)  # ms
+    state_changed = Signal(str)  # "playing", "paused", "stopped", "ended" or "error"
+    ended = Signal()
+    error = Signal()
+
+
+class PreviewController:
+    """Owns the hover-preview player on one long-lived thread. Requests go through a
+    one-slot mailbox: a newer request replaces an unstarted one and aborts an open in
+    progress, so fast hovering never queues work or touches the main player's lock."""
+
+    def __init__(self, inst, player, log):
+        self.inst = inst
+        self.player = player
+        self.log = log
+        self._cond = threading.Condition()
+        self._pending = None  # ("open", path, start_sec, requested_at) | ("stop",) | ("quit",)
+        self._thread = None
+
+    def _post(self, cmd):
+        with self._cond:
+            if self._pending and self._pending[0] == "open":
+                REGISTRY.inc("preview_requests_total", outcome="superseded")
+            self._pending = cmd
+            self._cond.notify()
+            if self._thread is None and cmd[0] != "quit":
+                self._thread = threading.Thread(target=self._run, daemon=True, name="vlc-preview")
+                self._thread.start()
+
+    def open(self, p, start_sec=0):
+        self._post(("open", p, start_sec, time.perf_counter()))
+
+    def stop(self):
+        self._post(("stop",))
+
+    def quit(self):
+        """Stop the preview thread; False if it is still stuck in libvlc after 2 s."""
+        self._post(("quit",))
+        if self._thread:
+            self._thread.join(2)
+            return not self._thread.is_alive()
+        return True
+
+    def _take(self):
+        with self._cond:
+            while self._pending is None:
+                self._cond.wait()
+            cmd, self._pending = self._pending, None
+            return cmd
+
+    def _superseded(self, timeout):
+        """Wait up to `timeout`; True as soon as a newer request arrives."""
+        with self._cond:
+            if self._pending is None:
+                self._cond.wait(timeout)
+            return self._pending is not None
+
+    def _run(self):
+        while True:
+            cmd = self._take()
+            try:
+                self.player.stop()
+                if cmd[0] == "quit":
+                    return
+                if cmd[0] == "open":
+                    self._open(*cmd[1:])
+            except Exception:
+                self.log.exception("preview %s failed", cmd[0])
+                REGISTRY.inc("preview_requests_total", outcome="failed")
+
+    def _open(self, p, start_sec, requested):
+        self.player.set_media(self.inst.media_new(p))
+        self.player.audio_set_mute(True)
+        self.player.play()
+        deadline = time.perf_counter() + PREVIEW_OPEN_TIMEOUT
+        while self.player.get_length() <= 0 and time.perf_counter() < deadline:
+            if self._superseded(PREVIEW_POLL):
+                REGISTRY.inc("preview_requests_total", outcome="cancelled")
+                return
+        self.player.set_time(int(start_sec * 1000))
+        ms = (time.perf_counter() - requested) * 1000
+        REGISTRY.inc("preview_requests_total", outcome="started")
+        REGISTRY.observe("preview_start_ms", ms)
+        self.log.debug("Preview started in %.0f ms for %s", ms, p)
+
 
 class VLCBackend:
+    """Main and preview libvlc players. Main-player commands (open_main, play, pause,
+    set_time, seek_by, set_vol, release) only enqueue; a single control thread runs
+    them in submission order, so the GUI thread never waits on libvlc. Consecutive
+    absolute seeks/volume changes collapse into the newest one."""
+
     def __init__(self):
         self.log = setup_app_logger("VLCBackend")
-        self.lock = threading.Lock()
+        self.lock = threading.Lock()  # guards _preloaded
+        self._cmd_cond = threading.Condition()
+        self._cmds = deque()  # (name, fn, args, coalesce, enqueued_at)
+        self._control = None
+        self._preloaded = None  # (path, vlc.Media) parsed ahead of time for the next playlist item
+        self._open_started = None  # (perf_counter, preloaded, path) until the first video output appears
+        self.signals = PlayerSignals()
+        self._last_time_emit = 0.0
         try:
             self.main_inst = vlc.Instance("--quiet", "--no-osd")
             self.main_player = self.main_inst.media_player_new()
             self.main_player.video_set_mouse_input(False)
             self.main_player.video_set_key_input(False)
+            em = self.main_player.event_manager()
+            em.event_attach(vlc.EventType.MediaPlayerVout, self._on_vout)
+            em.event_attach(vlc.EventType.MediaPlayerTimeChanged, self._on_time)
+            em.event_attach(vlc.EventType.MediaPlayerLengthChanged,
+                            lambda e: self.signals.length_changed.emit(int(e.u.new_length)))
+            for etype, state in ((vlc.EventType.MediaPlayerPlaying, "playing"),
+                                 (vlc.EventType.MediaPlayerPaused, "paused"),
+                                 (vlc.EventType.MediaPlayerStopped, "stopped"),
+                                 (vlc.EventType.MediaPlayerEndReached, "ended"),
+                                 (vlc.EventType.MediaPlayerEncounteredError, "error")):
+                em.event_attach(etype, lambda e, s=state: self._on_state(s))
             self.prev_inst = vlc.Instance("--quiet", "--no-audio", "--no-osd", "--avcodec-hw=none")
             self.prev_player = self.prev_inst.media_player_new()
             self.prev_player.video_set_mouse_input(False)
+            self.preview = PreviewController(self.prev_inst, self.prev_player, self.log)
             self.ready = True
+            self._control = threading.Thread(target=self._run_commands, daemon=True, name="vlc-control")
+            self._control.start()
         except Exception:
             self.log.exception("Failed to initialize libvlc instances")
             self.ready = False
 
+    def _submit(self, name, fn, *args, coalesce=False):
+        if not self.ready:
+            self.log.debug("%s called but backend not ready", name)
+            return
+        with self._cmd_cond:
+            self._cmds.append((name, fn, args, coalesce, time.perf_counter()))
+            self._cmd_cond.notify()
+
+    def _run_commands(self):
+        while True:
+            with self._cmd_cond:
+                while not self._cmds:
+                    self._cmd_cond.wait()
+                name, fn, args, coalesce, queued = self._cmds.popleft()
+                superseded = coalesce and self._cmds and self._cmds[0][0] == name
+            if fn is None:  # shutdown marker from release()
+                return
+            if superseded:
+                REGISTRY.inc("player_commands_total", cmd=name, status="coalesced")
+                continue
+            started = time.perf_counter()
+            status = "done"
+            try:
+                fn(*args)
+            except Exception:
+                status = "failed"
+                self.log.exception("%s failed with %s", name, args)
+            ms = (time.perf_counter() - started) * 1000
+            REGISTRY.inc("player_commands_total", cmd=name, status=status)
+            REGISTRY.observe("player_command_wait_ms", (started - queued) * 1000, cmd=name)
+            REGISTRY.observe("player_command_ms", ms, cmd=name)
+            if ms > SLOW_COMMAND_MS:
+                self.log.warning("Slow libvlc command %s: %.0f ms", name, ms)
+
     def get_state_safe(self):
         try:
             return self.main_player.get_state() if self.ready else 0
@@ -26,11 +207,7 @@ class VLCBackend:
             return 0
 
     def attach_main(self, h):
-        if self.ready:
-            try:
-                self.main_player.set_hwnd(h)
-            except Exception:
-                self.log.exception("attach_main failed")
+        self._submit("attach", lambda w: self.main_player.set_hwnd(w), h)
 
     def attach_prev(self, h):
         if self.ready:
@@ -40,85 +217,136 @@ class VLCBackend:
                 self.log.exception("attach_prev failed")
 
     def open_main(self, p):
+        self._submit("open", self._exec_open, p, time.perf_counter())
+
+    def _take_preloaded(self, p=None):
+        """Hand out the preloaded Media if it is for `p`; a preload for any other path is released."""
+        with self.lock:
+            preloaded, self._preloaded = self._preloaded, None
+        if preloaded is None:
+            return None
+        if preloaded[0] == p:
+            return preloaded[1]
+        preloaded[1].release()  # the user picked something else or the playlist changed
+        return None
+
+    def _exec_open(self, p, requested):
+        media = self._take_preloaded(p)
+        self._open_started = (requested, media is not None, p)
+        self.main_player.set_media(media or self.main_inst.media_new(p))
+        self.main_player.play()
+
+    def preload(self, p):
+        """Parse `p` and warm its file in the background so a following open_main(p) starts faster."""
         if not self.ready:
-            self.log.debug("open_main called but backend not ready")
             return
         with self.lock:
-            try:
-                self.main_player.set_media(self.main_inst.media_new(p))
-                self.main_player.play()
-            except Exception:
-                self.log.exception("open_main failed for %s", p)
+            if self._preloaded and self._preloaded[0] == p:
+                return
+        threading.Thread(target=self._exec_preload, args=(p,), daemon=True, name="vlc-preload").start()
+
+    def _exec_preload(self, p):
+        started = time.perf_counter()
+        try:
+            media = self.main_inst.media_new(p)
+            # Asynchronous in libvlc 3; demuxing/track info is ready by the time the item plays
+            media.parse_with_options(vlc.MediaParseFlag.local, PRELOAD_PARSE_TIMEOUT_MS)
+            _warm_file(p)
+        except Exception:
+            self.log.exception("preload failed for %s", p)
+            return
+        with self.lock:
+            stale, self._preloaded = self._preloaded, (p, media)
+        if stale is not None:
+            stale[1].release()
+        self.log.info("Preloaded %s in %.0f ms", p, (time.perf_counter() - started) * 1000)
+
+    # libvlc event callbacks must not call back into libvlc; they only forward to Qt
+    def _on_time(self, event):
+        now = time.perf_counter()
+        if now - self._last_time_emit >= TIME_SIGNAL_MS / 1000:
+            self._last_time_emit = now
+            self.signals.time_changed.emit(int(event.u.new_time))
+
+    def _on_state(self, state):
+        self.signals.state_changed.emit(state)
+        if state == "ended":
+            self.signals.ended.emit()
+        elif state == "error":
+            self.signals.error.emit()
+
+    def _on_vout(self, event):
+        # libvlc event thread: the first video output after open_main marks the end of the open
+        started, self._open_started = self._open_started, None
+        if started is None:
+            return
+        t0, preloaded, p = started
+        ms = (time.perf_counter() - t0) * 1000
+        REGISTRY.observe("player_open_ms", ms, preloaded="yes" if preloaded else "no")
+        self.log.info("Open to first frame: %.0f ms (%s) for %s", ms, "preloaded" if preloaded else "cold", p)
 
     # Compatibility wrapper used by higher-level Player class
     def open_media(self, p):
         return self.open_main(p)
 
     def play(self):
-        if self.ready:
-            try:
-                self.main_player.play()
-            except Exception:
-                self.log.exception("play failed")
+        self._submit("play", lambda: self.main_player.play())
 
     def pause(self):
-        if self.ready:
-            try:
-                self.main_player.pause()
-            except Exception:
-                self.log.exception("pause failed")
+        """Toggle pause."""
+        self._submit("pause", lambda: self.main_player.pause())
+
+    def set_time(self, ms: int):
+        self._submit("seek", lambda t: self.main_player.set_time(t), int(ms), coalesce=True)
 
     def set_position(self, ms: int):
-        if self.ready:
-            try:
-                self.main_player.set_time(ms)
-            except Exception:
-                self.log.exception("set_position failed")
+        return self.set_time(ms)
+
+    def seek_by(self, delta_ms, length=0):
+        """Seek relative to the position at the time the command runs, clamped to [0, length]."""
+        self._submit("seek_by", self._exec_seek_by, int(delta_ms), length)
+
+    def _exec_seek_by(self, delta_ms, length):
+        pos = max(0, self.main_player.get_time() + delta_ms)
+        self.main_player.set_time(min(length, pos) if length > 0 else pos)
 
     def open_prev(self, p, start_sec=0):
         if not self.ready:
             self.log.debug("open_prev called but backend not ready")
             return
-        threading.Thread(target=self._exec_prev, args=(p, start_sec), daemon=True).start()
-
-    def _exec_prev(self, p, s):
-        with self.lock:
-            try:
-                self.prev_player.stop()
-                self.prev_player.set_media(self.prev_inst.media_new(p))
-                self.prev_player.play()
-                for _ in range(10):
-                    if self.prev_player.get_length() > 0:
-                        break
-                    time.sleep(0.05)
-                self.prev_player.set_time(s * 1000)
-                self.prev_player.audio_set_mute(True)
-            except Exception:
-                self.log.exception("preview execution failed for %s", p)
+        self.preview.open(p, start_sec)
 
     def stop_prev(self):
         if self.ready:
-            try:
-                with self.lock:
-                    self.prev_player.stop()
-            except Exception:
-                self.log.exception("stop_prev failed")
+            self.preview.stop()
 
     def set_vol(self, v):
-        if self.ready:
-            try:
-                self.main_player.audio_set_volume(v)
-            except Exception:
-                self.log.exception("set_vol failed with %s", v)
+        self._submit("volume", lambda x: self.main_player.audio_set_volume(x), v, coalesce=True)
 
     def set_volume(self, v: int):
         # Accepts 0-100 integer
         return self.set_vol(v)
 
     def release(self):
+        """Stop both players after every queued command has run, then free libvlc. Blocks up to a few seconds.
+
+        An instance whose thread is still inside a libvlc call is left to process exit
+        rather than freed under it."""
         if self.ready:
+            self._submit("stop", lambda: self.main_player.stop())
+            with self._cmd_cond:
+                self._cmds.append(("quit", None, (), False, time.perf_counter()))
+                self._cmd_cond.notify()
+            self._control.join(3)
             try:
-                self.main_player.stop(); self.prev_player.stop()
-                self.main_inst.release(); self.prev_inst.release()
+                if self.preview.quit():
+                    self.prev_inst.release()
+                else:
+                    self.log.warning("Preview thread still busy; not releasing its libvlc instance")
+                if self._control.is_alive():
+                    self.log.warning("libvlc control thread still busy; not releasing the main instance")
+                    return
+                self._take_preloaded()
+                self.main_inst.release()
             except Exception:
                 self.log.exception("release failed")
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Duplicates View
+Lists videos that exist more than once across the library roots: identical
+files (same size + partial content hash) and several files associated with
+the same episode.
+"""
+
+from qtpy.QtWidgets import *
+from qtpy.QtCore import *
+from qtpy.QtGui import *
+from pathlib import Path
+import threading
+import os
+import logging
+from app.util.file_identity import update_index
+
+logger = logging.getLogger("DUPLICATES_VIEW")
+
+
+class DuplicatesWidget(QWidget):
+    """Grouped list of duplicate videos with an incremental index rebuild."""
+
+    play_video = Signal(str)
+    _index_progress = Signal(int)
+    _index_done = Signal(int)
+
+    def __init__(self, db, cfg, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.cfg = cfg
+        self._indexing = False
+        self._stop = threading.Event()
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        self.tree.setStyleSheet("background:#111; border:none;")
+        self.tree.itemDoubleClicked.connect(self._on_activated)
+        self.tree.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.tree.customContextMenuRequested.connect(self._on_context)
+        layout.addWidget(self.tree)
+
+        footer = QHBoxLayout()
+        footer.setContentsMargins(5, 5, 5, 5)
+        self.status = QLabel("")
+        self.status.setStyleSheet("color:#888; font-size:11px;")
+        self.btn_scan = QPushButton("🔍 Index Library")
+        self.btn_scan.setToolTip("Hash new or changed videos in all library folders")
+        self.btn_scan.clicked.connect(self.rebuild_index)
+        btn_refresh = QPushButton("🔄 Refresh")
+        btn_refresh.clicked.connect(self.refresh)
+        footer.addWidget(self.btn_scan)
+        footer.addWidget(btn_refresh)
+        footer.addStretch()
+        footer.addWidget(self.status)
+        layout.addLayout(footer)
+
+        self._index_progress.connect(lambda n: self.status.setText(f"Indexed {n} files..."))
+        self._index_done.connect(self._on_index_done)
+
+    def refresh(self):
+        """Reload duplicate groups from the database."""
+        self.tree.clear()
+        try:
+            groups = self.db.get_duplicate_groups()
+        except Exception:
+            logger.exception("Failed to load duplicate groups")
+            return
+        shown = 0
+        for group in groups:
+            paths = [p for p in group['paths'] if os.path.exists(p)]
+            if len(paths) < 2:
+                continue
+            title = "Identical files" if group['reason'] == 'identical' else "Same episode"
+            top = QTreeWidgetItem(self.tree, [f"{title}: {group['label']} ({len(paths)})"])
+            top.setForeground(0, QColor("#4CAF50" if group['reason'] == 'identical' else "#FFA500"))
+            for p in paths:
+                try:
+                    size = f"{os.path.getsize(p) / 1024 ** 2:.0f} MB"
+                except OSError:
+                    size = "?"
+                child = QTreeWidgetItem(top, [f"{Path(p).name}  —  {size}  —  {Path(p).parent}"])
+                child.setData(0, Qt.UserRole, p)
+                child.setToolTip(0, p)
+            top.setExpanded(True)
+            shown += 1
+        self.status.setText(f"{shown} duplicate group(s)")
+
+    def rebuild_index(self):
+        """Hash new/changed files under the configured folders in the background."""
+        if self._indexing:
+            return
+        self._indexing = True
+        self._stop.clear()
+        self.btn_scan.setEnabled(False)
+        roots = list(self.cfg["folders"])
+
+        def work():
+            n = 0
+            try:
+                n = update_index(self.db, roots, self._stop, self._index_progress.emit)
+            except Exception:
+                logger.exception("Duplicate index rebuild failed")
+            self._index_done.emit(n)
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _on_index_done(self, count):
+        self._indexing = False
+        self.btn_scan.setEnabled(True)
+        logger.info(f"Duplicate index updated ({count} files visited)")
+        self.refresh()
+
+    def _on_activated(self, item, col):
+        p = item.data(0, Qt.UserRole)
+        if p:
+            self.play_video.emit(p)
+
+    def _on_context(self, pos):
+        item = self.tree.itemAt(pos)
+        p = item.data(0, Qt.UserRole) if item else None
+        if not p:
+            return
+        menu = QMenu(self)
+        play = menu.addAction("▶  Play")
+        copy_path = menu.addAction("Copy Path")
+        act = menu.exec(QCursor.pos())
+        if act == play:
+            self.play_video.emit(p)
+        elif act == copy_path:
+            QApplication.clipboard().setText(p)
@@ -0,0 +1,129 @@
+"""
+Image Decoder
+Decodes thumbnail/poster JPEGs into QImages on a small QThreadPool so the GUI
+thread never runs a JPEG decoder. Finished images are queued and converted to
+QPixmaps on the GUI thread in batches, at most FRAME_BUDGET_MS per event-loop
+iteration; the rest waits for the next iteration. A watchdog timer counts GUI
+thread stalls (ticks arriving much later than scheduled) so the effect can be
+checked in the thumb metrics.
+"""
+
+import time
+import threading
+import statistics
+from collections import deque
+from qtpy.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+from qtpy.QtGui import QImage, QPixmap
+import logging
+
+logger = logging.getLogger("IMAGE_DECODER")
+
+FRAME_BUDGET_MS = 4  # GUI-thread time spent turning decoded images into pixmaps per iteration
+WATCH_INTERVAL_MS = 50
+STALL_MS = 100  # a watchdog tick this late counts as a stall
+
+
+class _DecodeTask(QRunnable):
+    def __init__(self, decoder, source, callback):
+        super().__init__()
+        self.decoder = decoder
+        self.source = source
+        self.callback = callback
+
+    def run(self):
+        t0 = time.perf_counter()
+        try:
+            img = QImage.fromData(self.source) if isinstance(self.source, (bytes, bytearray)) else QImage(str(self.source))
+        except Exception:
+            logger.exception("Decode failed")
+            img = QImage()
+        self.decoder._deliver(self.callback, img, (time.perf_counter() - t0) * 1000)
+
+
+class ImageDecoder(QObject):
+    """decode(source, callback): `source` is encoded bytes or a file path; `callback(pixmap)` runs on the GUI thread."""
+
+    _ready = Signal()
+
+    def __init__(self, parent=None, threads=2):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(threads)
+        self._done = deque()  # (callback, QImage) decoded, waiting for the GUI thread
+        self._lock = threading.Lock()
+        self._flush_pending = False
+        self._ready.connect(self._flush)
+        # Metrics
+        self.queued = self.delivered = self.failed = 0
+        self._decode_ms = deque(maxlen=200)
+        self.max_flush_ms = 0.0
+        self.stalls = 0
+        self.max_stall_ms = 0.0
+        self._last_tick = time.perf_counter()
+        self._watch = QTimer(self)
+        self._watch.setInterval(WATCH_INTERVAL_MS)
+        self._watch.timeout.connect(self._tick)
+        self._watch.start()
+
+    def decode(self, source, callback):
+        self.queued += 1
+        self._pool.start(_DecodeTask(self, source, callback))
+
+    def _deliver(self, callback, img, ms):
+        # Pool thread: hand over and wake the GUI thread once per batch
+        with self._lock:
+            self._done.append((callback, img))
+            self._decode_ms.append(ms)
+            wake = not self._flush_pending
+            self._flush_pending = True
+        if wake:
+            self._ready.emit()
+
+    def _flush(self):
+        start = time.perf_counter()
+        deadline = start + FRAME_BUDGET_MS / 1000
+        while True:
+            with self._lock:
+                if not self._done:
+                    self._flush_pending = False
+                    break
+                callback, img = self._done.popleft()
+            if img.isNull():
+                self.failed += 1
+            else:
+                try:
+                    callback(QPixmap.fromImage(img))
+                    self.delivered += 1
+                except RuntimeError:
+                    pass  # the widget/item was deleted meanwhile
+                except Exception:
+                    logger.exception("Image callback failed")
+            if time.perf_counter() > deadline:
+                # Leave the rest for the next event-loop iteration
+                QTimer.singleShot(0, self._flush)
+                break
+        self.max_flush_ms = max(self.max_flush_ms, (time.perf_counter() - start) * 1000)
+
+    def _tick(self):
+        now = time.perf_counter()
+        late = (now - self._last_tick) * 1000 - WATCH_INTERVAL_MS
+        self._last_tick = now
+        if late > STALL_MS:
+            self.stalls += 1
+            self.max_stall_ms = max(self.max_stall_ms, late)
+
+    def stats(self):
+        with self._lock:
+            backlog = len(self._done)
+            decode_ms = list(self._decode_ms)
+        return {
+            'queued': self.queued, 'delivered': self.delivered, 'failed': self.failed, 'backlog': backlog,
+            'decode_ms': round(statistics.median(decode_ms), 2) if decode_ms else None,
+            'max_flush_ms': round(self.max_flush_ms, 2),
+            'gui_stalls': self.stalls, 'max_stall_ms': round(self.max_stall_ms, 1),
+        }
+
+    def shutdown(self):
+        self._watch.stop()
+        self._pool.clear()
+        self._pool.waitForDone(1000)
@@ -3,12 +3,18 @@ from pathlib import Path
 from PySide6.QtWidgets import *
 from PySide6.QtCore import *
 from PySide6.QtGui import *
+from app.util.media_probe import format_duration
+from app.ui.pixmap_cache import ScaledPixmapCache
+
+MEDIA_INFO_ROLE = Qt.UserRole + 1  # cached media_info row for video items
+THUMB_FAILED_ROLE = Qt.UserRole + 2  # failure reason once a thumbnail is given up on
 
 def get_h(p): return hashlib.md5(p.lower().replace("\\","/").encode()).hexdigest()
 
 class LibraryDelegate(QStyledItemDelegate):
     def __init__(self, parent, cfg, checked_set, db):
         super().__init__(parent); self.cfg = cfg; self.checked_set = checked_set; self.db = db
+        self.pix_cache = ScaledPixmapCache(cfg.get("pixmap_cache_mb", 32))
     
     def paint(self, painter, option, index):
         painter.save()
@@ -27,7 +33,21 @@ class LibraryDelegate(QStyledItemDelegate):
             r_img = QRect(option.rect.left() + 35, option.rect.top() + 5, tw, th)
             painter.fillRect(r_img, Qt.black)
             pix = index.data(Qt.DecorationRole)
-            if isinstance(pix, QPixmap): painter.drawPixmap(r_img, pix.scaled(r_img.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            if isinstance(pix, QPixmap) and not pix.isNull():
+                pix = self.pix_cache.scaled(p, pix, r_img.size(), painter.device().devicePixelRatioF())
+                painter.drawPixmap(r_img, pix)
+            elif index.data(THUMB_FAILED_ROLE):
+                painter.fillRect(r_img, QColor(30, 30, 30)); painter.setPen(QColor(110, 110, 110))
+                painter.drawText(r_img, Qt.AlignCenter, "No preview")
+            info = index.data(MEDIA_INFO_ROLE)
+            if info and info[3]:  # duration_ms
+                badge = format_duration(info[3])
+                if info[5]: badge = f"{info[5]}p · {badge}"  # height
+                f = painter.font(); f.setPointSize(max(7, self.cfg["text_size"] - 2)); painter.setFont(f)
+                br = painter.fontMetrics().boundingRect(badge).adjusted(-4, -2, 4, 2)
+                br.moveBottomRight(r_img.bottomRight() - QPoint(4, 4))
+                painter.fillRect(br, QColor(0, 0, 0, 180)); painter.setPen(QColor(230, 230, 230))
+                painter.drawText(br, Qt.AlignCenter, badge)
             # Text
             r_txt = QRect(option.rect.left() + 35, option.rect.top() + th + 8, tw, self.cfg["text_size"] * 2.5)
             painter.setPen(QColor(200, 200, 200))
@@ -1,18 +1,27 @@
-import os, time, subprocess, hashlib, vlc, sys, threading, random, re, logging, socket
-from queue import PriorityQueue
-import itertools
-import queue
+import os, time, threading, random, re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from qtpy.QtWidgets import *
 from qtpy.QtCore import *
 from qtpy.QtGui import *
 import app.util.config as config
-from app.ui.library import LibraryDelegate, get_h
+from app.ui.library import LibraryDelegate, MEDIA_INFO_ROLE, THUMB_FAILED_ROLE
 from app.util.logger import setup_app_logger
 from app.util.metadata_db import MetadataDB
 from app.util.tvmaze_api import TVMazeAPI
 from app.util.robust_scanner import RobustMetadataScanner
+from app.util.image_cache import PosterCache
+from app.util.worker_pool import ThumbWorkerPool
+from app.util.media_probe import is_fresh
+from app.util.file_identity import move_thumbnail
 from app.ui.shows_browser import TVStyleShowsWidget
+from app.ui.duplicates_view import DuplicatesWidget
+from app.ui.seek_preview import SeekPreview
+from app.ui.thumb_scheduler import ThumbScheduler
+from app.ui.image_decoder import ImageDecoder
+from app.util.storyboard import load_index
+from app.util.thumb_store import get_store, level_for
+from app.util.metrics import REGISTRY
 try:
     import inputs
     INPUTS_AVAILABLE = True
@@ -24,6 +33,17 @@ logger = setup_app_logger("MAIN_WINDOW")
 ROOT = Path(__file__).parent.parent.parent.absolute()
 def nat_sort(s): return [int(t) if t.isdigit() else t.lower() for t in re.split('([0-9]+)', s)]
 class ClickSlider(QSlider):
+    # Hover position (x in widget coordinates) for seek previews
+    hover_moved = Signal(int); hover_left = Signal()
+    def mouseMoveEvent(self, e):
+        try:
+            self.hover_moved.emit(int(e.position().x()))
+        except Exception:
+            pass
+        return super().mouseMoveEvent(e)
+    def leaveEvent(self, e):
+        self.hover_left.emit()
+        return super().leaveEvent(e)
     def mousePressEvent(self, e):
         try:
             if e.button() == Qt.LeftButton:
@@ -199,6 +219,9 @@ class TitleBar(QWidget):
 
 
 class MainWindow(QMainWindow):
+    # Worker results arrive on pool dispatcher threads; this signal hops them onto the UI thread
+    thumb_result = Signal(dict)
+
     def __init__(self, player, backend):
         super().__init__(); self.player, self.backend = player, backend
         # Use frameless window and provide custom hit-testing/resize handles
@@ -211,9 +234,15 @@ class MainWindow(QMainWindow):
         # Initialize repeat and shuffle state
         self.repeat_mode = 'none'
         self.shuffle = False
+        self._preload_done = False  # next playlist item already handed to backend.preload
+        self._hover_preview = None  # path whose hover preview is showing
+        self._shuffle_next = None  # shuffle pick for the next item, fixed once preloaded
         self.setWindowTitle("Vibe Video Player"); self.resize(1600, 900)
         self.setStyleSheet("background:#0a0a0a; color:white;"); self.setMouseTracking(True)
         self.db = MetadataDB()
+        self.poster_cache = PosterCache(self.db, budget_mb=self.cfg.get("poster_cache_mb", 64))
+        # Thumbnail/poster JPEGs are decoded off the GUI thread
+        self.image_decoder = ImageDecoder(self)
         # Initialize metadata scanner
         self._init_metadata_scanner()
         def icn(k): return QIcon(str(ROOT / "resources" / "icons" / f"{k}.png"))
@@ -232,245 +261,28 @@ class MainWindow(QMainWindow):
                     logger.exception("Failed to set window icon from %s", main_icon_path)
         except Exception:
             logger.exception("Failed to initialize main icon")
-        # Start the thumbnail worker as a subprocess. On Windows, hide the console window.
-        self.worker = None
-        def _make_startupinfo():
-            si = None
-            if sys.platform.startswith("win"):
-                try:
-                    si = subprocess.STARTUPINFO()
-                    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                except Exception:
-                    logger.exception("Failed to configure subprocess STARTUPINFO")
-                    si = None
-            return si
-
-        # Track last start time to avoid rapid restart loops
-        self._last_worker_start = 0
-
-        def start_worker():
-            # Avoid restarting more than once per second
-            if time.time() - self._last_worker_start < 1:
-                logger.info("Skipping worker restart due to backoff")
-                return None
-            si = _make_startupinfo()
-            try:
-                # Choose an IPC port for the worker to listen on
-                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                s.bind(("127.0.0.1", 0))
-                port = s.getsockname()[1]
-                s.close()
-                self._ipc_port = port
-                # Start worker with ipc port argument. Capture stdout/stderr so we can pipe worker logs into the main logger.
-                proc = subprocess.Popen([
-                    sys.executable, str(ROOT / "app" / "util" / "worker.py"), f"--ipc-port={port}"
-                ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0, startupinfo=si)
-                self._last_worker_start = time.time()
-                try:
-                    logger.info("Started worker pid=%s stdout=%s stderr=%s cwd=%s", proc.pid, bool(proc.stdout), bool(proc.stderr), os.getcwd())
-                except Exception:
-                    logger.exception("Started worker but failed to log details")
-                # worker will accept socket connections on the assigned port; we'll connect in the writer thread
-                return proc
-            except Exception:
-                logger.exception("Failed to start worker subprocess")
-                return None
-
-        # start the worker and store reference
-        self.worker = start_worker()
-
-        # If the worker provides stdout/stderr, start threads to forward them to app logger
-        def _drain_pipe(pipe, level=logging.INFO):
-            try:
-                if pipe is None:
-                    return
-                # read bytes and decode lines
-                with pipe:
-                    buf = b''
-                    while True:
-                        chunk = pipe.readline()
-                        if not chunk:
-                            break
-                        try:
-                            line = chunk.decode('utf-8', errors='replace').rstrip('\r\n')
-                        except Exception:
-                            line = str(chunk)
-                        logger.log(level, "[worker] %s", line)
-            except Exception:
-                logger.exception("Error reading worker pipe")
-
-        if self.worker is not None:
-            if getattr(self.worker, 'stdout', None):
-                threading.Thread(target=_drain_pipe, args=(self.worker.stdout, logging.INFO), daemon=True).start()
-            if getattr(self.worker, 'stderr', None):
-                threading.Thread(target=_drain_pipe, args=(self.worker.stderr, logging.ERROR), daemon=True).start()
-
-        def ensure_worker_running():
-            if self.worker is None:
-                logger.info("Worker missing, starting")
-                self.worker = start_worker()
-                # attach drains for new worker
-                if self.worker is not None:
-                    if getattr(self.worker, 'stdout', None):
-                        threading.Thread(target=_drain_pipe, args=(self.worker.stdout, logging.INFO), daemon=True).start()
-                    if getattr(self.worker, 'stderr', None):
-                        threading.Thread(target=_drain_pipe, args=(self.worker.stderr, logging.ERROR), daemon=True).start()
-                return
-
-            if self.worker.poll() is not None:
-                # process has exited; capture any remaining stderr/stdout
-                try:
-                    out = None
-                    err = None
-                    try:
-                        if getattr(self.worker, 'stdout', None):
-                            out = self.worker.stdout.read()
-                    except Exception:
-                        out = None
-                    try:
-                        if getattr(self.worker, 'stderr', None):
-                            err = self.worker.stderr.read()
-                    except Exception:
-                        err = None
-                    if out:
-                        try:
-                            logger.info("Worker stdout on exit: %s", out.decode('utf-8', errors='replace'))
-                        except Exception:
-                            logger.info("Worker stdout on exit: %s", out)
-                    if err:
-                        try:
-                            logger.error("Worker stderr on exit: %s", err.decode('utf-8', errors='replace'))
-                        except Exception:
-                            logger.error("Worker stderr on exit: %s", err)
-                except Exception:
-                    logger.exception("Error while reading worker pipes on exit")
-                logger.info("Worker not running, restarting")
-                self.worker = start_worker()
-                if self.worker is not None:
-                    if getattr(self.worker, 'stdout', None):
-                        threading.Thread(target=_drain_pipe, args=(self.worker.stdout, logging.INFO), daemon=True).start()
-                    if getattr(self.worker, 'stderr', None):
-                        threading.Thread(target=_drain_pipe, args=(self.worker.stderr, logging.ERROR), daemon=True).start()
-
-        self._start_worker = start_worker
-        self._ensure_worker_running = ensure_worker_running
-        # Prioritized queue + socket-based writer thread to serialize thumbnail requests off the UI thread
-        # PriorityQueue entries: (priority, seq, (path, preview)) where lower priority value => higher priority
-        self._thumb_queue = PriorityQueue(maxsize=200)
-        self._pending_thumbs = set()
-        self._seq = itertools.count()
-        # Metrics
-        self._metrics = {
-            'queued': 0,
-            'dropped': 0,
-            'sent': 0,
-            'send_fail': 0,
-            'conn_attempts': 0,
-            'conn_success': 0,
-        }
-
-        def _thumb_writer():
-            sock = None
-            last_port = None
-            while True:
-                try:
-                    item = self._thumb_queue.get()
-                    if item is None:
-                        break
-                    # item is (priority, seq, payload)
-                    if isinstance(item, tuple) and len(item) == 3:
-                        pri, seq, payload = item
-                    else:
-                        # unexpected sentinel/payload
-                        break
-                    # Accept a None payload as the shutdown sentinel
-                    if payload is None:
-                        try:
-                            self._thumb_queue.task_done()
-                        except Exception:
-                            pass
-                        break
-                    p, preview = payload
-                    try:
-                        # Ensure a current worker/process exists; if not, try to start one
-                        try:
-                            self._ensure_worker_running()
-                        except Exception:
-                            logger.exception("Failed to ensure worker before writer socket send")
-
-                        port = getattr(self, '_ipc_port', None)
-                        # If port changed or socket not connected, (re)connect
-                        if sock is None or last_port != port:
-                            if sock:
-                                try:
-                                    sock.close()
-                                except Exception:
-                                    pass
-                                sock = None
-                            if not port:
-                                # No port assigned; back off and requeue
-                                try:
-                                    time.sleep(0.1)
-                                    self._thumb_queue.put_nowait((pri, seq, (p, preview)))
-                                except Exception:
-                                    logger.debug("Failed to requeue while waiting for port: %s", p)
-                                continue
-                            # Attempt to connect with backoff
-                            connected = False
-                            conn_backoff = 0.1
-                            while not connected:
-                                try:
-                                    self._metrics['conn_attempts'] += 1
-                                    sock = socket.create_connection(('127.0.0.1', port), timeout=3)
-                                    last_port = port
-                                    connected = True
-                                    self._metrics['conn_success'] += 1
-                                    conn_backoff = 0.1
-                                except Exception:
-                                    logger.debug("Socket connect failed to port %s; backing off %.1fs", port, conn_backoff)
-                                    time.sleep(conn_backoff)
-                                    conn_backoff = min(conn_backoff * 2, 5.0)
-
-                        # send payload
-                        try:
-                            msg = f"{p}|{preview}\n".encode('utf-8')
-                            sock.sendall(msg)
-                            self._metrics['sent'] += 1
-                            logger.debug("Socket writer sent %d bytes to %s", len(msg), p)
-                            time.sleep(0.05)  # Throttle to prevent overwhelming the worker
-                        except Exception:
-                            logger.exception("Socket send failed for %s", p)
-                            self._metrics['send_fail'] += 1
-                            try:
-                                sock.close()
-                            except Exception:
-                                pass
-                            sock = None
-                            # Requeue with backoff
-                            try:
-                                time.sleep(0.1)
-                                self._thumb_queue.put_nowait((pri, seq, (p, preview)))
-                            except Exception:
-                                logger.debug("Failed to requeue after socket send failure for %s", p)
-                    finally:
-                        try:
-                            self._pending_thumbs.discard(p)
-                        except Exception:
-                            pass
-                        try:
-                            self._thumb_queue.task_done()
-                        except Exception:
-                            pass
-                except Exception:
-                    logger.exception("Exception in thumb writer loop")
-                    time.sleep(0.1)
-
-        threading.Thread(target=_thumb_writer, daemon=True).start()
-        # Periodic metrics logger to observe queue/connection health
+        # Thumbnail/probe workers: a pool of subprocesses fed from one shared priority queue
+        self._video_items = {}  # path -> library tree item, so worker results update a single row
+        self.thumb_store = get_store()
+        self._thumb_width = level_for(self.cfg["card_width"])
+        self._level_timer = QTimer(self); self._level_timer.setSingleShot(True); self._level_timer.setInterval(300)
+        self._level_timer.timeout.connect(self._apply_thumb_level)
+        # Import legacy resources/thumbs JPEGs and drop orphans without blocking startup
+        roots = list(self.cfg["folders"])
+        threading.Thread(target=lambda: self.thumb_store.maintain(self.db.get_all_video_paths(), roots), daemon=True).start()
+        self.thumb_result.connect(self._on_thumb_result)
+        # Items are queued once when their folder expands (no polling re-queues), so the queue is unbounded
+        self.thumb_pool = ThumbWorkerPool(size=self.cfg.get("thumb_workers", 0), on_done=self.thumb_result.emit,
+                                          maxsize=0, shm=self.cfg.get("thumb_shm", False))
+        self.thumb_pool.start()
+        # Shared-memory frames are painted first and written to the disk cache on this thread
+        self._thumb_saver = ThreadPoolExecutor(max_workers=1)
+        self._thumb_requested_at = {}  # path -> perf_counter() at submit, for request -> paint latency
+        # Periodic metrics logger to observe queue/throughput health
         try:
             self._metrics_timer = QTimer()
             self._metrics_timer.setInterval(5000)
-            self._metrics_timer.timeout.connect(lambda: logger.info("Thumb metrics: %s", self._metrics))
+            self._metrics_timer.timeout.connect(self._log_thumb_metrics)
             self._metrics_timer.start()
         except Exception:
             logger.exception("Failed to start metrics timer")
@@ -573,9 +385,13 @@ class MainWindow(QMainWindow):
         self.tree = QTreeWidget(); self.tree.setHeaderHidden(True); self.tree.setIndentation(15)
         self.tree.setSelectionMode(QAbstractItemView.ExtendedSelection); self.tree.setMouseTracking(True)
         self.tree.setStyleSheet("background:#111; border:none;")
-        self.tree.setItemDelegate(LibraryDelegate(self.tree, self.cfg, self.checked_paths, self.db)); folders_lay.addWidget(self.tree)
+        self.lib_delegate = LibraryDelegate(self.tree, self.cfg, self.checked_paths, self.db)
+        self.tree.setItemDelegate(self.lib_delegate); folders_lay.addWidget(self.tree)
+        # Only rows in or near the viewport get worker time; scrolled-away rows are cancelled
+        self.thumb_sched = ThumbScheduler(self.tree, self._request_thumb, self.thumb_pool.cancel, in_flight=self.thumb_pool.size * 2)
         self.ov = QWidget(self.tree.viewport()); self.ov.hide(); self.ov.setAttribute(Qt.WA_TransparentForMouseEvents)
         self.backend.attach_prev(int(self.ov.winId()))
+        self.tree.verticalScrollBar().valueChanged.connect(lambda _: self._hide_preview())  # the card moved away
 
         self.opt_shelf = QWidget(); self.opt_shelf.hide(); self.opt_shelf.setStyleSheet("background:#181818; border-top:1px solid #333;")
         grid = QGridLayout(self.opt_shelf); self.tog_hide = QCheckBox("Autohide Windowed"); self.tog_hide.setChecked(self.cfg["autohide_windowed"])
@@ -596,7 +412,7 @@ class MainWindow(QMainWindow):
         footer.addWidget(btn_opts); footer.addStretch(); footer.addWidget(btn_add); folders_lay.addLayout(footer)
         self.sb_l.addTab(folders_tab, "Folders")
         # Shows tab - TV Style Browser
-        self.shows_browser = TVStyleShowsWidget(self.db)
+        self.shows_browser = TVStyleShowsWidget(self.db, poster_cache=self.poster_cache, decoder=self.image_decoder)
         self.shows_browser.play_video.connect(self._on_play_video_from_shows)
         
         shows_tab = QWidget()
@@ -633,6 +449,11 @@ class MainWindow(QMainWindow):
         shows_layout.addLayout(shows_footer)
         
         self.sb_l.addTab(shows_tab, "Watch")
+        # Duplicates tab - identical files / same-episode collisions across library roots
+        self.duplicates_view = DuplicatesWidget(self.db, self.cfg)
+        self.duplicates_view.play_video.connect(self._on_play_video_from_shows)
+        self.sb_l.addTab(self.duplicates_view, "Duplicates")
+        self.sb_l.currentChanged.connect(lambda i: self.duplicates_view.refresh() if self.sb_l.widget(i) is self.duplicates_view else None)
         self.split.addWidget(self.sb_l)
 
         # Center Player
@@ -641,10 +462,13 @@ class MainWindow(QMainWindow):
         self.center_lay.addWidget(self.v_out, 1)
         self.control_panel = QWidget(); cp_lay = QVBoxLayout(self.control_panel); cp_lay.setContentsMargins(0,0,0,0)
         self.sk = ClickSlider(Qt.Horizontal); self.sk.setRange(0, 1000); cp_lay.addWidget(self.sk)
-        self.sk.sliderMoved.connect(lambda v: self.backend.main_player.set_time(int((v/1000)*self.backend.main_player.get_length())))
+        self.sk.sliderMoved.connect(lambda v: self.backend.set_time(int((v/1000)*self._duration())))
+        self.seek_preview = SeekPreview(self, decoder=self.image_decoder)
+        self.sk.setMouseTracking(True)
+        self.sk.hover_moved.connect(self._on_seek_hover); self.sk.hover_left.connect(self.seek_preview.hide)
         ctrl_row = QHBoxLayout(); ctrl_row.setContentsMargins(10,5,10,10)
         bt_l = QPushButton(icon=self.icns["playlist"]); bt_l.clicked.connect(lambda: self.sb_l.setVisible(not self.sb_l.isVisible()))
-        self.bp = QPushButton(icon=self.icns["play"]); self.bp.clicked.connect(self.backend.main_player.pause)
+        self.bp = QPushButton(icon=self.icns["play"]); self.bp.clicked.connect(self.backend.pause)
         # Add repeat and shuffle buttons
         self.bt_repeat = QPushButton("Repeat None"); self.bt_repeat.clicked.connect(self.toggle_repeat)
         self.bt_shuffle = QPushButton("Shuffle Off"); self.bt_shuffle.clicked.connect(self.toggle_shuffle)
@@ -664,7 +488,12 @@ class MainWindow(QMainWindow):
         self.tree.itemExpanded.connect(self.on_expand); self.tree.itemEntered.connect(self.on_hover)
         self.tree.itemPressed.connect(self.on_tree_click); self.tree.itemDoubleClicked.connect(self.on_activated)
         self.tree.setContextMenuPolicy(Qt.CustomContextMenu); self.tree.customContextMenuRequested.connect(self.on_context)
-        self.tm = QTimer(); self.tm.setInterval(500); self.tm.timeout.connect(self.upd); self.tm.start()
+        # Playback UI is driven by libvlc events; the timer only runs while the hover overlay is up
+        self.tm = QTimer(); self.tm.setInterval(500); self.tm.timeout.connect(self.upd)
+        ev = self.backend.signals
+        ev.time_changed.connect(self._on_time); ev.length_changed.connect(self._on_length)
+        ev.state_changed.connect(self._on_state); ev.ended.connect(self._on_ended)
+        ev.error.connect(lambda: logger.error("libvlc failed to play %s", getattr(self, '_now_playing', None)))
         self.backend.set_vol(self.cfg["volume"]); QTimer.singleShot(500, self.ref_initial)
 
     def changeEvent(self, event):
@@ -713,7 +542,7 @@ class MainWindow(QMainWindow):
             key = event.key()
             if key == Qt.Key_Space or key == Qt.Key_MediaPlay or key == Qt.Key_MediaPause:
                 # Play/Pause
-                self.backend.main_player.pause()
+                self.backend.pause()
             elif key == Qt.Key_Left or key == Qt.Key_MediaPrevious:
                 # Seek backward 10s or previous track
                 if event.modifiers() & Qt.ControlModifier:
@@ -723,17 +552,14 @@ class MainWindow(QMainWindow):
                         self.plist.setCurrentRow(idx)
                         self.p_m(self.plist.currentItem().data(Qt.UserRole))
                 else:
-                    pos = self.backend.main_player.get_time() - 10000
-                    self.backend.main_player.set_time(max(0, pos))
+                    self.backend.seek_by(-10000)
             elif key == Qt.Key_Right or key == Qt.Key_MediaNext:
                 # Seek forward 10s or next track
                 if event.modifiers() & Qt.ControlModifier:
                     # Ctrl+Right: next track
                     self.play_next()
                 else:
-                    pos = self.backend.main_player.get_time() + 10000
-                    length = self.backend.main_player.get_length()
-                    self.backend.main_player.set_time(min(length, pos))
+                    self.backend.seek_by(10000, self._duration())
             elif key == Qt.Key_Up or key == Qt.Key_VolumeUp:
                 # Volume up
                 vol = min(100, self.cfg["volume"] + 5)
@@ -804,6 +630,25 @@ class MainWindow(QMainWindow):
     def set_vis_cfg(self, k, v, lb, name): 
         self.cfg[k] = v; lb.setText(f"{name}: {v}"); config.save(self.cfg)
         self.tree.updateGeometries(); self.tree.viewport().update()
+        if k == "card_width":
+            self.lib_delegate.pix_cache.clear()  # old card size will not be painted again
+            self._level_timer.start()  # switch thumbnail level once the slider settles
+    def _apply_thumb_level(self):
+        """Swap loaded thumbnails to the level matching the card width; queue levels not generated yet."""
+        level = level_for(self.cfg["card_width"], self.devicePixelRatioF())
+        if level == self._thumb_width: return
+        self._thumb_width = level
+        paths = list(self._video_items)
+        try:
+            thumbs = self.thumb_store.get_best_many(paths, level)
+        except Exception:
+            logger.exception("Failed to load thumbnail levels")
+            return
+        for p in paths:
+            have, data = thumbs.get(p, (None, None))
+            if data is None: continue  # still queued from expansion
+            self.image_decoder.decode(data, lambda pix, p=p: self._show_thumb(p, pix))
+            if have < level: self.thumb_sched.want(p, pri=2)
     def add_f(self):
         p = QFileDialog.getExistingDirectory(self, "Add Folder")
         if p:
@@ -814,7 +659,7 @@ class MainWindow(QMainWindow):
         p_posix = Path(p).as_posix()
         if p_posix in self.cfg["folders"]: self.cfg["folders"].remove(p_posix); config.save(self.cfg); self.ref()
     def ref(self):
-        self.tree.clear()
+        self.thumb_sched.clear(); self.tree.clear(); self._video_items.clear()
         for f in self.cfg["folders"]:
             p = Path(f)
             if p.exists():
@@ -824,7 +669,7 @@ class MainWindow(QMainWindow):
     
     def _init_metadata_scanner(self):
         """Initialize the robust metadata scanner."""
-        self.metadata_scanner = RobustMetadataScanner(self.db)
+        self.metadata_scanner = RobustMetadataScanner(self.db, poster_cache=self.poster_cache)
         # Connect signals
         self.metadata_scanner.job_started.connect(self._on_job_started)
         self.metadata_scanner.job_progress.connect(self._on_job_progress)
@@ -967,7 +812,7 @@ class MainWindow(QMainWindow):
 
     def on_expand(self, item):
         if item.childCount() > 0: return
-        p = Path(item.data(0, Qt.UserRole))
+        p = Path(item.data(0, Qt.UserRole)); videos = []
         try:
             for e in sorted(p.iterdir()):
                 if e.is_dir():
@@ -976,12 +821,179 @@ class MainWindow(QMainWindow):
                 elif e.suffix.lower() in ('.mp4','.mkv','.avi'):
                     v = QTreeWidgetItem(item, [e.name]); v.setData(0, Qt.UserRole, e.as_posix())
                     v.setFlags(v.flags() | Qt.ItemIsUserCheckable | Qt.ItemIsEnabled | Qt.ItemIsSelectable); v.setCheckState(0, Qt.Unchecked)
+                    self._video_items[e.as_posix()] = v
+                    videos.append(v)
         except Exception:
             logger.exception("Error expanding folder %s", p)
+        self._load_media_info(videos)
         # Auto-detect TV shows when folder is expanded (with prompt on failure)
         # This handles both root folders and subfolders
         self._scan_folder_for_shows(p, item, prompt_on_failure=True)
         self.show_shows_grid()
+    def _load_media_info(self, items):
+        """Attach cached thumbnails and media_info rows to new video items; register worker tasks for the rest."""
+        if not items: return
+        try:
+            rows = self.db.get_media_info_many([v.data(0, Qt.UserRole) for v in items])
+        except Exception:
+            logger.exception("Failed to load media info")
+            rows = {}
+        try:
+            thumbs = self.thumb_store.get_best_many([v.data(0, Qt.UserRole) for v in items], self._thumb_width)
+            failures = self.thumb_store.failures_many([v.data(0, Qt.UserRole) for v in items if v.data(0, Qt.UserRole) not in thumbs])
+        except Exception:
+            logger.exception("Failed to load thumbnails")
+            thumbs, failures = {}, {}
+        REGISTRY.inc("thumb_store_lookups_total", len(thumbs), result="hit")
+        REGISTRY.inc("thumb_store_lookups_total", len(items) - len(thumbs), result="miss")
+        now = time.time()
+        for v in items:
+            vp = v.data(0, Qt.UserRole); row = rows.get(vp); level, data = thumbs.get(vp, (None, None))
+            if data is None:
+                failed = failures.get(vp)
+                if failed is None or (failed[2] is not None and failed[2] <= now):
+                    # Thumbnail tasks probe as a side effect; the result arrives via thumb_result
+                    self.thumb_sched.want(vp)
+                    continue
+                # Still backing off (or given up until the file changes)
+                if failed[2] is None: v.setData(0, THUMB_FAILED_ROLE, failed[1] or "failed")
+                if is_fresh(row, vp): v.setData(0, MEDIA_INFO_ROLE, row)
+                else: self.thumb_sched.want(vp, mode="probe", pri=2)
+                continue
+            self.image_decoder.decode(data, lambda pix, vp=vp: self._show_thumb(vp, pix))
+            if level < self._thumb_width:
+                # Show the smaller level now; the sharper one replaces it when ready
+                self.thumb_sched.want(vp, pri=2)
+            if is_fresh(row, vp):
+                v.setData(0, MEDIA_INFO_ROLE, row)
+            else:
+                self.thumb_sched.want(vp, mode="probe", pri=2)
+    def _on_thumb_result(self, res):
+        """Update the one tree row a finished worker task belongs to."""
+        p = res['path']
+        if res['mode'] == "storyboard":
+            if res['ok'] and p == getattr(self, '_now_playing', None): self.seek_preview.load(p)
+            return
+        self.thumb_sched.finished(p, res['mode'], res['status'])
+        started = self._thumb_requested_at.pop(p, None) if res['mode'] == "thumb" else None
+        pix = None
+        if res.get('shm_slot') is not None:
+            pix = self._take_shm_frame(p, res['shm_slot'])
+        if res['mode'] == "thumb" and res['status'] == "failed":
+            self._record_thumb_failure(p, res.get('error'))
+        item = self._video_items.get(p)
+        if item is None or not res['ok']: return
+        try:
+            if res['mode'] == "thumb":
+                if pix is not None:
+                    self._show_thumb(p, pix, started, 'shm')
+                else:
+                    _, data = self.thumb_store.get_best_many([p], self._thumb_width).get(p, (None, None))
+                    if data: self.image_decoder.decode(data, lambda pix, p=p, s=started: self._show_thumb(p, pix, s, 'jpeg'))
+            # Both task kinds probe first, so media info is available now
+            row = self.db.get_media_info(p)
+            if row: item.setData(0, MEDIA_INFO_ROLE, row)
+        except RuntimeError:
+            # The item was deleted with its tree (e.g. library refresh)
+            self._video_items.pop(p, None)
+        except Exception:
+            logger.exception("Failed to apply worker result for %s", p)
+    def _show_thumb(self, p, pix, started=None, kind=None):
+        """Set a decoded thumbnail on the row of `p`; `started`/`kind` record request -> paint latency."""
+        item = self._video_items.get(p)
+        if item is None or pix.isNull(): return
+        try:
+            item.setData(0, Qt.DecorationRole, pix)
+        except RuntimeError:
+            self._video_items.pop(p, None); return
+        if started is not None:
+            REGISTRY.observe("thumb_first_paint_ms", (time.perf_counter() - started) * 1000, path=kind)
+    def _record_thumb_failure(self, p, reason):
+        """Remember a failed thumbnail so it is not requested again before its backoff expires."""
+        try:
+            attempts, permanent = self.thumb_store.record_failure(p, reason or "unknown")
+        except Exception:
+            logger.exception("Failed to record thumbnail failure for %s", p)
+            return
+        logger.info("Thumbnail failed for %s (attempt %s): %s", p, attempts, reason)
+        item = self._video_items.get(p)
+        if permanent and item is not None:
+            try: item.setData(0, THUMB_FAILED_ROLE, reason or "failed")
+            except RuntimeError: self._video_items.pop(p, None)
+    def _take_shm_frame(self, p, slot):
+        """Wrap a shared-memory frame as a QImage (no copy), then persist it to the thumbnail store off the UI thread."""
+        ring = self.thumb_pool.shm
+        try:
+            img = QImage(self.thumb_pool.shm_view(slot), ring.width, ring.height, ring.width * 4, QImage.Format_RGB32)
+            pix = QPixmap.fromImage(img)
+        except Exception:
+            logger.exception("Failed to read shared-memory frame for %s", p)
+            self.thumb_pool.release_shm(slot)
+            return None
+        def persist():
+            try:
+                buf = QBuffer(); buf.open(QIODevice.WriteOnly)
+                if img.save(buf, "JPG", 90):
+                    self.thumb_store.put(p, bytes(buf.data()))
+                else:
+                    logger.warning("Failed to encode thumbnail for %s", p)
+            except Exception:
+                logger.exception("Failed to persist thumbnail for %s", p)
+            finally:
+                self.thumb_pool.release_shm(slot)
+        try:
+            self._thumb_saver.submit(persist)
+        except RuntimeError:
+            # Saver already shut down (closing)
+            self.thumb_pool.release_shm(slot)
+        return pix
+    def _request_storyboards(self, p):
+        """Show the storyboard of `p` if cached; build it (and the next playlist item's) in the background."""
+        if not self.seek_preview.load(p):
+            self._request_thumb(p, mode="storyboard", pri=0)
+        idx = self._next_index()  # the item that will actually play next (repeat/shuffle aware)
+        if idx is not None:
+            nxt = self.plist.item(idx).data(Qt.UserRole)
+            if nxt and nxt != p and load_index(nxt) is None:
+                self._request_thumb(nxt, mode="storyboard", pri=2)
+    def _on_seek_hover(self, x):
+        p, d = getattr(self, '_now_playing', None), self._duration()
+        if d <= 0 or not self.seek_preview.has_storyboard(p): return
+        t = int(max(0, min(1, x / max(1, self.sk.width()))) * d)
+        self.seek_preview.show_at(self.sk.mapToGlobal(QPoint(x, 0)), t)
+    def _log_thumb_metrics(self):
+        m = self.thumb_pool.metrics()
+        m['first_paint_ms'] = {k: REGISTRY.histogram("thumb_first_paint_ms", path=k) for k in ('shm', 'jpeg')}
+        m['pixmap_cache'] = self.lib_delegate.pix_cache.stats()
+        m['decoder'] = self.image_decoder.stats()
+        try: m['thumb_failures'] = self.thumb_store.failure_counts()
+        except Exception: logger.exception("Failed to count thumbnail failures")
+        # GUI-side state goes into the registry as gauges next to the pool's own metrics
+        for k in ('hit_rate', 'entries', 'mb', 'evictions'):
+            if m['pixmap_cache'][k] is not None: REGISTRY.set(f"pixmap_cache_{k}", m['pixmap_cache'][k])
+        for k in ('backlog', 'gui_stalls', 'max_stall_ms', 'max_flush_ms'):
+            REGISTRY.set(f"image_decoder_{k}", m['decoder'][k])
+        for k, v in m.get('thumb_failures', {}).items(): REGISTRY.set("thumb_failed_files", v, state=k)
+        logger.info("Thumb metrics: %s", m)
+        if self.cfg.get("metrics_file"):
+            try: REGISTRY.dump(self.cfg["metrics_file"])
+            except Exception: logger.exception("Failed to write metrics to %s", self.cfg["metrics_file"])
+    def _request_thumb(self, p, mode="thumb", pri=1):
+        """Queue a worker task for `p` unless an identical one is already queued or running.
+        Returns True if the task is queued or running afterwards."""
+        try:
+            width = self._thumb_width if mode == "thumb" else None
+            if self.thumb_pool.submit(p, self.cfg['preview_start'], mode, pri, width=width):
+                if mode == "thumb": self._thumb_requested_at[p] = time.perf_counter()
+                logger.debug("Enqueued %s request for %s (pri=%s)", mode, p, pri)
+                return True
+            return self.thumb_pool.is_pending(p, mode, width)
+        except Exception:
+            logger.exception("Failed to enqueue %s request for %s", mode, p)
+            return False
+    def _duration(self):
+        """Length of the playing media in ms, falling back to the probe cache while libvlc is still opening."""
+        return getattr(self, '_length', 0) or getattr(self, '_now_duration', 0)
     def on_tree_click(self, it, col):
         p = it.data(0, Qt.UserRole)
         if p and not os.path.isdir(p) and self.tree.viewport().mapFromGlobal(QCursor.pos()).x() < 30:
@@ -989,11 +1001,22 @@ class MainWindow(QMainWindow):
             else: self.checked_paths.add(p)
             self.tree.viewport().update()
     def on_hover(self, it, col):
+        """Play a muted preview over the hovered card's thumbnail. The backend's preview thread
+        keeps only the latest request, so sweeping the mouse across cards is cheap."""
         p = it.data(0, Qt.UserRole)
-        # Removed hover video preview - always hide overlay
-        self.ov.hide()
-        self.backend.stop_prev()
-        self._hover_preview = None
+        is_video = p and str(p).lower().endswith(('.mp4', '.mkv', '.avi'))
+        if not (is_video and self.cfg["show_video"]):
+            self._hide_preview(); return
+        if p == self._hover_preview: return
+        r = self.tree.visualItemRect(it); tw = self.cfg["card_width"]
+        self.ov.setGeometry(r.left() + 35, r.top() + 5, tw, int(tw * 0.56))  # LibraryDelegate's thumbnail rect
+        self.ov.show(); self.ov.raise_()
+        self._hover_preview = p
+        self.backend.open_prev(p, self.cfg["preview_start"])
+        self.tm.start()
+    def _hide_preview(self):
+        if self.ov.isVisible() or self._hover_preview: self.backend.stop_prev()
+        self.ov.hide(); self._hover_preview = None
     def on_activated(self, it, col):
         p = it.data(0, Qt.UserRole)
         if p and not os.path.isdir(p): self.p_m(p)
@@ -1075,8 +1098,9 @@ class MainWindow(QMainWindow):
                 QMessageBox.Yes | QMessageBox.No)
             if reply == QMessageBox.Yes:
                 Path(path).rename(new_path)
-                # Update DB with new path
+                # Update DB with new path and carry the thumbnail over
                 self.db.update_video_path(path, str(new_path))
+                move_thumbnail(path, str(new_path))
                 logger.info(f"Renamed {path} to {new_path}")
             else:
                 logger.info(f"User cancelled rename for {path}")
@@ -1244,11 +1268,15 @@ class MainWindow(QMainWindow):
             li.setData(Qt.UserRole, x['p'])
             self.plist.addItem(li)
     def p_m(self, p): 
-        self.ov.hide(); self.backend.stop_prev(); self.backend.open_main(p)
+        self._hide_preview(); self._length = 0; self.backend.open_main(p)
+        self._preload_done = False; self._shuffle_next = None
         for i in range(self.plist.count()):
             if self.plist.item(i).data(Qt.UserRole) == p: self.plist.setCurrentRow(i); break
         try:
             self._now_playing = p
+            row = self.db.get_media_info(p)
+            self._now_duration = row[3] if is_fresh(row, p) and row[3] else 0  # duration_ms
+            self._request_storyboards(p)
             try:
                 if hasattr(self, '_title_bar') and self._title_bar is not None:
                     # set centered title via helper
@@ -1267,86 +1295,47 @@ class MainWindow(QMainWindow):
         if video_path:
             self.p_m(video_path)
 
-    def play_next(self):
-        if self.plist.count() == 0: return
-        if self.repeat_mode == 'one':
-            # Repeat current
-            self.p_m(self.plist.currentItem().data(Qt.UserRole))
-            return
+    def _next_index(self):
+        """Playlist row that play_next will start, honouring repeat/shuffle; None at the end of the list.
+        The shuffle pick is remembered so a preloaded item is the one that actually plays next."""
+        n = self.plist.count()
+        if n == 0: return None
         idx = self.plist.currentRow()
+        if self.repeat_mode == 'one' and idx >= 0: return idx
         if self.shuffle:
-            idx = random.randint(0, self.plist.count() - 1)
-        else:
-            next_idx = idx + 1
-            # If at last video and not repeating all, don't play
-            if next_idx >= self.plist.count() and self.repeat_mode != 'all':
-                return
-            idx = next_idx % self.plist.count()
+            if self._shuffle_next is None or self._shuffle_next >= n: self._shuffle_next = random.randint(0, n - 1)
+            return self._shuffle_next
+        # If at last video and not repeating all, don't play
+        if idx + 1 >= n and self.repeat_mode != 'all': return None
+        return (idx + 1) % n
+    def play_next(self):
+        idx = self._next_index()
+        if idx is None: return
         self.plist.setCurrentRow(idx); self.p_m(self.plist.currentItem().data(Qt.UserRole))
+    def _maybe_preload(self, d, cur):
+        """Preload the next playlist item once the current one is within preload_next_s of its end."""
+        lead = self.cfg.get("preload_next_s", 20) * 1000
+        if not lead or d <= 0 or d - cur > lead or self._preload_done: return
+        self._preload_done = True
+        idx = self._next_index()
+        if idx is not None: self.backend.preload(self.plist.item(idx).data(Qt.UserRole))
     def upd(self):
+        """Hide the hover overlay once the mouse leaves the tree; stops itself when there is nothing to watch."""
         m_pos = self.tree.viewport().mapFromGlobal(QCursor.pos())
-        if self.ov.isVisible() and not self.tree.viewport().rect().contains(m_pos): self.ov.hide(); self.backend.stop_prev()
-        m = self.backend.main_player; state = self.backend.get_state_safe()
-        self.bp.setIcon(self.icns["pause" if state == 3 else "play"])
-        if state == 6 and self.plist.count() > 0: self.play_next()
-        d, cur = m.get_length(), m.get_time()
-        if d > 0 and not self.sk.isSliderDown(): self.sk.setValue(int((cur/d)*1000))
-        if d > 0: self.lbl_t.setText(f"{cur//60000}:{(cur//1000)%60:02} / {d//60000}:{(d//1000)%60:02}")
-        it = QTreeWidgetItemIterator(self.tree)
-        while it.value():
-            item = it.value(); p = str(item.data(0, Qt.UserRole))
-            if item.data(0, Qt.DecorationRole) is None and not os.path.isdir(p) and p != "None":
-                tp = os.path.join(str(ROOT), "resources", "thumbs", f"{get_h(p)}.jpg")
-                if os.path.exists(tp):
-                    pix = QPixmap(tp)
-                    if not pix.isNull():
-                        item.setData(0, Qt.DecorationRole, pix)
-                else:
-                    try:
-                        # Ensure worker is alive before writing
-                        self._ensure_worker_running()
-                        # Log diagnostics about the worker and stdin before attempting write
-                        try:
-                            wpid = getattr(self.worker, 'pid', None)
-                            wpoll = None if self.worker is None else self.worker.poll()
-                            ipc_port = getattr(self, '_ipc_port', None)
-                            logger.debug("Attempting to request thumbnail: pid=%s poll=%s ipc_port=%s p=%s", wpid, wpoll, ipc_port, p)
-                            if ipc_port:
-                                logger.debug("Worker IPC port: %s", ipc_port)
-                        except Exception:
-                            logger.exception("Failed to collect worker diagnostics before write")
-
-                        # Enqueue the thumbnail request for the writer thread to handle
-                        try:
-                            try:
-                                self._ensure_worker_running()
-                            except Exception:
-                                logger.exception("Failed to ensure worker before enqueue")
-                            try:
-                                # Deduplicate: skip if a request for this path is already pending
-                                if p in self._pending_thumbs:
-                                    logger.debug("Thumbnail request already pending for %s; skipping enqueue", p)
-                                else:
-                                    # Prioritize the currently-hovered preview path
-                                    pri = 0 if getattr(self, '_hover_preview', None) == p else 1
-                                    seq = next(self._seq)
-                                    try:
-                                        self._thumb_queue.put_nowait((pri, seq, (p, self.cfg['preview_start'])))
-                                        self._pending_thumbs.add(p)
-                                        self._metrics['queued'] += 1
-                                        logger.debug("Enqueued thumbnail request for %s (pri=%s)", p, pri)
-                                    except queue.Full:
-                                        self._metrics['dropped'] += 1
-                                        logger.warning("Thumbnail queue full; dropping request for %s", p)
-                                    except Exception:
-                                        logger.exception("Failed to enqueue thumbnail request for %s", p)
-                            except Exception:
-                                logger.exception("Unexpected error while enqueuing thumbnail for %s", p)
-                        except Exception:
-                            logger.exception("Unexpected error while enqueuing thumbnail for %s", p)
-                    except Exception:
-                        logger.exception("Failed to request thumbnail for %s", p)
-            it += 1
+        if self.ov.isVisible() and not self.tree.viewport().rect().contains(m_pos): self._hide_preview()
+        if not self.ov.isVisible(): self.tm.stop()
+    def _on_time(self, cur):
+        d = self._duration()
+        if d <= 0: return
+        if not self.sk.isSliderDown(): self.sk.setValue(int((cur/d)*1000))
+        self.lbl_t.setText(f"{cur//60000}:{(cur//1000)%60:02} / {d//60000}:{(d//1000)%60:02}")
+        self._maybe_preload(d, cur)
+    def _on_length(self, ms):
+        self._length = ms
+    def _on_state(self, state):
+        self.bp.setIcon(self.icns["pause" if state == "playing" else "play"])
+    def _on_ended(self):
+        if self.plist.count() > 0: self.play_next()
 
     def _monitor_controller(self):
         try:
@@ -1355,7 +1344,7 @@ class MainWindow(QMainWindow):
                 for event in events:
                     if event.state == 1:  # Button press
                         if event.code == 'BTN_SOUTH':  # A / Cross
-                            self.backend.main_player.pause()
+                            self.backend.pause()
                         elif event.code == 'BTN_EAST':  # B / Circle
                             self.play_next()
                         elif event.code == 'BTN_WEST':  # X / Square
@@ -1376,12 +1365,9 @@ class MainWindow(QMainWindow):
                             vol = max(0, self.cfg["volume"] - 5)
                             self.set_vol_save(vol)
                         elif event.code == 'ABS_X-':  # D-pad left
-                            pos = self.backend.main_player.get_time() - 10000
-                            self.backend.main_player.set_time(max(0, pos))
+                            self.backend.seek_by(-10000)
                         elif event.code == 'ABS_X+':  # D-pad right
-                            pos = self.backend.main_player.get_time() + 10000
-                            length = self.backend.main_player.get_length()
-                            self.backend.main_player.set_time(min(length, pos))
+                            self.backend.seek_by(10000, self._duration())
         except Exception:
             logger.exception("Controller monitoring error")
 
@@ -1389,24 +1375,14 @@ class MainWindow(QMainWindow):
         modes = ['none', 'one', 'all']
         current_idx = modes.index(self.repeat_mode)
         self.repeat_mode = modes[(current_idx + 1) % len(modes)]
+        self._preload_done = False  # the next item may have changed
         self.bt_repeat.setText(f"Repeat {self.repeat_mode.title()}")
 
     def toggle_shuffle(self):
         self.shuffle = not self.shuffle
+        self._preload_done = False; self._shuffle_next = None
         self.bt_shuffle.setText("Shuffle On" if self.shuffle else "Shuffle Off")
 
-    def play_next(self):
-        if self.plist.count() == 0: return
-        if self.repeat_mode == 'one':
-            # Repeat current
-            self.p_m(self.plist.currentItem().data(Qt.UserRole))
-            return
-        idx = self.plist.currentRow()
-        if self.shuffle:
-            idx = random.randint(0, self.plist.count() - 1)
-        else:
-            idx = (idx + 1) % self.plist.count()
-        self.plist.setCurrentRow(idx); self.p_m(self.plist.currentItem().data(Qt.UserRole))
     def closeEvent(self, e):
         try:
             # Stop metadata scanner
@@ -1415,22 +1391,22 @@ class MainWindow(QMainWindow):
         except Exception:
             logger.exception("Error stopping metadata scanner")
         try:
-            # Signal writer thread to exit using a sentinel tuple
-            try:
-                seq = next(self._seq)
-                self._thumb_queue.put_nowait((999999, seq, None))
-            except Exception:
-                pass
+            self.duplicates_view.stop()
         except Exception:
-            logger.exception("Error signaling writer thread to stop")
+            logger.exception("Error stopping duplicate indexing")
         try:
-            if self.worker:
-                try:
-                    self.worker.terminate()
-                except Exception:
-                    logger.exception("Failed to terminate worker")
+            self.poster_cache.shutdown()
+        except Exception:
+            logger.exception("Error shutting down poster cache")
+        try:
+            self.image_decoder.shutdown()
+        except Exception:
+            logger.exception("Error shutting down image decoder")
+        try:
+            self._thumb_saver.shutdown(wait=True)
+            self.thumb_pool.shutdown()
         except Exception:
-            logger.exception("Error while terminating worker on close")
+            logger.exception("Error shutting down thumbnail workers")
         try:
             self.backend.release()
         except Exception:
@@ -0,0 +1,62 @@
+"""
+Scaled Pixmap Cache
+Keeps thumbnails already smooth-scaled to the size a library card paints
+them at, so repaints (hover, scroll, the periodic UI tick) only blit. Entries
+are keyed by video path, target size, device pixel ratio and the source
+pixmap's cacheKey (a new thumbnail for the same path misses naturally), and
+the least recently painted ones are evicted once the byte budget is exceeded.
+"""
+
+from collections import OrderedDict
+from qtpy.QtCore import Qt
+import logging
+
+logger = logging.getLogger("PIXMAP_CACHE")
+
+
+class ScaledPixmapCache:
+    """LRU of scaled QPixmaps bounded by an approximate byte budget. GUI thread only."""
+
+    def __init__(self, budget_mb=32):
+        self.budget_bytes = int(budget_mb) * 1024 * 1024
+        self._items = OrderedDict()  # key -> (QPixmap, bytes)
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def scaled(self, path, pix, size, dpr=1.0):
+        """`pix` scaled to fit `size` (logical pixels) at `dpr`, from the cache when possible."""
+        key = (path, size.width(), size.height(), dpr, pix.cacheKey())
+        entry = self._items.get(key)
+        if entry is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        # Scale in device pixels so HiDPI screens get a sharp 1:1 blit
+        out = pix.scaled(size * dpr, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        out.setDevicePixelRatio(dpr)
+        cost = out.width() * out.height() * max(1, out.depth() // 8)
+        if cost > self.budget_bytes:
+            return out
+        self._items[key] = (out, cost)
+        self.bytes += cost
+        while self.bytes > self.budget_bytes:
+            _, (_, freed) = self._items.popitem(last=False)
+            self.bytes -= freed
+            self.evictions += 1
+        return out
+
+    def clear(self):
+        self._items.clear()
+        self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._items),
+            'mb': round(self.bytes / (1024 * 1024), 1),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        }
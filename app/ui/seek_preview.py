@@ -0,0 +1,93 @@
+"""
+Seek Preview
+Tooltip-style popup for the seek bar showing the storyboard frame nearest to
+the hovered position. The sprite sheet is decoded once per video on the
+ImageDecoder pool and tiles are cut from it on first hover, so neither loading
+nor hovering decodes JPEGs or touches libvlc on the GUI thread.
+"""
+
+from qtpy.QtWidgets import *
+from qtpy.QtCore import *
+from qtpy.QtGui import *
+from bisect import bisect_left
+import logging
+from app.util.storyboard import storyboard_paths, load_index
+from app.util.media_probe import format_duration
+
+logger = logging.getLogger("SEEK_PREVIEW")
+
+
+class SeekPreview(QFrame):
+    """Storyboard tile + timestamp shown above the seek slider."""
+
+    def __init__(self, parent=None, decoder=None):
+        super().__init__(parent, Qt.ToolTip | Qt.FramelessWindowHint)
+        self.decoder = decoder  # ImageDecoder; the sheet is decoded off the GUI thread when set
+        self.setStyleSheet("background:#111; border:1px solid #444;")
+        lay = QVBoxLayout(self)
+        lay.setContentsMargins(2, 2, 2, 2)
+        lay.setSpacing(1)
+        self.img = QLabel()
+        self.time = QLabel()
+        self.time.setAlignment(Qt.AlignCenter)
+        self.time.setStyleSheet("color:white; font-size:11px; border:none;")
+        lay.addWidget(self.img)
+        lay.addWidget(self.time)
+        self._path = None
+        self._index = None
+        self._sheet = None  # QPixmap of the whole sprite sheet once decoded
+        self._times = []  # captured timestamps, ascending
+        self._slots = []  # sheet tile number per captured timestamp
+        self._pix = {}  # tile index -> QPixmap, cut on first hover
+
+    def load(self, vpath):
+        """Start loading the storyboard of `vpath`. Returns False if none exists yet."""
+        if vpath == self._path:
+            return True
+        self.clear()
+        index = load_index(vpath)
+        if not index:
+            return False
+        captured = [(i, t) for i, t in enumerate(index["times_ms"]) if t >= 0]  # -1: frame was not captured
+        if not captured:
+            return False
+        self._path, self._index = vpath, index
+        self._slots, self._times = [i for i, _ in captured], [t for _, t in captured]
+        sheet = str(storyboard_paths(vpath)[0])
+        if self.decoder is not None:
+            self.decoder.decode(sheet, lambda pixmap, p=vpath: self._set_sheet(p, pixmap))
+        else:
+            self._set_sheet(vpath, QPixmap(sheet))
+        return True
+
+    def _set_sheet(self, vpath, pixmap):
+        if vpath != self._path:
+            return  # another video was loaded meanwhile
+        if pixmap.isNull():
+            logger.warning(f"Unreadable storyboard sheet for {vpath}")
+            return
+        self._sheet = pixmap
+
+    def clear(self):
+        self._path = self._index = self._sheet = None
+        self._times, self._slots, self._pix = [], [], {}
+        self.hide()
+
+    def has_storyboard(self, vpath):
+        return vpath is not None and vpath == self._path and self._sheet is not None
+
+    def show_at(self, anchor, t_ms):
+        """Show the tile nearest to `t_ms`, centered horizontally above global point `anchor`."""
+        i = bisect_left(self._times, t_ms)
+        if i > 0 and (i == len(self._times) or t_ms - self._times[i - 1] < self._times[i] - t_ms):
+            i -= 1
+        pix = self._pix.get(i)
+        if pix is None:
+            tw, th, cols = self._index["tile_w"], self._index["tile_h"], self._index["cols"]
+            slot = self._slots[i]
+            pix = self._pix[i] = self._sheet.copy((slot % cols) * tw, (slot // cols) * th, tw, th)
+        self.img.setPixmap(pix)
+        self.time.setText(format_duration(t_ms))
+        self.adjustSize()
+        self.move(anchor.x() - self.width() // 2, anchor.y() - self.height() - 6)
+        self.show()
@@ -20,10 +20,15 @@ class TVStyleShowsWidget(QWidget):
     """
     
     play_video = Signal(str)  # Emitted when user selects an episode to play
+    _poster_ready = Signal(str, str, str)  # kind, source, variant path (from cache pool threads)
     
-    def __init__(self, db, parent=None):
+    def __init__(self, db, parent=None, poster_cache=None, decoder=None):
         super().__init__(parent)
         self.db = db
+        self.poster_cache = poster_cache
+        self.decoder = decoder  # ImageDecoder; posters are decoded off the GUI thread when set
+        self._poster_labels = {}  # (kind, source) -> [QLabel] waiting for a variant
+        self._poster_ready.connect(self._on_poster_ready)
         self.current_view = 'shows'  # shows, seasons, episodes
         self.current_show = None
         self.current_season = None
@@ -174,6 +179,7 @@ class TVStyleShowsWidget(QWidget):
         """Clear the grid layout."""
         self.items = []
         self.selected_index = 0
+        self._poster_labels = {}
         while self.grid_layout.count():
             item = self.grid_layout.takeAt(0)
             if item.widget():
@@ -244,14 +250,9 @@ class TVStyleShowsWidget(QWidget):
             }
         """)
         
-        # Load image if available
-        if show_data[4]:  # cached_image_path
-            pixmap = QPixmap(show_data[4])
-            if not pixmap.isNull():
-                scaled = pixmap.scaled(180, 270, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                poster.setPixmap(scaled)
-        else:
-            # Show placeholder with show name
+        # Load pre-scaled poster if cached, otherwise show placeholder with show name
+        source = show_data[3] or show_data[4]  # image_url, legacy cached_image_path
+        if not self._set_poster(poster, 'show', source):
             poster.setText(show_data[2])  # show name
             poster.setWordWrap(True)
             poster.setStyleSheet("""
@@ -410,12 +411,7 @@ class TVStyleShowsWidget(QWidget):
         """)
         
         # Try to load season image
-        if season_data[3]:  # image_url or cached path
-            pixmap = QPixmap(season_data[3])
-            if not pixmap.isNull():
-                scaled = pixmap.scaled(180, 250, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                poster.setPixmap(scaled)
-                poster.setText("")
+        self._set_poster(poster, 'season', season_data[3])  # image_url
         
         layout.addWidget(poster)
         
@@ -650,6 +646,14 @@ class TVStyleShowsWidget(QWidget):
         """)
         layout.addWidget(num_label)
         
+        # Episode still (only shown once a cached variant exists)
+        if episode_data[6]:  # image_url
+            still = QLabel()
+            still.setFixedSize(96, 54)
+            still.setStyleSheet("background: transparent; border: none;")
+            self._set_poster(still, 'episode', episode_data[6])
+            layout.addWidget(still)
+        
         # Episode info
         info_widget = QWidget()
         info_layout = QVBoxLayout(info_widget)
@@ -709,6 +713,55 @@ class TVStyleShowsWidget(QWidget):
         
         return item
         
+    def _set_poster(self, label, kind, source):
+        """Show the pre-scaled `kind` variant of `source` on `label`.
+        
+        Returns True if the pixmap was set right away. Otherwise (the variant is
+        still being built, or is being decoded in the background) it is applied
+        when ready and the caller should show its placeholder meanwhile.
+        """
+        if not source or self.poster_cache is None:
+            return False
+        path = self.poster_cache.get(kind, source)
+        if path:
+            if self.decoder is not None:
+                self.decoder.decode(path, lambda pixmap, l=label: self._apply_poster(l, pixmap))
+                return False  # the placeholder stays if the decode fails
+            pixmap = QPixmap(path)
+            if not pixmap.isNull():
+                label.setPixmap(pixmap)
+                return True
+        self._poster_labels.setdefault((kind, source), []).append(label)
+        self.poster_cache.request(kind, source, self._poster_ready.emit)
+        return False
+        
+    def _on_poster_ready(self, kind, source, path):
+        """Apply a freshly built poster variant to any labels still waiting for it."""
+        labels = self._poster_labels.pop((kind, source), [])
+        if not labels:
+            return
+        if self.decoder is not None:
+            self.decoder.decode(path, lambda pixmap: [self._apply_poster(l, pixmap) for l in labels])
+            return
+        pixmap = QPixmap(path)
+        if pixmap.isNull():
+            return
+        for label in labels:
+            try:
+                label.setPixmap(pixmap)
+            except RuntimeError:
+                # Card was deleted by a grid refresh
+                pass
+        
+    def _apply_poster(self, label, pixmap):
+        if pixmap.isNull():
+            return
+        try:
+            label.setPixmap(pixmap)
+        except RuntimeError:
+            # Card was deleted by a grid refresh
+            pass
+
     def _calculate_columns(self):
         """Calculate number of columns based on width."""
         width = self.scroll.viewport().width()
@@ -0,0 +1,127 @@
+"""
+Thumbnail Scheduler
+Decides which library rows the worker pool works on. Rows that need a
+thumbnail or probe are only *registered* here; whenever the tree scrolls,
+expands, collapses or resizes, the scheduler walks the rows in and around the
+viewport (one viewport height of prefetch above and below), hands the pool a
+small window of tasks in visible-first order and cancels tasks for rows that
+left that area. Everything else waits until it is scrolled near again, so the
+pool never spends time on folders the user has already scrolled past.
+"""
+
+from qtpy.QtCore import QObject, QEvent, QPoint, QTimer, Qt
+import logging
+
+logger = logging.getLogger("THUMB_SCHEDULER")
+
+VISIBLE, PREFETCH = 0, 1  # zones, in scheduling order
+
+
+class ThumbScheduler(QObject):
+    """Feeds `request(path, mode, pri)` with tasks for rows near the viewport of `tree`. GUI thread only.
+
+    `request` returns True if the task was queued (or already is); `cancel(path, mode)`
+    withdraws a queued or running task. Call finished() for every result.
+    """
+
+    def __init__(self, tree, request, cancel, in_flight=8, prefetch=1.0):
+        super().__init__(tree)
+        self.tree = tree
+        self._request = request
+        self._cancel = cancel
+        self.in_flight = max(1, in_flight)
+        self.prefetch = prefetch  # margin in viewport heights
+        self._wanted = {}  # (path, mode) -> priority
+        self._submitted = set()  # (path, mode) handed to the pool and not finished yet
+        self._again = set()  # submitted keys wanted again (e.g. at a larger thumbnail level)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(30)  # coalesce bursts of scroll/expand events
+        self._timer.timeout.connect(self.schedule)
+        tree.verticalScrollBar().valueChanged.connect(self._timer.start)
+        tree.itemExpanded.connect(self._timer.start)
+        tree.itemCollapsed.connect(self._timer.start)
+        tree.viewport().installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Resize:
+            self._timer.start()
+        return False
+
+    def want(self, path, mode="thumb", pri=1):
+        """Register a task for the row of `path`; it runs once the row is near the viewport."""
+        key = (path, mode)
+        self._wanted[key] = min(pri, self._wanted.get(key, pri))
+        if key in self._submitted:
+            self._again.add(key)  # request it once more after the running task finishes
+            return
+        self._timer.start()
+
+    def finished(self, path, mode, status):
+        """Record a pool result. Cancelled tasks stay wanted and run again when scrolled back."""
+        key = (path, mode)
+        self._submitted.discard(key)
+        if key in self._again:
+            self._again.discard(key)
+        elif status != "cancelled":
+            self._wanted.pop(key, None)
+        self._timer.start()
+
+    def clear(self):
+        """Forget all rows (the tree was rebuilt) and cancel their tasks."""
+        for path, mode in self._submitted:
+            self._cancel(path, mode)
+        self._submitted.clear()
+        self._again.clear()
+        self._wanted.clear()
+
+    def _rows_near_viewport(self):
+        """{path: (zone, order)} for rows in or within the prefetch margin of the viewport."""
+        vp = self.tree.viewport()
+        height = vp.height()
+        margin = int(height * self.prefetch)
+        rows = {}
+        first = self.tree.itemAt(QPoint(1, 1))
+        if first is None:
+            return rows
+        it, order = first, 0
+        while it is not None:
+            rect = self.tree.visualItemRect(it)
+            if rect.top() > height + margin:
+                break
+            zone = VISIBLE if rect.top() < height else PREFETCH
+            rows[it.data(0, Qt.UserRole)] = (zone, order)
+            order += 1
+            it = self.tree.itemBelow(it)
+        it = self.tree.itemAbove(first)
+        while it is not None:
+            if self.tree.visualItemRect(it).bottom() < -margin:
+                break
+            rows[it.data(0, Qt.UserRole)] = (PREFETCH, order)
+            order += 1
+            it = self.tree.itemAbove(it)
+        return rows
+
+    def schedule(self):
+        """Cancel tasks for rows that left the viewport area, then top up the in-flight window."""
+        if not self._wanted and not self._submitted:
+            return
+        try:
+            rows = self._rows_near_viewport()
+        except RuntimeError:
+            return  # tree is being torn down
+        for key in [k for k in self._submitted if k[0] not in rows]:
+            self._cancel(*key)
+            self._submitted.discard(key)
+            self._again.discard(key)  # still wanted; runs when scrolled back
+        free = self.in_flight - len(self._submitted)
+        if free <= 0:
+            return
+        # Visible rows first, then by task priority, then top to bottom
+        ready = sorted((rows[k[0]][0], pri, rows[k[0]][1], k) for k, pri in self._wanted.items()
+                       if k[0] in rows and k not in self._submitted)
+        for zone, pri, _, (path, mode) in ready[:free]:
+            # Prefetched rows never outrank visible ones already queued
+            # A refused request (queue full) stays wanted and is retried on the next pass
+            if self._request(path, mode, pri + zone):
+                self._submitted.add((path, mode))
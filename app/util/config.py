@@ -8,7 +8,11 @@ FILE = "config.json"
 D = {
     "folders": [], "text_size": 10, "preview_start": 120, "card_width": 220,
     "show_static": True, "show_video": True, "volume": 70, "sidebar_width": 350,
-    "autohide_windowed": False, "nicknames": {}, "playlist": []
+    "autohide_windowed": False, "nicknames": {}, "playlist": [],
+    "poster_cache_mb": 64, "pixmap_cache_mb": 32, "thumb_workers": 0,  # 0 = CPU cores - 1
+    "preload_next_s": 20,  # seconds before the end of an item to preload the next one (0 = off)
+    "thumb_shm": False,  # deliver new thumbnails through shared memory instead of JPEG files
+    "metrics_file": ""  # if set, thumbnail metrics are written here every 5 s (.prom = Prometheus text, else JSON)
 }
 
 def load():
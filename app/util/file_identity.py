@@ -0,0 +1,99 @@
+"""
+File Identity
+A cheap content identity for video files: file size plus a hash of the first
+and last 64 KiB (read through mmap). It survives renames and moves, so rows,
+episode associations and thumbnails can follow a file to its new path.
+"""
+
+import os
+import mmap
+import hashlib
+from pathlib import Path
+import logging
+from app.util.thumb_store import get_store
+
+logger = logging.getLogger("FILE_IDENTITY")
+
+CHUNK = 64 * 1024
+
+
+def file_identity(path):
+    """Return (size, hex digest) for `path`; raises OSError if it cannot be read."""
+    size = os.path.getsize(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(size.to_bytes(8, 'little'))
+    if size == 0:
+        return size, h.hexdigest()
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            if size <= 2 * CHUNK:
+                h.update(m[:])
+            else:
+                h.update(m[:CHUNK])
+                h.update(m[size - CHUNK:])
+    return size, h.hexdigest()
+
+
+def copy_thumbnail(src_video, dst_video):
+    """Reuse the thumbnail of an identical file for `dst_video`. Returns True if one was copied."""
+    try:
+        return get_store().copy(src_video, dst_video)
+    except Exception:
+        logger.exception(f"Failed to copy thumbnail {src_video} -> {dst_video}")
+    return False
+
+
+def update_index(db, roots, stop_event=None, progress=None):
+    """Walk library roots and record identities of files not indexed yet (or whose size changed).
+
+    Already-known files cost one stat, so repeated runs are incremental.
+    Returns the number of files visited.
+    """
+    count = 0
+    for root in roots:
+        for f in Path(root).rglob("*"):
+            if stop_event is not None and stop_event.is_set():
+                return count
+            if f.suffix.lower() not in ('.mp4', '.mkv', '.avi'):
+                continue
+            relink_moved(db, f.as_posix())
+            count += 1
+            if progress and count % 50 == 0:
+                progress(count)
+    return count
+
+
+def move_thumbnail(old_path, new_path):
+    """Carry a cached thumbnail over to a video's new path."""
+    try:
+        return get_store().move(old_path, new_path)
+    except Exception:
+        logger.exception(f"Failed to move thumbnail {old_path} -> {new_path}")
+    return False
+
+
+def relink_moved(db, path):
+    """Record the identity of `path`, re-linking it to the row of a moved/renamed file.
+
+    If a known video with the same identity no longer exists at its stored
+    path, that row (episode association, media info) and its thumbnail are
+    moved to `path`. Returns the old path when a re-link happened, else None.
+    """
+    path = Path(path).as_posix()  # same key format as the tree, worker and update_index
+    known = db.get_video_identity(path)
+    try:
+        if known and known[1] and known[0] == os.path.getsize(path):  # identity already known and size unchanged
+            return None
+        size, digest = file_identity(path)
+    except (OSError, ValueError):
+        logger.debug(f"Could not hash {path}", exc_info=True)
+        return None
+    if not known:
+        for old_path in db.find_videos_by_identity(size, digest):
+            if old_path != path and not os.path.exists(old_path):
+                db.update_video_path(old_path, path)
+                move_thumbnail(old_path, path)
+                logger.info(f"Re-linked moved file {old_path} -> {path}")
+                return old_path
+    db.set_video_identity(path, size, digest)
+    return None
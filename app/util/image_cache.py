@@ -0,0 +1,155 @@
+"""
+Poster Image Cache
+Stores show/season/episode artwork as pre-scaled variants sized for the Watch tab
+cards so the UI only ever decodes small files. Variants are generated on a
+background pool as soon as the metadata scanner stores the artwork URLs (see
+prefetch), and the cache directory is kept under a byte budget with LRU
+eviction tracked in the metadata database.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from qtpy.QtCore import Qt, QByteArray
+from qtpy.QtGui import QImage
+from app.util.tvmaze_api import TVMazeAPI
+import logging
+
+logger = logging.getLogger("IMAGE_CACHE")
+
+ROOT = Path(__file__).parent.parent.parent.absolute()
+CACHE_DIR = ROOT / "resources" / "posters"
+
+# Exact poster label sizes used by TVStyleShowsWidget cards
+POSTER_SIZES = {
+    'show': (180, 270),
+    'season': (180, 250),
+    'episode': (96, 54),
+}
+
+
+class PosterCache:
+    """Pre-scaled poster variants with a size-bounded, LRU-evicted cache directory."""
+
+    def __init__(self, db, budget_mb=64, max_workers=2):
+        self.db = db
+        self.budget_bytes = int(budget_mb) * 1024 * 1024
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="poster")
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()  # one eviction pass at a time, from usage read to last delete
+        self._pending = set()  # (kind, source) currently being built
+        self._accessed = {}  # path -> last access time, flushed to the DB in batches
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    def variant_path(self, kind, source):
+        """Deterministic on-disk path for the `kind` variant of an image source (URL or file)."""
+        w, h = POSTER_SIZES[kind]
+        key = hashlib.md5(str(source).encode()).hexdigest()
+        return CACHE_DIR / f"{kind}_{key}_{w}x{h}.jpg"
+
+    def get(self, kind, source):
+        """Return the cached variant path if present, recording the access for LRU."""
+        if not source:
+            return None
+        path = self.variant_path(kind, source)
+        if not path.exists():
+            return None
+        flush = False
+        with self._lock:
+            self._accessed[str(path)] = time.time()
+            flush = len(self._accessed) >= 32
+        if flush:
+            self._pool.submit(self._flush_access)
+        return str(path)
+
+    def request(self, kind, source, on_ready=None):
+        """Build the `kind` variant for `source` in the background.
+
+        `on_ready(kind, source, path)` is called from a pool thread once the
+        variant exists; callers in the UI should marshal it onto the GUI thread.
+        """
+        if not source or kind not in POSTER_SIZES:
+            return
+        with self._lock:
+            if (kind, source) in self._pending:
+                return
+            self._pending.add((kind, source))
+        self._pool.submit(self._build, kind, source, on_ready)
+
+    def prefetch(self, items):
+        """Build the variants of (kind, source) pairs that are not cached yet, e.g. right after a scan.
+
+        Cards then find their poster on disk instead of downloading it on first render.
+        """
+        for kind, source in items:
+            if source and kind in POSTER_SIZES and not self.variant_path(kind, source).exists():
+                self.request(kind, source)
+
+    def _build(self, kind, source, on_ready):
+        path = self.variant_path(kind, source)
+        try:
+            if not path.exists():
+                if os.path.exists(str(source)):
+                    with open(str(source), 'rb') as f:
+                        data = f.read()
+                else:
+                    data = TVMazeAPI.fetch_image(source)
+                if not data:
+                    return
+                img = QImage.fromData(QByteArray(data))
+                if img.isNull():
+                    logger.warning(f"Could not decode poster image from {source}")
+                    return
+                w, h = POSTER_SIZES[kind]
+                scaled = img.scaled(w, h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                tmp = path.with_suffix(".tmp")
+                if not scaled.save(str(tmp), "JPG", 90):
+                    logger.warning(f"Failed to write poster variant {path}")
+                    return
+                os.replace(tmp, path)
+                self.db.add_cached_image(str(path), kind, path.stat().st_size, time.time())
+                logger.info(f"Cached {kind} poster {path.name} ({w}x{h})")
+                self._evict()
+            if on_ready:
+                on_ready(kind, source, str(path))
+        except Exception as e:
+            logger.exception(f"Error building {kind} poster for {source}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard((kind, source))
+
+    def _flush_access(self):
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+        try:
+            self.db.touch_cached_images(accessed)
+        except Exception as e:
+            logger.exception(f"Error recording poster cache access: {e}")
+
+    def _evict(self):
+        """Delete least recently used variants until the cache fits its budget."""
+        self._flush_access()
+        # Pool threads evict concurrently; each pass must see the usage left by the previous one
+        with self._evict_lock:
+            usage = self.db.get_image_cache_usage()
+            if usage <= self.budget_bytes:
+                return
+            for path, size in self.db.get_lru_cached_images():
+                if usage <= self.budget_bytes:
+                    break
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except OSError:
+                    logger.warning(f"Could not evict {path}")
+                    continue
+                self.db.remove_cached_image(path)
+                usage -= size or 0
+                logger.debug(f"Evicted poster {path}")
+
+    def shutdown(self):
+        self._flush_access()
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,63 @@
+"""
+Worker IPC
+Length-prefixed frames between the UI process and thumbnail workers: a 4-byte
+big-endian payload length followed by a UTF-8 JSON object. Paths travel as
+JSON strings, so any character (including '|') is safe.
+
+Messages (all carry a "type"):
+  req     {"id", "path", "preview", "mode", "priority"}   UI -> worker
+          (+ optional "width" thumbnail level and "shm" slot)
+  cancel  {"id"}                                           UI -> worker
+  ping    {"id", "t"}                                      UI -> worker
+  quit    {}                                               UI -> worker
+  done    {"id", "status", "ok", "error", "timings"}       worker -> UI
+          (+ "rss_mb" resident memory of the worker)
+  hb      {"id", "rss_mb"}                                 worker -> UI, every
+          second while a task runs
+  pong    {"id", "t"}                                      worker -> UI
+
+`status` is "done", "failed" or "cancelled"; `timings` maps step names to
+milliseconds (at least "queue_ms" and "work_ms").
+"""
+
+import json
+import struct
+
+HEADER = struct.Struct(">I")
+MAX_FRAME = 1 << 20  # 1 MiB; anything larger is a corrupt stream
+
+
+def encode(msg):
+    """Serialize one message into a complete frame."""
+    body = json.dumps(msg, separators=(',', ':')).encode('utf-8')
+    return HEADER.pack(len(body)) + body
+
+
+def send_msg(sock, msg):
+    sock.sendall(encode(msg))
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            if buf:
+                raise ConnectionError("connection closed mid-frame")
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_msg(sock):
+    """Read one message; returns None on a clean EOF between frames."""
+    head = _recv_exact(sock, HEADER.size)
+    if head is None:
+        return None
+    (size,) = HEADER.unpack(head)
+    if size > MAX_FRAME:
+        raise ValueError(f"frame of {size} bytes exceeds limit")
+    body = _recv_exact(sock, size)
+    if body is None:
+        raise ConnectionError("connection closed mid-frame")
+    return json.loads(body.decode('utf-8'))
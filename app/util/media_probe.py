@@ -0,0 +1,121 @@
+"""
+Media Probe
+Reads duration, resolution, codecs and track lists of a video with libvlc's
+preparser (no playback) so the rest of the app can use the cached values from
+the `media_info` table instead of opening the file again.
+"""
+
+import os
+import json
+import time
+import struct
+import threading
+import vlc
+import logging
+
+logger = logging.getLogger("MEDIA_PROBE")
+
+PROBE_TIMEOUT_MS = 5000
+
+
+def fourcc(code):
+    """Render a libvlc codec fourcc as text, e.g. 'h264'."""
+    try:
+        return struct.pack('<I', code).decode('ascii', errors='replace').strip('\x00 ') or None
+    except Exception:
+        return None
+
+
+def _text(v):
+    if isinstance(v, bytes):
+        return v.decode('utf-8', errors='replace')
+    return v
+
+
+def file_signature(path):
+    """(size, mtime) used to decide whether cached media info is still valid."""
+    st = os.stat(path)
+    return st.st_size, int(st.st_mtime)
+
+
+def is_fresh(row, path):
+    """True if a `media_info` row still describes the file on disk."""
+    if not row:
+        return False
+    try:
+        return (row[1], row[2]) == file_signature(path)  # file_size, mtime
+    except OSError:
+        return False
+
+
+def probe(inst, path, timeout_ms=PROBE_TIMEOUT_MS):
+    """Parse `path` with libvlc and return a media info dict, or None on failure."""
+    size, mtime = file_signature(path)
+    media = inst.media_new(path)
+    done = threading.Event()
+    try:
+        media.event_manager().event_attach(vlc.EventType.MediaParsedChanged, lambda e: done.set())
+    except Exception:
+        logger.debug("Could not attach MediaParsedChanged for %s", path, exc_info=True)
+    started = time.perf_counter()
+    media.parse_with_options(vlc.MediaParseFlag.local, timeout_ms)
+    done.wait(timeout_ms / 1000 + 0.5)
+    status = media.get_parsed_status()
+    if status != vlc.MediaParsedStatus.done:
+        logger.warning("Probe of %s ended with status %s", path, status)
+        media.release()
+        return None
+    info = {
+        'file_size': size, 'mtime': mtime, 'duration_ms': media.get_duration(),
+        'width': None, 'height': None, 'video_codec': None, 'audio_codec': None,
+        'audio_tracks': [], 'subtitle_tracks': [],
+    }
+    for track in media.tracks_get() or []:
+        try:
+            lang = _text(track.language)
+            if track.type == vlc.TrackType.video and info['video_codec'] is None:
+                info['video_codec'] = fourcc(track.codec)
+                v = track.video.contents
+                info['width'], info['height'] = v.width, v.height
+            elif track.type == vlc.TrackType.audio:
+                a = track.audio.contents
+                info['audio_tracks'].append({'codec': fourcc(track.codec), 'channels': a.channels,
+                                             'rate': a.rate, 'language': lang})
+                if info['audio_codec'] is None:
+                    info['audio_codec'] = fourcc(track.codec)
+            elif track.type == vlc.TrackType.ext:
+                info['subtitle_tracks'].append({'codec': fourcc(track.codec), 'language': lang,
+                                                'description': _text(track.description)})
+        except Exception:
+            logger.debug("Skipping unreadable track in %s", path, exc_info=True)
+    media.release()
+    logger.debug("Probed %s in %.0f ms: %s", path, (time.perf_counter() - started) * 1000, info)
+    return info
+
+
+def ensure_probed(inst, db, path):
+    """Return a fresh `media_info` row for `path`, probing and storing it if needed."""
+    row = db.get_media_info(path)
+    if is_fresh(row, path):
+        return row
+    info = probe(inst, path)
+    if info is None:
+        return None
+    db.set_media_info(path, info)
+    return db.get_media_info(path)
+
+
+def format_duration(ms):
+    """'h:mm:ss' or 'm:ss' for a duration in milliseconds."""
+    s = max(0, int(ms or 0)) // 1000
+    if s >= 3600:
+        return f"{s // 3600}:{(s // 60) % 60:02}:{s % 60:02}"
+    return f"{s // 60}:{s % 60:02}"
+
+
+def tracks(row_json):
+    """Decode a track list column of a `media_info` row."""
+    try:
+        return json.loads(row_json) if row_json else []
+    except ValueError:
+        return []
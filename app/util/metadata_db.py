@@ -1,16 +1,34 @@
 import sqlite3
 import os
+import json
+import time
 from pathlib import Path
 import threading
 import logging
 
 logger = logging.getLogger("METADATA_DB")
 
+
+def same_file_key(path):
+    """Comparison key under which two stored paths name the same file (slashes and, on Windows, case)."""
+    return os.path.normcase(os.path.normpath(str(path)))
+
+
+def _distinct_paths(paths):
+    seen = {}
+    for p in sorted(paths):
+        seen.setdefault(same_file_key(p), p)
+    return sorted(seen.values())
+
+
 class MetadataDB:
-    def __init__(self, db_path='metadata.db'):
+    def __init__(self, db_path='metadata.db', migrate=True):
+        """`migrate=False` opens an already-initialised DB without running schema migrations
+        (thumbnail workers, so several processes never race on ALTER TABLE)."""
         self.db_path = db_path
         self._lock = threading.Lock()  # Thread lock for concurrent access
-        self.init_db()
+        if migrate:
+            self.init_db()
     
     def reset_database(self):
         """Reset the entire database - delete all data."""
@@ -75,6 +93,8 @@ class MetadataDB:
                         image_url TEXT,
                         cached_image_path TEXT,
                         episode_id INTEGER,
+                        file_size INTEGER,
+                        content_hash TEXT,
                         FOREIGN KEY(episode_id) REFERENCES episodes(id)
                     )
                 ''')
@@ -83,6 +103,17 @@ class MetadataDB:
                     conn.execute('SELECT episode_id FROM videos LIMIT 1')
                 except sqlite3.OperationalError:
                     conn.execute('ALTER TABLE videos ADD COLUMN episode_id INTEGER REFERENCES episodes(id)')
+                # Migration: add file identity columns (size + partial content hash)
+                try:
+                    conn.execute('SELECT content_hash FROM videos LIMIT 1')
+                except sqlite3.OperationalError:
+                    conn.execute('ALTER TABLE videos ADD COLUMN file_size INTEGER')
+                    conn.execute('ALTER TABLE videos ADD COLUMN content_hash TEXT')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_videos_identity ON videos (file_size, content_hash)')
+                # Migration (once): re-key rows stored with backslash paths before keys were posix
+                if conn.execute('PRAGMA user_version').fetchone()[0] < 1:
+                    self._normalise_video_paths(conn)
+                    conn.execute('PRAGMA user_version = 1')
                 conn.execute('''
                     CREATE TABLE IF NOT EXISTS shows (
                         id INTEGER PRIMARY KEY,
@@ -102,6 +133,29 @@ class MetadataDB:
                         FOREIGN KEY(show_id) REFERENCES shows(id)
                     )
                 ''')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS media_info (
+                        path TEXT PRIMARY KEY,
+                        file_size INTEGER,
+                        mtime INTEGER,
+                        duration_ms INTEGER,
+                        width INTEGER,
+                        height INTEGER,
+                        video_codec TEXT,
+                        audio_codec TEXT,
+                        audio_tracks TEXT,
+                        subtitle_tracks TEXT,
+                        probed_at REAL
+                    )
+                ''')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS image_cache (
+                        path TEXT PRIMARY KEY,
+                        kind TEXT,
+                        size_bytes INTEGER,
+                        last_access REAL
+                    )
+                ''')
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS episodes (
                     id INTEGER PRIMARY KEY,
@@ -116,12 +170,50 @@ class MetadataDB:
                 )
             ''')
 
+    def _normalise_video_paths(self, conn):
+        """Rename backslash `videos`/`media_info` paths to their posix form.
+
+        Where both spellings already have a row, the posix row is kept and
+        only its empty columns are filled from the old one.
+        """
+        rows = conn.execute("SELECT path FROM videos WHERE path LIKE '%\\%'").fetchall()
+        moved = 0
+        for (old,) in rows:
+            new = Path(old).as_posix()
+            if new == old:
+                continue
+            conn.execute('INSERT OR IGNORE INTO videos (path) VALUES (?)', (new,))
+            conn.execute('''
+                UPDATE videos SET
+                    title = COALESCE(title, (SELECT title FROM videos WHERE path = :old)),
+                    show_name = COALESCE(show_name, (SELECT show_name FROM videos WHERE path = :old)),
+                    season = COALESCE(season, (SELECT season FROM videos WHERE path = :old)),
+                    episode = COALESCE(episode, (SELECT episode FROM videos WHERE path = :old)),
+                    tvmaze_id = COALESCE(tvmaze_id, (SELECT tvmaze_id FROM videos WHERE path = :old)),
+                    image_url = COALESCE(image_url, (SELECT image_url FROM videos WHERE path = :old)),
+                    cached_image_path = COALESCE(cached_image_path, (SELECT cached_image_path FROM videos WHERE path = :old)),
+                    episode_id = COALESCE(episode_id, (SELECT episode_id FROM videos WHERE path = :old)),
+                    file_size = COALESCE(file_size, (SELECT file_size FROM videos WHERE path = :old)),
+                    content_hash = COALESCE(content_hash, (SELECT content_hash FROM videos WHERE path = :old))
+                WHERE path = :new
+            ''', {'old': old, 'new': new})
+            conn.execute('DELETE FROM videos WHERE path = ?', (old,))
+            conn.execute('UPDATE OR IGNORE media_info SET path = ? WHERE path = ?', (new, old))
+            conn.execute('DELETE FROM media_info WHERE path = ?', (old,))
+            moved += 1
+        if moved:
+            logger.info(f"Normalised {moved} video paths to posix form")
+
     def add_video(self, path, title=None, show_name=None, season=None, episode=None, tvmaze_id=None, image_url=None, episode_id=None):
         with self._lock:
             with sqlite3.connect(self.db_path, timeout=30) as conn:
+                # Upsert so a previously recorded file identity survives re-association
                 conn.execute('''
-                    INSERT OR REPLACE INTO videos (path, title, show_name, season, episode, tvmaze_id, image_url, episode_id)
+                    INSERT INTO videos (path, title, show_name, season, episode, tvmaze_id, image_url, episode_id)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(path) DO UPDATE SET title = excluded.title, show_name = excluded.show_name,
+                        season = excluded.season, episode = excluded.episode, tvmaze_id = excluded.tvmaze_id,
+                        image_url = excluded.image_url, episode_id = excluded.episode_id
                 ''', (str(path), title, show_name, season, episode, tvmaze_id, image_url, episode_id))
 
     def get_video(self, path):
@@ -201,7 +293,8 @@ class MetadataDB:
     def update_video_path(self, old_path, new_path):
         with self._lock:
             with sqlite3.connect(self.db_path, timeout=30) as conn:
-                conn.execute('UPDATE videos SET path = ? WHERE path = ?', (str(new_path), str(old_path)))
+                conn.execute('UPDATE OR REPLACE videos SET path = ? WHERE path = ?', (str(new_path), str(old_path)))
+                conn.execute('UPDATE OR REPLACE media_info SET path = ? WHERE path = ?', (str(new_path), str(old_path)))
 
     def update_show_cached_image(self, tvmaze_id, cached_image_path):
         with self._lock:
@@ -251,4 +344,138 @@ class MetadataDB:
                     return True
             except Exception as e:
                 logger.exception(f"Error associating video with episode: {e}")
-                return False
\ No newline at end of file
+                return False
+
+    def add_cached_image(self, path, kind, size_bytes, last_access):
+        with self._lock:
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO image_cache (path, kind, size_bytes, last_access)
+                    VALUES (?, ?, ?, ?)
+                ''', (str(path), kind, size_bytes, last_access))
+
+    def touch_cached_images(self, accesses):
+        """Record last-access times for cached images; `accesses` maps path -> timestamp."""
+        if not accesses:
+            return
+        with self._lock:
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                conn.executemany('UPDATE image_cache SET last_access = ? WHERE path = ?',
+                                 [(t, str(p)) for p, t in accesses.items()])
+
+    def get_image_cache_usage(self):
+        """Total bytes currently tracked in the image cache."""
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            return conn.execute('SELECT COALESCE(SUM(size_bytes), 0) FROM image_cache').fetchone()[0]
+
+    def get_lru_cached_images(self, limit=100):
+        """Least recently used cache entries first: (path, size_bytes)."""
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            return conn.execute('SELECT path, size_bytes FROM image_cache ORDER BY last_access ASC LIMIT ?', (limit,)).fetchall()
+
+    def remove_cached_image(self, path):
+        with self._lock:
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                conn.execute('DELETE FROM image_cache WHERE path = ?', (str(path),))
+
+    def set_media_info(self, path, info):
+        """Store probe results (see app.util.media_probe.probe) for a video."""
+        with self._lock:
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO media_info (path, file_size, mtime, duration_ms, width, height,
+                        video_codec, audio_codec, audio_tracks, subtitle_tracks, probed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (str(path), info.get('file_size'), info.get('mtime'), info.get('duration_ms'),
+                      info.get('width'), info.get('height'), info.get('video_codec'), info.get('audio_codec'),
+                      json.dumps(info.get('audio_tracks') or []), json.dumps(info.get('subtitle_tracks') or []),
+                      time.time()))
+
+    def get_media_info(self, path):
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            return conn.execute('SELECT * FROM media_info WHERE path = ?', (str(path),)).fetchone()
+
+    def get_all_video_paths(self):
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            return [r[0] for r in conn.execute('SELECT path FROM videos')]
+
+    def get_media_info_many(self, paths):
+        """Batch lookup of media_info rows; returns {path: row} for the paths that have one."""
+        paths = [str(p) for p in paths]
+        result = {}
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for row in conn.execute(f'SELECT * FROM media_info WHERE path IN ({marks})', chunk):
+                    result[row[0]] = row
+        return result
+
+    def set_video_identity(self, path, file_size, content_hash):
+        """Record the size + partial content hash of a video, creating its row if needed."""
+        path = Path(path).as_posix()
+        with self._lock:
+            with sqlite3.connect(self.db_path, timeout=30) as conn:
+                conn.execute('INSERT OR IGNORE INTO videos (path) VALUES (?)', (path,))
+                conn.execute('UPDATE videos SET file_size = ?, content_hash = ? WHERE path = ?',
+                             (file_size, content_hash, path))
+
+    def get_video_identity(self, path):
+        """(file_size, content_hash) recorded for `path` (either may be None), or None if the video is unknown."""
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            return conn.execute('SELECT file_size, content_hash FROM videos WHERE path = ?', (str(path),)).fetchone()
+
+    def find_videos_by_identity(self, file_size, content_hash):
+        """Paths of the known videos with this size + partial content hash."""
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            return [r[0] for r in conn.execute('SELECT path FROM videos WHERE file_size = ? AND content_hash = ?',
+                                               (file_size, content_hash))]
+
+    def find_identical_videos(self, path):
+        """Other known paths whose size + partial content hash match `path`; aliases of `path` itself are skipped."""
+        me = same_file_key(path)
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            rows = conn.execute('''
+                SELECT v.path FROM videos v
+                JOIN videos me ON me.path = ? AND v.file_size = me.file_size AND v.content_hash = me.content_hash
+                WHERE v.path != me.path AND me.content_hash IS NOT NULL
+            ''', (str(path),)).fetchall()
+        return [p for p in _distinct_paths(r[0] for r in rows) if same_file_key(p) != me]
+
+    def get_duplicate_groups(self):
+        """Duplicate videos across library roots.
+
+        Returns a list of dicts {'reason', 'label', 'paths'} where reason is
+        'identical' (same size + partial content hash) or 'episode' (several
+        files associated with the same show/season/episode).
+        """
+        groups = []
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            rows = conn.execute('''
+                SELECT file_size, content_hash, GROUP_CONCAT(path, char(31)) FROM videos
+                WHERE content_hash IS NOT NULL
+                GROUP BY file_size, content_hash HAVING COUNT(*) > 1
+            ''').fetchall()
+            for size, digest, paths in rows:
+                paths = _distinct_paths(paths.split(chr(31)))
+                if len(paths) > 1:
+                    groups.append({'reason': 'identical', 'label': f"{size / 1024 ** 2:.0f} MB · {digest[:8]}",
+                                   'paths': paths})
+            rows = conn.execute('''
+                SELECT sh.name, s.season_number, e.episode_number, e.name, GROUP_CONCAT(v.path, char(31))
+                FROM videos v
+                JOIN episodes e ON v.episode_id = e.id
+                JOIN seasons s ON e.season_id = s.id
+                JOIN shows sh ON s.show_id = sh.id
+                GROUP BY v.episode_id HAVING COUNT(*) > 1
+                ORDER BY sh.name, s.season_number, e.episode_number
+            ''').fetchall()
+            for show, season, episode, name, paths in rows:
+                paths = _distinct_paths(paths.split(chr(31)))
+                if len(paths) > 1:
+                    # TVMaze specials may have no season or episode number
+                    s = f"S{season:02d}" if season is not None else "S??"
+                    e = f"E{episode:02d}" if episode is not None else "E??"
+                    groups.append({'reason': 'episode', 'label': f"{show} - {s}{e} {name or ''}".strip(),
+                                   'paths': paths})
+        return groups
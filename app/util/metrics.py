@@ -0,0 +1,177 @@
+"""
+Metrics Registry
+Thread-safe counters, gauges, sampled time series and latency histograms for
+the thumbnail pipeline (pool threads, worker results and the GUI all write
+here). Everything is queryable in-process via snapshot() and can be dumped as
+JSON or as a Prometheus text file (e.g. for node_exporter's textfile
+collector) to tune pool size against real traffic.
+
+Metric names are plain strings; labels are keyword arguments:
+
+    REGISTRY.inc("thumb_tasks_total", mode="thumb", status="done")
+    REGISTRY.observe("thumb_latency_ms", 42.0, stage="rtt")
+    REGISTRY.sample("thumb_queue_depth", 17)
+"""
+
+import json
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from pathlib import Path
+
+# Upper bounds in ms; the last bucket is +Inf
+LATENCY_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+SERIES_LEN = 720  # samples kept per series (an hour at one sample per 5 s)
+PREFIX = "vibe_"
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Histogram:
+    """Bucketed distribution; quantiles are interpolated within buckets."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lo = self.buckets[i - 1] if i > 0 else 0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def summary(self):
+        return {'count': self.count, 'sum': round(self.sum, 1),
+                'mean': round(self.sum / self.count, 2) if self.count else None,
+                'p50': self._q(0.5), 'p90': self._q(0.9), 'p99': self._q(0.99)}
+
+    def _q(self, q):
+        v = self.quantile(q)
+        return None if v is None else round(v, 1)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._hists = {}
+        self._series = {}
+
+    def inc(self, name, n=1, **labels):
+        k = _key(name, labels)
+        with self._lock:
+            self._counters[k] = self._counters.get(k, 0) + n
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        k = _key(name, labels)
+        with self._lock:
+            h = self._hists.get(k)
+            if h is None:
+                h = self._hists[k] = Histogram()
+            h.observe(value)
+
+    def sample(self, name, value, **labels):
+        """Set a gauge and append (timestamp, value) to its time series."""
+        k = _key(name, labels)
+        with self._lock:
+            self._gauges[k] = value
+            s = self._series.get(k)
+            if s is None:
+                s = self._series[k] = deque(maxlen=SERIES_LEN)
+            s.append((round(time.time(), 1), value))
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def histogram(self, name, **labels):
+        """Summary dict of one histogram, or None if nothing was observed."""
+        with self._lock:
+            h = self._hists.get(_key(name, labels))
+            return h.summary() if h else None
+
+    def snapshot(self):
+        """JSON-serialisable view of every metric."""
+        def fmt(k):
+            name, labels = k
+            return name + ("{" + ",".join(f"{a}={b}" for a, b in labels) + "}" if labels else "")
+        with self._lock:
+            return {
+                'time': time.time(),
+                'counters': {fmt(k): v for k, v in sorted(self._counters.items())},
+                'gauges': {fmt(k): v for k, v in sorted(self._gauges.items())},
+                'histograms': {fmt(k): h.summary() for k, h in sorted(self._hists.items())},
+                'series': {fmt(k): list(s) for k, s in sorted(self._series.items())},
+            }
+
+    def to_json(self, indent=None):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (0.0.4)."""
+        def labels(pairs, extra=()):
+            pairs = list(pairs) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{a}="{str(b).replace(chr(34), chr(39))}"' for a, b in pairs) + "}"
+        lines = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                typed = set()
+                for (name, lab), v in sorted(store.items()):
+                    if name not in typed:
+                        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                        typed.add(name)
+                    lines.append(f"{PREFIX}{name}{labels(lab)} {v}")
+            typed = set()
+            for (name, lab), h in sorted(self._hists.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {PREFIX}{name} histogram")
+                    typed.add(name)
+                cum = 0
+                for bound, n in zip(list(h.buckets) + ["+Inf"], h.counts):
+                    cum += n
+                    lines.append(f"{PREFIX}{name}_bucket{labels(lab, [('le', bound)])} {cum}")
+                lines.append(f"{PREFIX}{name}_sum{labels(lab)} {round(h.sum, 3)}")
+                lines.append(f"{PREFIX}{name}_count{labels(lab)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Write the registry to `path`: Prometheus text for *.prom, JSON otherwise. Atomic replace."""
+        path = Path(path)
+        text = self.to_prometheus() if path.suffix == ".prom" else self.to_json(indent=1)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(path)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._hists.clear()
+            self._series.clear()
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,132 @@
+"""
+Headless Thumbnail Prebuild
+Walks library folders and generates thumbnails (and optionally storyboards)
+for every video through the regular ThumbWorkerPool, so it uses all cores,
+the worker watchdog and crash isolation without a GUI or Qt event loop.
+Results are written per file as they finish, so an interrupted run resumes
+where it stopped: up-to-date thumbnails/storyboards and files still backing
+off after a failure are skipped.
+
+    python -m app.util.worker --prebuild [ROOT ...] [--storyboards] [--jobs N] [--width W]
+
+Without ROOT the folders configured in config.json are used.
+"""
+
+import os
+import time
+import threading
+import importlib.util
+from pathlib import Path
+from app.util.logger import setup_app_logger
+from app.util import config
+from app.util.worker_pool import ThumbWorkerPool
+from app.util.thumb_store import get_store, DEFAULT_WIDTH
+from app.util.storyboard import load_index
+
+logger = setup_app_logger("PREBUILD")
+
+VIDEO_EXTS = ('.mp4', '.mkv', '.avi')
+PROGRESS_INTERVAL = 10  # seconds between progress lines
+
+
+def walk_videos(roots):
+    """Yield video paths (posix) below `roots`, in a stable order."""
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.lower().endswith(VIDEO_EXTS):
+                    yield Path(dirpath, name).as_posix()
+
+
+def plan(paths, width=DEFAULT_WIDTH, storyboards=False, retry_failed=False):
+    """(path, mode) tasks still to do; everything already built or backing off is skipped."""
+    store = get_store()
+    paths = list(paths)
+    failures = {} if retry_failed else store.failures_many(paths)
+    now = time.time()
+    tasks, skipped = [], 0
+    for p in paths:
+        failed = failures.get(p)
+        if store.has(p, width):
+            skipped += 1
+        elif failed and (failed[2] is None or failed[2] > now):
+            skipped += 1
+        else:
+            tasks.append((p, "thumb"))
+        if storyboards:
+            if load_index(p) is None:
+                tasks.append((p, "storyboard"))
+            else:
+                skipped += 1
+    return tasks, skipped
+
+
+def _fmt_eta(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def prebuild(roots=None, storyboards=False, jobs=0, width=DEFAULT_WIDTH, retry_failed=False):
+    """Generate missing thumbnails below `roots`. Returns {'done', 'failed', 'skipped'}."""
+    cfg = config.load()
+    roots = [r for r in (roots or cfg["folders"]) if os.path.isdir(r)]
+    if not roots:
+        logger.error("No library folders to prebuild (pass ROOT or configure folders)")
+        return {'done': 0, 'failed': 0, 'skipped': 0}
+    # Sprite sheets are encoded with QImage in the workers; only check Qt is installed, don't load it here
+    if storyboards and not (importlib.util.find_spec("qtpy") and importlib.util.find_spec("PySide6")):
+        logger.error("Storyboards need Qt (qtpy + PySide6); building thumbnails only")
+        storyboards = False
+    logger.info("Scanning %s", ", ".join(roots))
+    tasks, skipped = plan(walk_videos(roots), width, storyboards, retry_failed)
+    total = len(tasks)
+    logger.info("%s tasks to run, %s up to date or backing off", total, skipped)
+    counts = {'done': 0, 'failed': 0, 'skipped': skipped}
+    if not total:
+        return counts
+    store = get_store()
+    lock = threading.Condition()
+
+    def on_done(res):
+        if res['mode'] == "thumb" and res['status'] == "failed":
+            try:
+                store.record_failure(res['path'], res.get('error') or "unknown")
+            except Exception:
+                logger.exception("Failed to record thumbnail failure for %s", res['path'])
+        with lock:
+            counts['done' if res['ok'] else 'failed'] += 1
+            lock.notify_all()
+
+    pool = ThumbWorkerPool(size=jobs or cfg.get("thumb_workers", 0), on_done=on_done, maxsize=0)
+    window = pool.size * 4  # tasks queued at once; keeps the pool busy without a huge backlog
+    pool.start()
+    started = last_report = time.time()
+    submitted = 0
+    try:
+        while True:
+            with lock:
+                finished = counts['done'] + counts['failed']
+                while submitted < total and submitted - finished < window:
+                    path, mode = tasks[submitted]
+                    submitted += 1
+                    if pool.submit(path, cfg["preview_start"], mode, width=width if mode == "thumb" else None) is None:
+                        counts['failed'] += 1
+                        finished += 1
+                if finished >= total:
+                    break
+                lock.wait(1.0)
+            now = time.time()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                rate = finished / max(1e-6, now - started)
+                eta = _fmt_eta((total - finished) / rate) if rate else "?"
+                logger.info("Prebuild %s/%s (%.0f%%), %s failed, %.2f tasks/s, ETA %s",
+                            finished, total, 100 * finished / total, counts['failed'], rate, eta)
+    except KeyboardInterrupt:
+        logger.info("Interrupted; rerun to resume")
+    finally:
+        pool.shutdown()
+    logger.info("Prebuild finished in %s: %s done, %s failed, %s skipped", _fmt_eta(time.time() - started),
+                counts['done'], counts['failed'], counts['skipped'])
+    return counts
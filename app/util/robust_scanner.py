@@ -9,6 +9,7 @@ import queue
 from pathlib import Path
 from qtpy.QtCore import QObject, Signal, QThread
 from app.util.tvmaze_api import TVMazeAPI
+from app.util.file_identity import relink_moved
 import logging
 
 logger = logging.getLogger("ROBUST_SCANNER")
@@ -47,9 +48,10 @@ class RobustMetadataScanner(QObject):
     all_jobs_complete = Signal()
     scan_stats = Signal(int, int, int)  # total, completed, errors
     
-    def __init__(self, db):
+    def __init__(self, db, poster_cache=None):
         super().__init__()
         self.db = db
+        self.poster_cache = poster_cache  # builds card-sized artwork as soon as its URL is stored
         self.jobs = []  # List of ScanJob objects
         self.current_job_index = -1
         self.is_scanning = False
@@ -414,6 +416,7 @@ class RobustMetadataScanner(QObject):
             if not show_record:
                 return
             show_id = show_record[0]
+            artwork = [('show', show_data.get('image_url'))]
             
             # Fetch seasons
             seasons = self._rate_limited_api_call(TVMazeAPI.get_show_seasons, show_data['tvmaze_id'])
@@ -422,6 +425,7 @@ class RobustMetadataScanner(QObject):
                 if season and isinstance(season, dict) and 'number' in season:
                     season_image = (season.get('image') or {}).get('medium')
                     self.db.add_season(show_id, season['number'], season_image)
+                    artwork.append(('season', season_image))
                     
                     season_record = self.db.get_season(show_id, season['number'])
                     if season_record:
@@ -439,6 +443,11 @@ class RobustMetadataScanner(QObject):
                                     ep.get('summary'),
                                     ep_image
                                 )
+                                artwork.append(('episode', ep_image))
+            
+            # Build the Watch tab card variants now rather than when each card is first shown
+            if self.poster_cache is not None:
+                self.poster_cache.prefetch(artwork)
             
         except Exception as e:
             logger.exception(f"Error storing metadata: {e}")
@@ -453,7 +462,10 @@ class RobustMetadataScanner(QObject):
             show_id = show_record[0]
             
             for video_path in video_files:
+                video_path = Path(video_path).as_posix()  # videos rows are keyed by posix paths
                 try:
+                    # Follow files moved/renamed outside the app instead of treating them as new
+                    relink_moved(self.db, video_path)
                     parsed = TVMazeAPI.parse_filename(Path(video_path).stem, video_path)
                     if parsed['type'] == 'episode':
                         episode = self.db.get_episode_by_season_and_number(
@@ -0,0 +1,78 @@
+"""
+Shared-memory Frame Ring
+Fixed-size RV32 frame slots in one `multiprocessing.shared_memory` block.
+The UI process owns the block and hands out free slots; thumbnail workers
+attach by name and let libvlc decode straight into a slot, so a frame reaches
+the UI without a JPEG encode/decode round trip.
+"""
+
+import ctypes
+import threading
+import logging
+from multiprocessing import shared_memory
+
+logger = logging.getLogger("SHM_RING")
+
+FRAME_W, FRAME_H = 320, 180
+
+
+class ShmRing:
+    """`slots` frames of width x height x 4 bytes; create when `name` is None, attach otherwise."""
+
+    def __init__(self, slots=8, name=None, width=FRAME_W, height=FRAME_H):
+        self.width, self.height = width, height
+        self.frame_bytes = width * height * 4  # a multiple of 32, so every slot stays 32-byte aligned
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * self.frame_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            try:
+                # Attaching registers the block with this process's resource tracker, which would
+                # unlink it when the worker exits; only the owning UI process should do that.
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            except Exception:
+                logger.debug("Could not unregister %s from resource tracker", name, exc_info=True)
+        self.slots = self.shm.size // self.frame_bytes
+        self._free = list(range(self.slots))
+        self._lock = threading.Lock()
+        self._anchors = {}  # slot -> ctypes object pinning its address
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def acquire(self):
+        """Reserve a free slot (owner side). Returns None when all slots are in use."""
+        with self._lock:
+            return self._free.pop() if self._free else None
+
+    def release(self, slot):
+        with self._lock:
+            if slot not in self._free:
+                self._free.append(slot)
+
+    def view(self, slot):
+        """Writable memoryview of one slot."""
+        off = slot * self.frame_bytes
+        return self.shm.buf[off:off + self.frame_bytes]
+
+    def address(self, slot):
+        """Raw address of a slot for libvlc's lock callback."""
+        if slot not in self._anchors:
+            self._anchors[slot] = (ctypes.c_char * self.frame_bytes).from_buffer(self.shm.buf, slot * self.frame_bytes)
+        return ctypes.addressof(self._anchors[slot])
+
+    def close(self):
+        self._anchors.clear()
+        try:
+            self.shm.close()
+        except BufferError:
+            # A QImage/memoryview still references the block; the OS reclaims it at exit
+            logger.debug("Shared memory %s still referenced at close", self.name)
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -1,18 +1,23 @@
-import os, time, vlc, sys, hashlib
-def get_h(p): return hashlib.md5(p.lower().replace("\\","/").encode()).hexdigest()
+import os, vlc, sys, tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from app.util.snapshot import EventSnapshotter, SnapshotError
+from app.util.thumb_store import get_store
 def snap():
     if len(sys.argv) < 3: return
     vpath, seek = sys.argv[1], int(sys.argv[2])
-    tp = os.path.join("resources","thumbs",f"{get_h(vpath)}.jpg")
-    if os.path.exists(tp): return
-    os.makedirs(os.path.dirname(tp), exist_ok=True)
+    store = get_store()
+    if store.has(vpath): return
+    tp = os.path.join(tempfile.gettempdir(), f"vibe_snap_{os.getpid()}.jpg")
     i = vlc.Instance("--intf=dummy","--vout=dummy","--no-audio","--avcodec-hw=none","--quiet")
-    p = i.media_player_new(); p.set_media(i.media_new(vpath)); p.play()
-    for _ in range(30):
-        if p.get_length() > 0: break
-        time.sleep(0.1)
-    t = seek*1000 if p.get_length() > seek*1000 else p.get_length()//2
-    p.set_time(t); time.sleep(1.2); p.video_take_snapshot(0, tp, 320, 180)
-    p.stop(); p.release(); i.release()
+    p = i.media_player_new()
+    try:
+        # Seek to `seek` seconds, or the middle of shorter files, once the length is known
+        steps = EventSnapshotter(p).take(i, vpath, tp, pick=lambda length: seek*1000 if length > seek*1000 else length//2)
+        store.put_file(vpath, tp)
+        print(f"{vpath} {steps}")
+    except SnapshotError as e:
+        print(f"snapshot failed at {e}", file=sys.stderr)
+    p.release(); i.release()
 if __name__ == "__main__":
-    snap()
\ No newline at end of file
+    snap()
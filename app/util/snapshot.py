@@ -0,0 +1,110 @@
+"""
+Event-driven Snapshots
+Takes a single-frame snapshot by waiting on libvlc events instead of fixed
+sleeps: LengthChanged (duration known), Vout (video output up),
+PositionChanged (decoding reached the seek point) and SnapshotTaken (file
+written). Every step has its own timeout, so fast files finish in tens of
+milliseconds and broken ones fail at a known step.
+"""
+
+import time
+import threading
+import vlc
+import logging
+
+logger = logging.getLogger("SNAPSHOT")
+
+STEP_TIMEOUTS = {'length': 3.0, 'vout': 3.0, 'seek': 3.0, 'snapshot': 3.0}
+SEEK_TOLERANCE_MS = 2000  # a position within this distance of the target counts as "arrived"
+
+
+class SnapshotError(Exception):
+    """A snapshot step timed out, was cancelled or hit a playback error."""
+
+    def __init__(self, step, reason):
+        super().__init__(f"{step}: {reason}")
+        self.step = step
+
+
+class EventSnapshotter:
+    """Wraps one media player; attach once, then call take() for each file."""
+
+    def __init__(self, player):
+        self.player = player
+        self._events = {k: threading.Event() for k in ('length', 'vout', 'position', 'snapshot', 'error')}
+        em = player.event_manager()
+        for etype, key in ((vlc.EventType.MediaPlayerLengthChanged, 'length'),
+                           (vlc.EventType.MediaPlayerVout, 'vout'),
+                           (vlc.EventType.MediaPlayerPositionChanged, 'position'),
+                           (vlc.EventType.MediaPlayerSnapshotTaken, 'snapshot'),
+                           (vlc.EventType.MediaPlayerEncounteredError, 'error')):
+            em.event_attach(etype, lambda e, k=key: self._events[k].set())
+
+    def _wait(self, step, cancelled, event=None):
+        """Wait for the event of `step` (or `event`, if the step waits on another one)."""
+        ev, deadline = self._events[event or step], time.perf_counter() + STEP_TIMEOUTS[step]
+        while not ev.wait(0.02):
+            if self._events['error'].is_set():
+                raise SnapshotError(step, "playback error")
+            if cancelled():
+                raise SnapshotError(step, "cancelled")
+            if time.perf_counter() > deadline:
+                raise SnapshotError(step, f"no event within {STEP_TIMEOUTS[step]:.1f} s")
+
+    def _wait_position(self, t_ms, cancelled):
+        # Position events from before the seek may still arrive; wait for one near the target
+        deadline = time.perf_counter() + STEP_TIMEOUTS['seek']
+        while True:
+            self._wait('seek', cancelled, event='position')
+            if abs(self.player.get_time() - t_ms) <= SEEK_TOLERANCE_MS:
+                return
+            self._events['position'].clear()
+            if time.perf_counter() > deadline:
+                raise SnapshotError('seek', f"position stuck at {self.player.get_time()} ms")
+
+    def take(self, inst, vpath, out_path, t_ms=None, pick=None, width=320, height=180, cancelled=None):
+        """Snapshot `vpath` at `t_ms` (or at pick(length) once the length is known) into `out_path`.
+
+        Returns a dict of per-step timings in ms; raises SnapshotError on failure.
+        """
+        cancelled = cancelled or (lambda: False)
+        for ev in self._events.values():
+            ev.clear()
+        timings = {}
+        mark = started = time.perf_counter()
+
+        def step_done(name):
+            nonlocal mark
+            now = time.perf_counter()
+            timings[f"{name}_ms"] = round((now - mark) * 1000, 1)
+            mark = now
+
+        p = self.player
+        try:
+            if t_ms is not None:
+                # Duration known in advance: open directly at the seek point
+                p.set_media(inst.media_new(vpath, f"start-time={t_ms / 1000:.3f}"))
+                p.play()
+                self._wait('vout', cancelled)
+                step_done('vout')
+            else:
+                p.set_media(inst.media_new(vpath))
+                p.play()
+                self._wait('length', cancelled)
+                step_done('length')
+                t_ms = pick(p.get_length())
+                self._wait('vout', cancelled)
+                step_done('vout')
+                self._events['position'].clear()
+                p.set_time(t_ms)
+            self._wait_position(t_ms, cancelled)
+            step_done('seek')
+            if p.video_take_snapshot(0, out_path, width, height) != 0:
+                raise SnapshotError('snapshot', "no video output")
+            self._wait('snapshot', cancelled)
+            step_done('snapshot')
+        finally:
+            p.stop()
+            p.set_media(None)
+        timings['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return timings
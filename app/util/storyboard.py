@@ -0,0 +1,76 @@
+"""
+Storyboards
+A storyboard is a sprite sheet of evenly spaced frames of one video plus a
+JSON index, stored as resources/storyboards/<md5>.jpg and <md5>.json:
+
+  {"tile_w": 160, "tile_h": 90, "cols": 10, "duration_ms": ..., "times_ms": [...],
+   "size": ..., "mtime": ...}
+
+Tile i sits at column i % cols, row i // cols. The worker writes them
+(mode "storyboard"); the UI only reads them. size/mtime record the video the
+storyboard was built from; a replaced or re-encoded file invalidates it.
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+import logging
+
+logger = logging.getLogger("STORYBOARD")
+
+ROOT = Path(__file__).parent.parent.parent.absolute()
+STORYBOARD_DIR = ROOT / "resources" / "storyboards"
+TILE_W, TILE_H = 160, 90
+COLS = 10
+MAX_FRAMES = 100
+MIN_STEP_MS = 10000
+
+
+def frame_times(duration_ms):
+    """Timestamps (ms) to capture: every 10 s, or spread over MAX_FRAMES for long videos."""
+    if not duration_ms or duration_ms <= 0:
+        return []
+    step = max(MIN_STEP_MS, duration_ms // MAX_FRAMES)
+    return list(range(step // 2, duration_ms, step))[:MAX_FRAMES]
+
+
+def storyboard_paths(vpath):
+    """(sprite sheet path, index path) for a video."""
+    digest = hashlib.md5(str(vpath).lower().replace("\\", "/").encode()).hexdigest()
+    return STORYBOARD_DIR / f"{digest}.jpg", STORYBOARD_DIR / f"{digest}.json"
+
+
+def _signature(vpath):
+    st = os.stat(vpath)
+    return st.st_size, int(st.st_mtime)  # same as media_probe.file_signature
+
+
+def load_index(vpath):
+    """The JSON index for `vpath`, or None if no complete, up-to-date storyboard exists."""
+    sheet, index = storyboard_paths(vpath)
+    if not (sheet.exists() and index.exists()):
+        return None
+    try:
+        with open(index, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        logger.exception(f"Unreadable storyboard index {index}")
+        return None
+    try:
+        if (data.get("size"), data.get("mtime")) != _signature(vpath):
+            return None  # built from an older version of the file
+    except OSError:
+        return None
+    return data
+
+
+def write_index(vpath, data):
+    """Write the index, stamped with the video's current size/mtime."""
+    _, index = storyboard_paths(vpath)
+    data = dict(data)
+    data["size"], data["mtime"] = _signature(vpath)
+    tmp = str(index) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, index)
@@ -0,0 +1,369 @@
+"""
+Thumbnail Store
+Video thumbnails packed into one SQLite file (resources/thumbs.db) instead
+of one JPEG per video in resources/thumbs. Rows are keyed by the md5 of the
+video path (same hash as get_h) and image width, and remember the video's
+size/mtime so a replaced file is detected as stale. Each write is a single
+transaction, so readers never see half a thumbnail. Used by the workers and
+the UI alike.
+
+Files that cannot be snapshotted (audio-only, corrupt, unsupported codec) are
+remembered in thumb_failures with an exponential retry backoff; after
+GIVE_UP_ATTEMPTS failures they are only retried once the file changes.
+
+Compaction never drops the thumbnail of a file just because it is missing:
+rows under an unreachable library root (unplugged USB disk, offline share)
+are left alone, and a file missing from a mounted root is only marked. Its
+rows are deleted once it has stayed missing for MISSING_GRACE, which leaves
+time for a moved file to be re-linked (see file_identity.relink_moved).
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+import logging
+
+logger = logging.getLogger("THUMB_STORE")
+
+ROOT = Path(__file__).parent.parent.parent.absolute()
+STORE_PATH = ROOT / "resources" / "thumbs.db"
+LEGACY_DIR = ROOT / "resources" / "thumbs"
+DEFAULT_WIDTH = 320
+LEVELS = (160, 320, 480)  # stored thumbnail widths (16:9)
+COMPACT_INTERVAL = 7 * 24 * 3600  # seconds between automatic compactions
+RETRY_BASE = 60  # seconds before the first retry of a failed thumbnail; doubles per attempt
+GIVE_UP_ATTEMPTS = 4  # failures after which a file is not retried until it changes
+MISSING_GRACE = 30 * 24 * 3600  # seconds a file must stay missing from a mounted root before compaction drops it
+
+
+def thumb_key(path):
+    return hashlib.md5(str(path).lower().replace("\\", "/").encode()).hexdigest()
+
+
+def level_for(card_width, dpr=1.0):
+    """Smallest stored level at least as wide as a card of `card_width` logical pixels."""
+    need = card_width * dpr
+    for w in LEVELS:
+        if w >= need:
+            return w
+    return LEVELS[-1]
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+        return st.st_size, int(st.st_mtime)
+    except OSError:
+        return None, None
+
+
+def _library_root(path, roots):
+    """The innermost of `roots` containing `path`, or None."""
+    p = os.path.normcase(os.path.normpath(path))
+    best = None
+    for root in roots:
+        r = os.path.normcase(os.path.normpath(root))
+        if (p == r or p.startswith(r.rstrip(os.sep) + os.sep)) and (best is None or len(r) > len(best[1])):
+            best = (root, r)
+    return best[0] if best else None
+
+
+class ThumbStore:
+    def __init__(self, db_path=STORE_PATH):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def init_db(self):
+        with self._lock:
+            with self._connect() as conn:
+                # WAL lets the UI read while worker processes write
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('''CREATE TABLE IF NOT EXISTS thumbs (
+                    key TEXT NOT NULL,
+                    width INTEGER NOT NULL,
+                    path TEXT,
+                    file_size INTEGER,
+                    mtime INTEGER,
+                    data BLOB NOT NULL,
+                    created_at REAL,
+                    missing_since REAL,
+                    PRIMARY KEY (key, width)
+                )''')
+                # Migration: stores created before compaction learned to wait for missing files
+                try:
+                    conn.execute('SELECT missing_since FROM thumbs LIMIT 1')
+                except sqlite3.OperationalError:
+                    conn.execute('ALTER TABLE thumbs ADD COLUMN missing_since REAL')
+                conn.execute('CREATE TABLE IF NOT EXISTS store_meta (name TEXT PRIMARY KEY, value TEXT)')
+                conn.execute('''CREATE TABLE IF NOT EXISTS thumb_failures (
+                    key TEXT PRIMARY KEY,
+                    path TEXT,
+                    file_size INTEGER,
+                    mtime INTEGER,
+                    attempts INTEGER,
+                    reason TEXT,
+                    last_attempt REAL,
+                    next_retry REAL
+                )''')
+
+    def _fresh(self, path, file_size, mtime):
+        # Rows imported from legacy JPEGs have no signature and are trusted
+        return file_size is None or (file_size, mtime) == _signature(path)
+
+    def put(self, path, data, width=DEFAULT_WIDTH):
+        """Store (or replace) the thumbnail bytes of `path` at `width`."""
+        size, mtime = _signature(path)
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute('INSERT OR REPLACE INTO thumbs (key, width, path, file_size, mtime, data, created_at) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             (thumb_key(path), width, str(path), size, mtime, sqlite3.Binary(data), time.time()))
+                conn.execute('DELETE FROM thumb_failures WHERE key = ?', (thumb_key(path),))
+
+    def put_file(self, path, image_file, width=DEFAULT_WIDTH, remove=True):
+        """Store an image file (e.g. a libvlc snapshot) and delete it afterwards."""
+        with open(image_file, 'rb') as f:
+            self.put(path, f.read(), width)
+        if remove:
+            try:
+                os.remove(image_file)
+            except OSError:
+                logger.debug(f"Could not remove {image_file}")
+
+    def get(self, path, width=DEFAULT_WIDTH):
+        """Thumbnail bytes for `path`, or None if missing or stale."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT file_size, mtime, data FROM thumbs WHERE key = ? AND width = ?',
+                               (thumb_key(path), width)).fetchone()
+        if row and self._fresh(path, row[0], row[1]):
+            return bytes(row[2])
+        return None
+
+    def has(self, path, width=DEFAULT_WIDTH):
+        with self._connect() as conn:
+            row = conn.execute('SELECT file_size, mtime FROM thumbs WHERE key = ? AND width = ?',
+                               (thumb_key(path), width)).fetchone()
+        return bool(row) and self._fresh(path, row[0], row[1])
+
+    def get_many(self, paths, width=DEFAULT_WIDTH):
+        """Batch lookup; returns {path: bytes} for the paths with a fresh thumbnail."""
+        by_key = {thumb_key(p): p for p in paths}
+        keys = list(by_key)
+        result = {}
+        with self._connect() as conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for key, size, mtime, data in conn.execute(
+                        f'SELECT key, file_size, mtime, data FROM thumbs WHERE width = ? AND key IN ({marks})',
+                        [width] + chunk):
+                    p = by_key[key]
+                    if self._fresh(p, size, mtime):
+                        result[p] = bytes(data)
+        return result
+
+    def get_best_many(self, paths, width):
+        """Batch lookup across levels; returns {path: (level, bytes)} using the smallest level
+        at or above `width`, or the largest smaller one if nothing bigger exists."""
+        by_key = {thumb_key(p): p for p in paths}
+        keys = list(by_key)
+        best = {}
+        with self._connect() as conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for key, w, size, mtime, data in conn.execute(
+                        f'SELECT key, width, file_size, mtime, data FROM thumbs WHERE key IN ({marks})', chunk):
+                    p = by_key[key]
+                    cur = best.get(p)
+                    # Prefer levels >= width (smallest first), then the largest below
+                    rank = (0, w) if w >= width else (1, -w)
+                    if (cur is None or rank < cur[0]) and self._fresh(p, size, mtime):
+                        best[p] = (rank, w, bytes(data))
+        return {p: (w, data) for p, (_, w, data) in best.items()}
+
+    def record_failure(self, path, reason):
+        """Remember a failed snapshot of `path`. Returns (attempts, permanent).
+
+        Attempts only accumulate while the file is unchanged; a new size/mtime starts over.
+        """
+        size, mtime = _signature(path)
+        key = thumb_key(path)
+        now = time.time()
+        with self._lock:
+            with self._connect() as conn:
+                row = conn.execute('SELECT file_size, mtime, attempts FROM thumb_failures WHERE key = ?', (key,)).fetchone()
+                attempts = row[2] + 1 if row and (row[0], row[1]) == (size, mtime) else 1
+                permanent = attempts >= GIVE_UP_ATTEMPTS
+                next_retry = None if permanent else now + RETRY_BASE * 2 ** (attempts - 1)
+                conn.execute('INSERT OR REPLACE INTO thumb_failures (key, path, file_size, mtime, attempts, reason, '
+                             'last_attempt, next_retry) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                             (key, str(path), size, mtime, attempts, reason, now, next_retry))
+        return attempts, permanent
+
+    def failures_many(self, paths):
+        """Batch lookup; returns {path: (attempts, reason, next_retry)} for unchanged files that failed.
+
+        `next_retry` is None once the file is given up on.
+        """
+        by_key = {thumb_key(p): p for p in paths}
+        keys = list(by_key)
+        result = {}
+        with self._connect() as conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for key, size, mtime, attempts, reason, next_retry in conn.execute(
+                        f'SELECT key, file_size, mtime, attempts, reason, next_retry FROM thumb_failures '
+                        f'WHERE key IN ({marks})', chunk):
+                    p = by_key[key]
+                    # A changed file gets a fresh chance
+                    if (size, mtime) == _signature(p):
+                        result[p] = (attempts, reason, next_retry)
+        return result
+
+    def failure_counts(self):
+        """{'failed': files with a recorded failure, 'given_up': those no longer retried}."""
+        with self._connect() as conn:
+            failed, given_up = conn.execute('SELECT COUNT(*), COUNT(*) - COUNT(next_retry) FROM thumb_failures').fetchone()
+        return {'failed': failed, 'given_up': given_up}
+
+    def copy(self, src_path, dst_path):
+        """Reuse the thumbnails of an identical file for `dst_path`. Returns True if any were copied."""
+        with self._lock:
+            with self._connect() as conn:
+                size, mtime = _signature(dst_path)
+                cur = conn.execute('INSERT OR IGNORE INTO thumbs (key, width, path, file_size, mtime, data, created_at) '
+                                   'SELECT ?, width, ?, ?, ?, data, ? FROM thumbs WHERE key = ?',
+                                   (thumb_key(dst_path), str(dst_path), size, mtime, time.time(), thumb_key(src_path)))
+                return cur.rowcount > 0
+
+    def move(self, old_path, new_path):
+        """Re-key the thumbnails of a renamed/moved video. Returns True if any were moved."""
+        size, mtime = _signature(new_path)
+        with self._lock:
+            with self._connect() as conn:
+                cur = conn.execute('UPDATE OR IGNORE thumbs SET key = ?, path = ?, file_size = ?, mtime = ?, missing_since = NULL '
+                                   'WHERE key = ?',
+                                   (thumb_key(new_path), str(new_path), size, mtime, thumb_key(old_path)))
+                conn.execute('DELETE FROM thumbs WHERE key = ?', (thumb_key(old_path),))
+                conn.execute('UPDATE OR REPLACE thumb_failures SET key = ?, path = ? WHERE key = ?',
+                             (thumb_key(new_path), str(new_path), thumb_key(old_path)))
+                return cur.rowcount > 0
+
+    def delete(self, path):
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM thumbs WHERE key = ?', (thumb_key(path),))
+                conn.execute('DELETE FROM thumb_failures WHERE key = ?', (thumb_key(path),))
+
+    def import_legacy(self, legacy_dir=LEGACY_DIR, known_paths=()):
+        """Import <md5>.jpg files from the old thumbnail directory, deleting each once stored.
+
+        `known_paths` (e.g. all video paths in the metadata DB) lets imported
+        rows record their video path so compaction can find orphans later.
+        Returns the number of files imported.
+        """
+        legacy_dir = Path(legacy_dir)
+        if not legacy_dir.is_dir():
+            return 0
+        paths = {thumb_key(p): str(p) for p in known_paths}
+        files = [f for f in legacy_dir.glob("*.jpg") if len(f.stem) == 32]
+        count = 0
+        for i in range(0, len(files), 200):
+            batch = []
+            for f in files[i:i + 200]:
+                try:
+                    batch.append((f, f.stem, paths.get(f.stem), f.read_bytes()))
+                except OSError:
+                    logger.exception(f"Could not read legacy thumbnail {f}")
+            with self._lock:
+                with self._connect() as conn:
+                    conn.executemany('INSERT OR IGNORE INTO thumbs (key, width, path, data, created_at) VALUES (?, ?, ?, ?, ?)',
+                                     [(key, DEFAULT_WIDTH, p, sqlite3.Binary(data), time.time()) for _, key, p, data in batch])
+            # Only delete after the batch is committed
+            for f, _, _, _ in batch:
+                try:
+                    f.unlink()
+                except OSError:
+                    logger.debug(f"Could not delete migrated thumbnail {f}")
+            count += len(batch)
+        if count:
+            logger.info(f"Imported {count} legacy thumbnails from {legacy_dir}")
+        return count
+
+    def compact(self, roots=()):
+        """Drop thumbnails of replaced and long-gone videos, then VACUUM. Returns rows removed.
+
+        `roots` are the library folders. A file whose size/mtime changed is
+        dropped at once. A missing file is only considered while its root is
+        reachable: it is marked on the first pass and dropped once it has been
+        missing for MISSING_GRACE. Files outside every root are never dropped.
+        """
+        now = time.time()
+        reachable = {r: os.path.isdir(r) for r in roots}
+        stale, missing, found, offline = [], [], [], 0
+        with self._connect() as conn:
+            rows = conn.execute('SELECT DISTINCT key, path, file_size, mtime, missing_since FROM thumbs '
+                                'WHERE path IS NOT NULL').fetchall()
+            failed = conn.execute('SELECT key, path FROM thumb_failures').fetchall()
+        for key, path, size, mtime, missing_since in rows:
+            if os.path.exists(path):
+                if not self._fresh(path, size, mtime):
+                    stale.append(key)
+                elif missing_since is not None:
+                    found.append(key)
+            elif not reachable.get(_library_root(path, roots)):
+                offline += 1
+            elif missing_since is None:
+                missing.append(key)
+            elif now - missing_since >= MISSING_GRACE:
+                stale.append(key)
+        gone = [key for key, path in failed
+                if not os.path.exists(path) and reachable.get(_library_root(path, roots))]
+        with self._lock:
+            with self._connect() as conn:
+                conn.executemany('DELETE FROM thumbs WHERE key = ?', [(k,) for k in stale])
+                conn.executemany('UPDATE thumbs SET missing_since = ? WHERE key = ?', [(now, k) for k in missing])
+                conn.executemany('UPDATE thumbs SET missing_since = NULL WHERE key = ?', [(k,) for k in found])
+                conn.executemany('DELETE FROM thumb_failures WHERE key = ?', [(k,) for k in gone])
+                conn.execute('INSERT OR REPLACE INTO store_meta (name, value) VALUES (?, ?)', ('last_compact', str(now)))
+            conn = self._connect()
+            try:
+                conn.execute('VACUUM')
+            finally:
+                conn.close()
+        logger.info(f"Compacted thumbnail store: removed {len(stale)} stale thumbnails, "
+                    f"{len(missing)} newly missing, {offline} under offline roots")
+        return len(stale)
+
+    def maintain(self, known_paths=(), roots=()):
+        """Startup housekeeping: import legacy files, then compact if the last run is old enough."""
+        try:
+            self.import_legacy(known_paths=known_paths)
+            with self._connect() as conn:
+                row = conn.execute("SELECT value FROM store_meta WHERE name = 'last_compact'").fetchone()
+            if not row or time.time() - float(row[0]) > COMPACT_INTERVAL:
+                self.compact(roots)
+        except Exception:
+            logger.exception("Thumbnail store maintenance failed")
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide ThumbStore on the default path."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ThumbStore()
+        return _default
@@ -104,16 +104,28 @@ class TVMazeAPI:
         return None
 
     @staticmethod
-    def download_image(url, save_path):
-        """Download an image from URL and save to path. Returns True on success."""
+    def fetch_image(url):
+        """Download an image from URL and return its bytes, or None on failure."""
         if not url:
-            return False
+            return None
         try:
             response = requests.get(url, timeout=30)
             response.raise_for_status()
+            return response.content
+        except Exception as e:
+            print(f"Error downloading image from {url}: {e}")
+            return None
+
+    @staticmethod
+    def download_image(url, save_path):
+        """Download an image from URL and save to path. Returns True on success."""
+        data = TVMazeAPI.fetch_image(url)
+        if data is None:
+            return False
+        try:
             with open(save_path, 'wb') as f:
-                f.write(response.content)
+                f.write(data)
             return True
         except Exception as e:
-            print(f"Error downloading image from {url}: {e}")
+            print(f"Error saving image from {url}: {e}")
             return False
\ No newline at end of file
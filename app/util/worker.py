@@ -1,4 +1,5 @@
-import os, time, vlc, sys, hashlib, traceback, logging, socket, signal
+import os, time, vlc, sys, hashlib, traceback, logging, socket, signal, threading, itertools, ctypes, tempfile
+from queue import PriorityQueue, Empty
 from pathlib import Path
 
 # Try to import the project's logger. If the worker is started with a different
@@ -16,17 +17,501 @@ except Exception:
     logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger("WORKER")
 
+from app.util.metadata_db import MetadataDB
+from app.util.media_probe import ensure_probed
+from app.util.file_identity import relink_moved, copy_thumbnail
+from app.util.ipc import send_msg, recv_msg
+from app.util.shm_ring import ShmRing
+from app.util.snapshot import EventSnapshotter, SnapshotError
+from app.util.thumb_store import get_store, LEVELS, DEFAULT_WIDTH
+from app.util.frame_score import score_frame, is_good
+from app.util.storyboard import (frame_times, storyboard_paths, load_index, write_index,
+                                  STORYBOARD_DIR, TILE_W, TILE_H, COLS)
+
 def get_h(p):
     return hashlib.md5(p.lower().replace("\\","/").encode()).hexdigest()
 
+def pick_seek_ms(length):
+    if length > 60000:
+        # For long videos, use 10% of length
+        t = length // 10
+    else:
+        # For short videos, use middle
+        t = length // 2
+    return max(1000, t)  # Ensure at least 1 second in
+
+HEARTBEAT_INTERVAL = 1.0  # seconds between "hb" frames while a task runs
+CANDIDATE_FRACTIONS = (0.25, 0.4, 0.55, 0.7, 0.85)  # where to look when the default frame is black/flat
+SCORE_W, SCORE_H = 160, 90  # candidates are decoded small; only the winner is captured at full size
+
+def rss_mb():
+    """Resident set size of this process in MB (None if unknown); reported so the pool can recycle leaky workers."""
+    try:
+        if sys.platform.startswith("win"):
+            class PMC(ctypes.Structure):
+                _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong)] + \
+                           [(n, ctypes.c_size_t) for n in ("PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                                                          "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                                                          "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+            pmc = PMC(); pmc.cb = ctypes.sizeof(PMC)
+            ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(pmc), pmc.cb)
+            return round(pmc.WorkingSetSize / 1048576, 1)
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1048576, 1)
+    except Exception:
+        return None
+
+class FrameGrabber:
+    """Second media player whose RV32 video callbacks decode straight into a caller-supplied buffer."""
+
+    def __init__(self, inst, width, height, pitch=None):
+        self.player = inst.media_player_new()
+        pitch = pitch or width * 4
+        size = pitch * height
+        # Idle target between grabs; libvlc wants 32-byte aligned planes
+        self._staging = ctypes.create_string_buffer(size + 32)
+        self._idle = (ctypes.addressof(self._staging) + 31) & ~31
+        self.addr = self._idle
+        self.frame = threading.Event()
+        self._lock_cb = vlc.CallbackDecorators.VideoLockCb(self._lock)
+        self._display_cb = vlc.CallbackDecorators.VideoDisplayCb(self._display)
+        self.player.video_set_callbacks(self._lock_cb, None, self._display_cb, None)
+        self.player.video_set_format("RV32", width, height, pitch)
+
+    def _lock(self, opaque, planes):
+        planes[0] = self.addr
+        return None
+
+    def _display(self, opaque, picture):
+        self.frame.set()
+
+    def grab(self, inst, vpath, t_ms, addr, timeout=5.0, cancelled=None):
+        """Decode the first frame at `t_ms` into `addr`. Returns True once a frame was displayed."""
+        self.addr = addr
+        self.frame.clear()
+        try:
+            self.player.set_media(inst.media_new(vpath, f"start-time={t_ms / 1000:.3f}"))
+            self.player.play()
+            deadline = time.time() + timeout
+            while not self.frame.wait(0.05):
+                if time.time() > deadline or (cancelled and cancelled()):
+                    return False
+            return True
+        finally:
+            self.player.stop()
+            self.player.set_media(None)
+            self.addr = self._idle
+
+
+def make_storyboard(inst, vpath, length, cancelled=None, stats=None):
+    """Capture evenly spaced frames of `vpath` into a sprite sheet in one media session.
+
+    The player is paused after the first frame and then seeked (keyframe-fast)
+    from tile to tile; the RV32 pitch is the sheet's row stride, so libvlc
+    writes each frame straight into its tile. Returns True when written.
+    """
+    cancelled = cancelled or (lambda: False)
+    times = frame_times(length)
+    if not times:
+        return False
+    cols = min(COLS, len(times))
+    rows = (len(times) + cols - 1) // cols
+    pitch = cols * TILE_W * 4
+    size = pitch * rows * TILE_H
+    raw = ctypes.create_string_buffer(size + 32)
+    base = (ctypes.addressof(raw) + 31) & ~31
+    g = FrameGrabber(inst, TILE_W, TILE_H, pitch=pitch)
+    started = time.perf_counter()
+    captured = []
+    try:
+        g.player.set_media(inst.media_new(vpath, "input-fast-seek", f"start-time={times[0] / 1000:.3f}"))
+        g.addr = base
+        g.frame.clear()
+        g.player.play()
+        if not g.frame.wait(5.0):
+            logger.warning("Storyboard: no video output for %s", vpath)
+            return False
+        g.player.set_pause(1)
+        for i, t in enumerate(times):
+            if cancelled():
+                return False
+            # Tiles are laid out row-major inside the sheet
+            g.addr = base + (i // cols) * TILE_H * pitch + (i % cols) * TILE_W * 4
+            if i > 0:
+                g.frame.clear()
+                g.player.set_time(t)
+                if not g.frame.wait(2.0):
+                    logger.debug("Storyboard: no frame at %s ms in %s", t, vpath)
+                    continue
+            captured.append(i)
+    finally:
+        g.player.stop()
+        g.player.set_media(None)
+        g.player.release()
+    elapsed = time.perf_counter() - started
+    if len(captured) < len(times) // 2:
+        logger.warning("Storyboard: only %d/%d frames captured for %s", len(captured), len(times), vpath)
+        return False
+    from qtpy.QtGui import QImage
+    sheet, _ = storyboard_paths(vpath)
+    img = QImage((ctypes.c_char * size).from_address(base), cols * TILE_W, rows * TILE_H, pitch, QImage.Format_RGB32)
+    tmp = str(sheet) + ".tmp"
+    if not img.save(tmp, "JPG", 80):
+        logger.error("Storyboard: failed to encode %s", sheet)
+        return False
+    os.replace(tmp, sheet)
+    write_index(vpath, {"tile_w": TILE_W, "tile_h": TILE_H, "cols": cols, "duration_ms": length,
+                        "times_ms": [times[i] if i in captured else -1 for i in range(len(times))]})
+    fps = len(captured) / elapsed if elapsed > 0 else 0
+    logger.info("Storyboard written for %s: %d frames in %.2f s (%.1f fps)", vpath, len(captured), elapsed, fps)
+    if stats is not None:
+        stats["frames"] = len(captured)
+        stats["storyboard_ms"] = round(elapsed * 1000, 1)
+    return True
+
+
+def find_better_frame(inst, vpath, length, baseline, cancelled=None, stats=None):
+    """Search CANDIDATE_FRACTIONS of `vpath` for a frame scoring above `baseline`.
+
+    Candidates are decoded in one paused media session (like storyboards) and
+    the search stops at the first good frame. Returns its time in ms, or None.
+    """
+    cancelled = cancelled or (lambda: False)
+    times = [int(length * f) for f in CANDIDATE_FRACTIONS]
+    pitch = SCORE_W * 4
+    raw = ctypes.create_string_buffer(pitch * SCORE_H + 32)
+    base = (ctypes.addressof(raw) + 31) & ~31
+    frame = (ctypes.c_char * (pitch * SCORE_H)).from_address(base)
+    g = FrameGrabber(inst, SCORE_W, SCORE_H)
+    best_t, best = None, baseline
+    score_s = 0.0
+    tried = 0
+    try:
+        g.addr = base
+        g.frame.clear()
+        g.player.set_media(inst.media_new(vpath, "input-fast-seek", f"start-time={times[0] / 1000:.3f}"))
+        g.player.play()
+        if not g.frame.wait(3.0):
+            return None
+        g.player.set_pause(1)
+        for i, t in enumerate(times):
+            if cancelled():
+                return None
+            if i > 0:
+                g.frame.clear()
+                g.player.set_time(t)
+                if not g.frame.wait(2.0):
+                    continue
+            tried += 1
+            t0 = time.perf_counter()
+            value = score_frame(frame, SCORE_W, SCORE_H)
+            score_s += time.perf_counter() - t0
+            if value > best:
+                best_t, best = t, value
+            if is_good(value):
+                break
+    finally:
+        g.player.stop()
+        g.player.set_media(None)
+        g.player.release()
+        if stats is not None:
+            stats["candidates"] = tried
+            stats["score_ms"] = round(stats.get("score_ms", 0) + score_s * 1000, 2)
+    return best_t
+
+
+def _better_time(inst, vpath, length, buf, width, height, pitch, cancelled, stats):
+    """Score the frame just captured; if it is black/flat, return the time of a better candidate (or None)."""
+    t0 = time.perf_counter()
+    value = score_frame(buf, width, height, pitch)
+    if stats is not None:
+        stats["score_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        stats["frame_score"] = round(value, 1)
+    if is_good(value) or length <= 0:
+        return None
+    better = find_better_frame(inst, vpath, length, value, cancelled, stats)
+    if better is not None:
+        logger.info("Replacing low-scoring frame (%.1f) of %s with the one at %s ms", value, vpath, better)
+    return better
+
+
+def _score_jpeg(image_file):
+    """(buffer, width, height, pitch) of a snapshot decoded to RV32, or None without Qt."""
+    try:
+        from qtpy.QtGui import QImage
+    except ImportError:
+        return None
+    img = QImage(image_file).convertToFormat(QImage.Format_RGB32)
+    if img.isNull():
+        return None
+    return bytes(img.constBits()), img.width(), img.height(), img.bytesPerLine()
+
+
+def store_levels(store, vpath, image_file, width):
+    """Store a snapshot at `width` plus any missing smaller levels scaled down from it."""
+    with open(image_file, 'rb') as f:
+        data = f.read()
+    store.put(vpath, data, width)
+    smaller = [w for w in LEVELS if w < width and not store.has(vpath, w)]
+    try:
+        from qtpy.QtGui import QImage
+        from qtpy.QtCore import Qt, QBuffer, QIODevice
+    except ImportError:
+        # Headless install: the UI falls back to the larger level
+        smaller = []
+    if smaller:
+        img = QImage.fromData(data)
+        for w in smaller:
+            buf = QBuffer()
+            buf.open(QIODevice.WriteOnly)
+            if img.scaledToWidth(w, Qt.SmoothTransformation).save(buf, "JPG", 85):
+                store.put(vpath, bytes(buf.data()), w)
+    try:
+        os.remove(image_file)
+    except OSError:
+        pass
+
+
+def process_task(inst, snapper, db, vpath, mode="thumb", cancelled=None, grab=None, stats=None, width=DEFAULT_WIDTH):
+    """Probe `vpath` into the media_info cache and, for thumb tasks, write its snapshot.
+
+    `cancelled` is polled between steps so a cancel request can abort the
+    decode. `grab(vpath, t_ms)` replaces the JPEG snapshot with a shared-memory
+    frame when the duration is known. Mode "storyboard" builds a sprite sheet
+    instead of a thumbnail; `stats` collects its frame count and timing.
+    `width` picks the thumbnail level (see thumb_store.LEVELS).
+    `snapper` is the EventSnapshotter used for the JPEG path; its per-step
+    timings also land in `stats`. Returns True when the task left the expected
+    output behind.
+    """
+    cancelled = cancelled or (lambda: False)
+    info = None
+    if db is not None:
+        try:
+            # A moved/renamed file picks up its old row, media info and thumbnail here
+            relink_moved(db, vpath)
+        except Exception:
+            logger.exception("Identity check failed for %s", vpath)
+        try:
+            info = ensure_probed(inst, db, vpath)
+        except Exception:
+            logger.exception("Probe failed for %s", vpath)
+    if mode == "probe":
+        return info is not None
+    if cancelled():
+        return False
+    if mode == "storyboard":
+        if load_index(vpath) is not None:
+            return True
+        if not info or not info[3]:  # duration_ms
+            logger.warning("Storyboard skipped for %s: duration unknown", vpath)
+            return False
+        return make_storyboard(inst, vpath, info[3], cancelled, stats)
+    store = get_store()
+    if store.has(vpath, width):
+        return True
+    if db is not None:
+        # Identical content elsewhere in the library: reuse its thumbnail instead of decoding
+        try:
+            for twin in db.find_identical_videos(vpath):
+                if copy_thumbnail(twin, vpath) and store.has(vpath, width):
+                    logger.info("Reused thumbnail of identical file %s for %s", twin, vpath)
+                    return True
+        except Exception:
+            logger.exception("Duplicate lookup failed for %s", vpath)
+    length = info[3] if info and info[3] else 0  # duration_ms
+    if grab is not None and length > 0:
+        try:
+            if grab(vpath, pick_seek_ms(length)):
+                frame = getattr(grab, "frame", None)  # (buffer, width, height) of the filled slot
+                better = frame and _better_time(inst, vpath, length, *frame, None, cancelled, stats)
+                if better is not None and not grab(vpath, better):
+                    logger.warning("Re-grab at %s ms failed for %s; falling back to snapshot", better, vpath)
+                else:
+                    return True
+            if cancelled():
+                return False
+            logger.warning("Shared-memory grab failed for %s; falling back to snapshot", vpath)
+        except Exception:
+            logger.exception("Shared-memory grab failed for %s", vpath)
+    # libvlc snapshots to a file; it is packed into the thumbnail store right after
+    tp = os.path.join(tempfile.gettempdir(), f"vibe_snap_{os.getpid()}.jpg")
+    try:
+        # Duration known from the probe cache: open directly at the seek point, else seek once the length arrives
+        steps = snapper.take(inst, vpath, tp, t_ms=pick_seek_ms(length) if length > 0 else None,
+                             pick=pick_seek_ms, width=width, height=width * 9 // 16, cancelled=cancelled)
+        frame = _score_jpeg(tp) if length > 0 else None
+        better = frame and _better_time(inst, vpath, length, *frame, cancelled, stats)
+        if better is not None:
+            try:
+                steps = snapper.take(inst, vpath, tp, t_ms=better, width=width, height=width * 9 // 16, cancelled=cancelled)
+            except SnapshotError as e:
+                # The first snapshot is still on disk; keep it
+                logger.warning("Re-snapshot at %s ms failed for %s: %s", better, vpath, e)
+        store_levels(store, vpath, tp, width)
+    except SnapshotError as e:
+        if not cancelled():
+            logger.warning("Snapshot failed for %s at step %s", vpath, e)
+            if stats is not None:
+                stats["error"] = f"snapshot {e}"
+        return False
+    except Exception as e:
+        logger.exception("Snapshot failed for %s -> %s", vpath, tp)
+        if stats is not None:
+            stats["error"] = f"snapshot {e}"
+        return False
+    logger.info("Thumbnail stored for %s (%s)", vpath, steps)
+    if stats is not None:
+        stats.update(steps)
+    return True
+
 def run():
     args = ["--intf=dummy", "--vout=dummy", "--no-audio", "--avcodec-hw=none", "--quiet"]
     try:
         inst = vlc.Instance(*args)
         p = inst.media_player_new()
+        snapper = EventSnapshotter(p)
     except Exception as e:
         logger.critical("FATAL_INIT: %s", e)
         return
+    try:
+        db = MetadataDB(migrate=False)  # the pool migrated it before spawning workers
+    except Exception:
+        logger.exception("Failed to open metadata DB; media info will not be cached")
+        db = None
+
+    def handle_line(line):
+        # Stdin lines are "path|seek" or "path|seek|mode" where mode is "thumb" (default) or "probe"
+        try:
+            logger.debug("Worker received raw line: %r", line)
+            parts = line.strip().rsplit("|", 2)
+            if len(parts) == 3 and parts[2] not in ("thumb", "probe"):
+                # The path itself contained '|'; only the seek field follows it
+                parts = line.strip().rsplit("|", 1) + ["thumb"]
+            vpath = parts[0]
+            mode = parts[2] if len(parts) > 2 else "thumb"
+            return process_task(inst, snapper, db, vpath, mode)
+        except Exception:
+            logger.exception("TASK_ERR while processing line: %s", line)
+            return False
+
+    rings = {}  # shared-memory blocks attached by name
+    grabbers = {}  # (width, height) -> FrameGrabber
+
+    def shm_grabber(spec, grabbed, cancelled):
+        # Build a grab callable writing into the requested shared-memory slot
+        ring = rings.get(spec["name"])
+        if ring is None:
+            ring = rings[spec["name"]] = ShmRing(name=spec["name"], width=spec["width"], height=spec["height"])
+        key = (ring.width, ring.height)
+        if key not in grabbers:
+            grabbers[key] = FrameGrabber(inst, *key)
+        addr = ring.address(spec["slot"])
+
+        def grab(vpath, t_ms):
+            ok = grabbers[key].grab(inst, vpath, t_ms, addr, cancelled=cancelled)
+            grabbed["ok"] = ok
+            return ok
+        grab.frame = ((ctypes.c_char * ring.frame_bytes).from_address(addr), ring.width, ring.height)
+        return grab
+
+    def serve_connection(conn):
+        # A reader thread keeps draining frames (requests, cancels, pings) while tasks run here
+        tasks = PriorityQueue()
+        cancelled_ids = set()
+        send_lock = threading.Lock()
+        seq = itertools.count()
+        current = {}  # "id" of the task being processed, for heartbeats
+        closed = threading.Event()
+
+        def send(msg):
+            with send_lock:
+                send_msg(conn, msg)
+
+        def reader():
+            try:
+                while True:
+                    msg = recv_msg(conn)
+                    if msg is None:
+                        break
+                    kind = msg.get("type")
+                    if kind == "req":
+                        tasks.put((msg.get("priority", 1), next(seq), msg, time.perf_counter()))
+                    elif kind == "cancel":
+                        cancelled_ids.add(msg.get("id"))
+                    elif kind == "ping":
+                        send({"type": "pong", "id": msg.get("id"), "t": msg.get("t")})
+                    elif kind == "quit":
+                        nonlocal running
+                        running = False
+                        break
+            except Exception:
+                logger.exception("IPC read error")
+            tasks.put((float("inf"), next(seq), None, 0))
+
+        def heartbeat():
+            # Lets the pool tell a slow task from a wedged process; libvlc calls release the GIL
+            while not closed.wait(HEARTBEAT_INTERVAL):
+                req_id = current.get("id")
+                if req_id is not None:
+                    try:
+                        send({"type": "hb", "id": req_id, "rss_mb": rss_mb()})
+                    except Exception:
+                        break
+
+        threading.Thread(target=reader, daemon=True).start()
+        threading.Thread(target=heartbeat, daemon=True).start()
+        try:
+            serve_tasks(tasks, cancelled_ids, current, send)
+        finally:
+            closed.set()
+
+    def serve_tasks(tasks, cancelled_ids, current, send):
+        while running:
+            try:
+                _, _, msg, received = tasks.get(timeout=1.0)
+            except Empty:
+                continue
+            if msg is None:
+                break
+            req_id = current["id"] = msg.get("id")
+            started = time.perf_counter()
+            timings = {"queue_ms": round((started - received) * 1000, 1)}
+            status, error = "cancelled", None
+            grabbed = {}
+            stats = {}
+            if req_id not in cancelled_ids:
+                try:
+                    is_cancelled = lambda: req_id in cancelled_ids
+                    grab = None
+                    if msg.get("shm"):
+                        try:
+                            grab = shm_grabber(msg["shm"], grabbed, is_cancelled)
+                        except Exception:
+                            logger.exception("Failed to attach shared memory %s", msg["shm"].get("name"))
+                    ok = process_task(inst, snapper, db, msg["path"], msg.get("mode", "thumb"),
+                                      cancelled=is_cancelled, grab=grab, stats=stats,
+                                      width=msg.get("width") or DEFAULT_WIDTH)
+                    status = "done" if ok else ("cancelled" if req_id in cancelled_ids else "failed")
+                except Exception as e:
+                    logger.exception("TASK_ERR while processing %s", msg.get("path"))
+                    status, error = "failed", str(e)
+            cancelled_ids.discard(req_id)
+            current["id"] = None
+            timings["work_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            frames = stats.pop("frames", None)
+            reason = stats.pop("error", None)
+            error = error or reason
+            timings.update(stats)
+            reply = {"type": "done", "id": req_id, "status": status, "ok": status == "done",
+                     "error": error, "timings": timings, "rss_mb": rss_mb()}
+            if frames:
+                reply["frames"] = frames
+            if status == "done" and grabbed.get("ok"):
+                # The frame is in the shared slot; the UI paints it and persists the JPEG
+                reply["shm_slot"] = msg["shm"]["slot"]
+            send(reply)
+
     # Determine whether an IPC port was provided; if so, use a TCP socket server on localhost.
     ipc_port = None
     for a in sys.argv[1:]:
@@ -85,55 +570,7 @@ def run():
             logger.info("Accepted IPC connection from %s", addr)
             try:
                 with conn:
-                    f = conn.makefile('r', encoding='utf-8', errors='replace')
-                    for line in f:
-                        if not running:
-                            logger.info("Shutting down connection loop due to stop request")
-                            break
-                        if not line:
-                            break
-                        if "QUIT" in line:
-                            running = False
-                            break
-                        try:
-                            logger.debug("Worker received raw line: %r", line)
-                            if line.strip().startswith("__DIAG_PING__"):
-                                logger.info("Received diagnostic ping, ignoring")
-                                continue
-                            vpath, seek = line.strip().split("|")
-                            tp = os.path.join("resources", "thumbs", f"{get_h(vpath)}.jpg")
-                            logger.debug("Computed thumb path %s for video %s (seek %s)", tp, vpath, seek)
-                            if not os.path.exists(tp):
-                                try:
-                                    p.set_media(inst.media_new(vpath))
-                                    p.play()
-                                except Exception:
-                                    logger.exception("Failed to set media/play for %s", vpath)
-                                    continue
-                                for _ in range(30):
-                                    if p.get_length() > 0:
-                                        break
-                                    time.sleep(0.1)
-                                length = p.get_length()
-                                if length > 60000:
-                                    # For long videos, use 10% of length
-                                    t = length // 10
-                                else:
-                                    # For short videos, use middle
-                                    t = length // 2
-                                t = max(1000, t)  # Ensure at least 1 second in
-                                try:
-                                    logger.debug("Setting time %s ms and taking snapshot to %s", t, tp)
-                                    p.set_time(t)
-                                    time.sleep(0.5)  # Reduced from 1.2 to speed up
-                                    p.video_take_snapshot(0, tp, 320, 180)
-                                    p.stop()
-                                    p.set_media(None)  # Release media to prevent state issues
-                                    logger.info("Snapshot written: %s", tp)
-                                except Exception:
-                                    logger.exception("Snapshot failed for %s -> %s", vpath, tp)
-                        except Exception:
-                            logger.exception("TASK_ERR while processing line: %s", line)
+                    serve_connection(conn)
             except Exception:
                 logger.exception("IPC connection handling error")
             finally:
@@ -160,52 +597,33 @@ def run():
                 break
             if not line or "QUIT" in line:
                 break
-            try:
-                logger.debug("Worker received raw line: %r", line)
-                # Ignore diagnostic ping lines sent by the parent process
-                if line.strip().startswith("__DIAG_PING__"):
-                    logger.info("Received diagnostic ping, ignoring")
-                    continue
-                vpath, seek = line.strip().split("|")
-                tp = os.path.join("resources", "thumbs", f"{get_h(vpath)}.jpg")
-                logger.debug("Computed thumb path %s for video %s (seek %s)", tp, vpath, seek)
-                if not os.path.exists(tp):
-                    try:
-                        p.set_media(inst.media_new(vpath))
-                        p.play()
-                    except Exception:
-                        logger.exception("Failed to set media/play for %s", vpath)
-                        continue
-                    for _ in range(30):
-                        if p.get_length() > 0:
-                            break
-                        time.sleep(0.1)
-                    length = p.get_length()
-                    if length > 60000:
-                        # For long videos, use 10% of length
-                        t = length // 10
-                    else:
-                        # For short videos, use middle
-                        t = length // 2
-                    t = max(1000, t)  # Ensure at least 1 second in
-                    try:
-                        logger.debug("Setting time %s ms and taking snapshot to %s", t, tp)
-                        p.set_time(t)
-                        time.sleep(0.5)  # Reduced from 1.2 to speed up
-                        p.video_take_snapshot(0, tp, 320, 180)
-                        p.stop()
-                        p.set_media(None)  # Release media to prevent state issues
-                        logger.info("Snapshot written: %s", tp)
-                    except Exception:
-                        logger.exception("Snapshot failed for %s -> %s", vpath, tp)
-            except Exception:
-                logger.exception("TASK_ERR while processing line: %s", line)
+            if line.strip().startswith("__DIAG_PING__"):
+                continue
+            handle_line(line)
     try:
+        for g in grabbers.values():
+            g.player.release()
+        for ring in rings.values():
+            ring.close()
         p.release()
         inst.release()
     except Exception:
         logger.exception("Error releasing vlc resources")
 
 if __name__ == "__main__":
-    os.makedirs("resources/thumbs", exist_ok=True)
+    os.makedirs(STORYBOARD_DIR, exist_ok=True)
+    if "--prebuild" in sys.argv:
+        import argparse
+        from app.util.prebuild import prebuild
+        ap = argparse.ArgumentParser(prog="python -m app.util.worker --prebuild",
+                                     description="Generate library thumbnails without the GUI")
+        ap.add_argument("--prebuild", action="store_true")
+        ap.add_argument("roots", nargs="*", help="folders to walk (default: configured library folders)")
+        ap.add_argument("--storyboards", action="store_true", help="also build seek-bar storyboards")
+        ap.add_argument("--jobs", type=int, default=0, help="worker processes (default: thumb_workers / cores-1)")
+        ap.add_argument("--width", type=int, default=DEFAULT_WIDTH, choices=LEVELS, help="thumbnail level")
+        ap.add_argument("--retry-failed", action="store_true", help="ignore the failure backoff")
+        a = ap.parse_args()
+        res = prebuild(a.roots, a.storyboards, a.jobs, a.width, a.retry_failed)
+        sys.exit(1 if res['failed'] else 0)
     run()
\ No newline at end of file
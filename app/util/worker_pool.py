@@ -0,0 +1,494 @@
+"""
+Thumbnail Worker Pool
+Runs N thumbnail worker processes (app/util/worker.py), each with its own
+socket and dispatcher thread. Dispatchers pull from one shared priority queue
+and only take a new task once their worker reported the previous one done, so
+work naturally balances towards idle workers. A crashed worker only affects
+its own in-flight task; the slot restarts its process and carries on.
+Messages use the framed protocol in app/util/ipc.py.
+
+Supervision: while a task runs the worker sends a heartbeat every second.
+A worker that goes silent (HEARTBEAT_TIMEOUT) or overruns its task's deadline
+(TASK_DEADLINES) is killed and respawned; workers are also recycled after
+`max_tasks` tasks or once they report more than `max_rss_mb` resident memory
+(libvlc leaks across thousands of set_media calls). Every restart is counted
+by reason in metrics().
+"""
+
+import os, sys, time, socket, threading, itertools, logging, subprocess, queue
+import statistics
+from queue import PriorityQueue
+from collections import deque
+from pathlib import Path
+from app.util.logger import setup_app_logger
+from app.util.ipc import send_msg, recv_msg
+from app.util.shm_ring import ShmRing
+from app.util.metrics import REGISTRY
+from app.util.metadata_db import MetadataDB
+
+logger = setup_app_logger("WORKER_POOL")
+
+ROOT = Path(__file__).parent.parent.parent.absolute()
+WORKER_SCRIPT = ROOT / "app" / "util" / "worker.py"
+TASK_DEADLINES = {'probe': 15, 'thumb': 30, 'storyboard': 180}  # seconds per task, by mode
+HEARTBEAT_TIMEOUT = 5  # seconds without any frame from a busy worker before it counts as hung
+MAX_ATTEMPTS = 2  # a task that kills its worker this many times is dropped
+MAX_TASKS = 500  # tasks per worker process before it is recycled
+MAX_RSS_MB = 600  # resident memory reported by a worker before it is recycled
+RESTART_REASONS = ('crash', 'hung', 'deadline', 'max_tasks', 'max_rss')
+
+
+class WorkerHung(Exception):
+    """A busy worker stopped sending heartbeats or overran its task deadline."""
+
+    def __init__(self, reason, detail):
+        super().__init__(detail)
+        self.reason = reason
+
+
+def failure_reason(error):
+    """Low-cardinality label for a task error, e.g. "snapshot vout" or "worker hung"."""
+    return (error or "unknown").split(":", 1)[0][:40]
+
+
+def default_pool_size():
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def _make_startupinfo():
+    # On Windows, hide the worker console window
+    si = None
+    if sys.platform.startswith("win"):
+        try:
+            si = subprocess.STARTUPINFO()
+            si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        except Exception:
+            logger.exception("Failed to configure subprocess STARTUPINFO")
+            si = None
+    return si
+
+
+def _drain_pipe(pipe, tag, level=logging.INFO):
+    # Forward worker stdout/stderr lines into the app logger
+    try:
+        if pipe is None:
+            return
+        with pipe:
+            while True:
+                chunk = pipe.readline()
+                if not chunk:
+                    break
+                line = chunk.decode('utf-8', errors='replace').rstrip('\r\n')
+                logger.log(level, "[%s] %s", tag, line)
+    except Exception:
+        logger.exception("Error reading worker pipe")
+
+
+class WorkerSlot:
+    """One worker process plus the dispatcher thread that feeds it."""
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index
+        self.proc = None
+        self.port = None
+        self.sock = None
+        self.current_id = None  # request id in flight on this worker
+        self._send_lock = threading.Lock()
+        self._retired = False  # process was stopped on purpose; its exit is not a crash
+        self._restart_delay = 0
+        # Metrics
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.last_restart = None  # reason of the most recent restart
+        self.tasks_run = 0  # tasks handled by the current process
+        self.rss_mb = None  # last resident memory reported by the worker
+        self.proc_started = 0
+        self.busy_s = 0.0
+        self.frames = 0  # storyboard frames captured
+        self.frame_s = 0.0
+        self.started_at = time.time()
+
+    def _start(self):
+        if self._restart_delay:
+            # Crash loop (e.g. broken libvlc install): back off instead of spinning
+            time.sleep(self._restart_delay)
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("127.0.0.1", 0))
+        self.port = s.getsockname()[1]
+        s.close()
+        self.proc = subprocess.Popen([sys.executable, str(self.pool.worker_script), f"--ipc-port={self.port}"],
+                                     stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0,
+                                     startupinfo=_make_startupinfo())
+        self.proc_started = time.time()
+        self._retired = False
+        self.tasks_run = 0
+        self.rss_mb = None
+        tag = f"worker{self.index}"
+        threading.Thread(target=_drain_pipe, args=(self.proc.stdout, tag, logging.INFO), daemon=True).start()
+        threading.Thread(target=_drain_pipe, args=(self.proc.stderr, tag, logging.ERROR), daemon=True).start()
+        logger.info("Started worker %s pid=%s port=%s", self.index, self.proc.pid, self.port)
+
+    def _connect(self):
+        backoff = 0.1
+        while not self.pool._stopping:
+            if self.proc is None or self.proc.poll() is not None:
+                if self.proc is not None and not self._retired:
+                    logger.warning("Worker %s exited with %s; restarting", self.index, self.proc.returncode)
+                    self._note_restart('crash')
+                self._start()
+            try:
+                self.pool._bump('conn_attempts')
+                self.sock = socket.create_connection(('127.0.0.1', self.port), timeout=3)
+                self.sock.settimeout(HEARTBEAT_TIMEOUT)
+                self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.pool._bump('conn_success')
+                return True
+            except OSError:
+                logger.debug("Worker %s connect failed; backing off %.1fs", self.index, backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+        return False
+
+    def _drop_connection(self):
+        try:
+            if self.sock is not None:
+                self.sock.close()
+        except Exception:
+            pass
+        self.sock = None
+
+    def _send(self, msg):
+        with self._send_lock:
+            send_msg(self.sock, msg)
+
+    def _note_restart(self, reason):
+        self.restarts += 1
+        self.last_restart = reason
+        self.pool._bump_restart(reason)
+        # Only a process that died right after starting suggests a crash loop
+        self._restart_delay = min(max(self._restart_delay * 2, 0.5), 10) \
+            if reason == 'crash' and time.time() - self.proc_started < 2 else 0
+
+    def _retire(self, reason, graceful=False):
+        """Stop the current process; the next task starts a fresh one."""
+        self._note_restart(reason)
+        self._retired = True
+        if graceful:
+            try:
+                self._send({"type": "quit"})
+            except Exception:
+                pass
+        self._drop_connection()
+        try:
+            if self.proc is not None and self.proc.poll() is None:
+                if graceful:
+                    try:
+                        self.proc.wait(timeout=3)
+                        return
+                    except subprocess.TimeoutExpired:
+                        pass
+                self.proc.kill()
+            # Reap it, so the next _connect sees the exit instead of the dying process's listening socket
+            self.proc.wait(timeout=5)
+        except Exception:
+            logger.exception("Failed to stop worker %s", self.index)
+
+    def _await_done(self, req_id, mode, started):
+        """Read frames until the `done` reply for `req_id`, enforcing heartbeat and deadline."""
+        limit = TASK_DEADLINES.get(mode, TASK_DEADLINES['thumb'])
+        while True:
+            try:
+                reply = recv_msg(self.sock)
+            except socket.timeout:
+                raise WorkerHung('hung', f"no heartbeat for {HEARTBEAT_TIMEOUT}s")
+            if reply is None:
+                raise ConnectionError("worker closed the connection")
+            if reply.get("rss_mb") is not None:
+                self.rss_mb = reply["rss_mb"]
+            if reply.get("type") == "done" and reply.get("id") == req_id:
+                return reply
+            if time.perf_counter() - started > limit:
+                raise WorkerHung('deadline', f"{mode} task exceeded {limit}s")
+
+    def send_cancel(self, req_id):
+        try:
+            if self.sock is not None and self.current_id == req_id:
+                self._send({"type": "cancel", "id": req_id})
+        except Exception:
+            logger.debug("Failed to send cancel for request %s", req_id, exc_info=True)
+
+    def run(self):
+        while not self.pool._stopping:
+            try:
+                pri, seq, payload = self.pool._queue.get()
+            except Exception:
+                continue
+            if payload is None:
+                # Shutdown sentinel
+                break
+            req_id, path, preview, mode, attempts, submitted, width = payload
+            if self.pool._is_cancelled(req_id):
+                self.pool._finished(req_id, path, mode, "cancelled", {}, None)
+                continue
+            if self.sock is None and not self._connect():
+                break
+            t0 = time.perf_counter()
+            timings = {'pool_wait_ms': round((t0 - submitted) * 1000, 1)}
+            self.current_id = req_id
+            ring = self.pool.shm
+            # Shared-memory slots hold fixed-size frames; other thumbnail widths go through the store
+            slot = ring.acquire() if ring is not None and mode == "thumb" and width in (None, ring.width) else None
+            shm_slot = None
+            try:
+                msg = {"type": "req", "id": req_id, "path": path, "preview": preview, "mode": mode, "priority": pri}
+                if width:
+                    msg["width"] = width
+                if slot is not None:
+                    msg["shm"] = {"name": ring.name, "slot": slot, "width": ring.width, "height": ring.height}
+                self._send(msg)
+                self.pool._bump('sent')
+                reply = self._await_done(req_id, mode, t0)
+                status, error = reply.get("status", "failed"), reply.get("error")
+                timings.update(reply.get("timings") or {})
+                shm_slot = reply.get("shm_slot")
+                if reply.get("frames"):
+                    self.frames += reply["frames"]
+                    self.frame_s += timings.get("storyboard_ms", 0) / 1000
+            except WorkerHung as e:
+                # The file wedged libvlc; retrying it would only hang another worker
+                logger.warning("Worker %s hung on %s (%s); restarting it", self.index, path, e)
+                self._retire(e.reason)
+                status, error = "failed", f"worker hung: {e}"
+            except Exception:
+                logger.warning("Worker %s failed on %s (attempt %s)", self.index, path, attempts + 1, exc_info=True)
+                self.pool._bump('send_fail')
+                # Crash isolation: kill only this worker, retry the task elsewhere
+                self._retire('crash')
+                if attempts + 1 < MAX_ATTEMPTS and not self.pool._stopping:
+                    self.pool._requeue(pri, (req_id, path, preview, mode, attempts + 1, submitted, width))
+                    continue
+                status, error = "failed", "worker died"
+            finally:
+                self.current_id = None
+                if slot is not None and shm_slot != slot:
+                    # Frame went to disk (or nowhere); the slot is free again
+                    ring.release(slot)
+            dt = time.perf_counter() - t0
+            timings['rtt_ms'] = round(dt * 1000, 1)
+            self.busy_s += dt
+            if status == "done":
+                self.completed += 1
+            elif status == "failed":
+                self.failed += 1
+            self.pool._finished(req_id, path, mode, status, timings, error, shm_slot)
+            if self.sock is not None:
+                self.tasks_run += 1
+                if self.tasks_run >= self.pool.max_tasks:
+                    self._retire('max_tasks', graceful=True)
+                elif self.rss_mb and self.rss_mb > self.pool.max_rss_mb:
+                    logger.info("Recycling worker %s at %.0f MB RSS", self.index, self.rss_mb)
+                    self._retire('max_rss', graceful=True)
+        self._drop_connection()
+
+    def stop(self):
+        self._drop_connection()
+        try:
+            if self.proc is not None and self.proc.poll() is None:
+                self.proc.terminate()
+        except Exception:
+            logger.exception("Failed to terminate worker %s", self.index)
+
+
+class ThumbWorkerPool:
+    """Process pool for thumbnail/probe tasks with a shared, de-duplicated priority queue."""
+
+    def __init__(self, size=0, worker_script=WORKER_SCRIPT, on_done=None, maxsize=200, shm=False,
+                 max_tasks=MAX_TASKS, max_rss_mb=MAX_RSS_MB):
+        self.size = int(size) if size else default_pool_size()
+        self.worker_script = worker_script
+        self.max_tasks = max_tasks
+        self.max_rss_mb = max_rss_mb
+        # Called from dispatcher threads with a result dict:
+        # {'id', 'path', 'mode', 'status', 'ok', 'error', 'timings', 'shm_slot'}
+        # A non-None shm_slot holds the frame; the receiver must call release_shm() when done with it.
+        self.on_done = on_done
+        # PriorityQueue entries: (priority, seq, (id, path, preview, mode, attempts, submitted, width));
+        # lower value => higher priority
+        self._queue = PriorityQueue(maxsize=maxsize)
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending = {}  # (path, mode, width) -> request id, queued or in flight
+        self._req_keys = {}  # request id -> its _pending key
+        self._cancelled = set()
+        self._stopping = False
+        self._done_times = deque(maxlen=1000)  # completion timestamps for throughput
+        self._timings = deque(maxlen=200)  # recent per-task timing dicts
+        self._counters = {'queued': 0, 'dropped': 0, 'sent': 0, 'send_fail': 0, 'conn_attempts': 0,
+                          'conn_success': 0, 'done': 0, 'failed': 0, 'cancelled': 0}
+        self._restarts = dict.fromkeys(RESTART_REASONS, 0)
+        self.slots = [WorkerSlot(self, i) for i in range(self.size)]
+        self.shm = None
+        if shm:
+            try:
+                self.shm = ShmRing(slots=self.size * 4)
+            except Exception:
+                logger.exception("Shared-memory frame delivery unavailable; using JPEG files")
+
+    def start(self):
+        try:
+            MetadataDB()  # run schema migrations once here; workers open the DB with migrate=False
+        except Exception:
+            logger.exception("Metadata DB migration failed")
+        for slot in self.slots:
+            threading.Thread(target=slot.run, daemon=True, name=f"thumb-dispatch-{slot.index}").start()
+        logger.info("Thumbnail worker pool started with %s workers", self.size)
+
+    def submit(self, path, preview, mode="thumb", priority=1, width=None):
+        """Queue a task unless one for the same path, mode and width is already queued or running.
+
+        `width` selects the thumbnail level (default: the store's default width); a
+        request for another level of a path that is already pending is queued too.
+        Returns the request id, or None if it was a duplicate or the queue is full.
+        """
+        key = (path, mode, width)
+        with self._lock:
+            if key in self._pending:
+                return None
+            req_id = next(self._ids)
+            self._pending[key] = req_id
+            self._req_keys[req_id] = key
+        try:
+            self._queue.put_nowait((priority, next(self._seq), (req_id, path, preview, mode, 0, time.perf_counter(), width)))
+            self._bump('queued')
+            return req_id
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(key, None)
+                self._req_keys.pop(req_id, None)
+            self._bump('dropped')
+            logger.warning("Thumbnail queue full; dropping %s request for %s", mode, path)
+            return None
+
+    def cancel(self, path, mode="thumb"):
+        """Cancel the queued or running tasks for `path` and `mode` (any width). Returns True if one was pending."""
+        with self._lock:
+            ids = {r for (p, m, _), r in self._pending.items() if p == path and m == mode}
+            self._cancelled |= ids
+        if not ids:
+            return False
+        for slot in self.slots:
+            if slot.current_id in ids:
+                slot.send_cancel(slot.current_id)
+        return True
+
+    def shm_view(self, slot):
+        """memoryview of a delivered frame (RV32, ring.width x ring.height)."""
+        return self.shm.view(slot)
+
+    def release_shm(self, slot):
+        if self.shm is not None:
+            self.shm.release(slot)
+
+    def is_pending(self, path, mode="thumb", width=None):
+        """True if a task for `path`/`mode` at `width` is queued or running."""
+        with self._lock:
+            return (path, mode, width) in self._pending
+
+    def _is_cancelled(self, req_id):
+        with self._lock:
+            return req_id in self._cancelled
+
+    def _requeue(self, priority, payload):
+        try:
+            self._queue.put_nowait((priority, next(self._seq), payload))
+        except queue.Full:
+            req_id, path, _, mode, _, _, _ = payload
+            self._finished(req_id, path, mode, "failed", {}, "queue full")
+
+    def _finished(self, req_id, path, mode, status, timings, error, shm_slot=None):
+        with self._lock:
+            key = self._req_keys.pop(req_id, None)
+            if key is not None and self._pending.get(key) == req_id:
+                del self._pending[key]
+            self._cancelled.discard(req_id)
+            self._counters[status if status in ('done', 'failed', 'cancelled') else 'failed'] += 1
+            self._done_times.append(time.time())
+            if timings:
+                self._timings.append(timings)
+        REGISTRY.inc("thumb_tasks_total", mode=mode, status=status)
+        if status == "failed":
+            REGISTRY.inc("thumb_failures_total", mode=mode, reason=failure_reason(error))
+        if timings:
+            # enqueue -> sent (pool_wait), sent -> done (rtt) plus the worker's own step timings
+            for k, v in timings.items():
+                if k.endswith("_ms") and isinstance(v, (int, float)):
+                    REGISTRY.observe("thumb_latency_ms", v, mode=mode, stage=k[:-3])
+            if 'pool_wait_ms' in timings and 'rtt_ms' in timings:
+                REGISTRY.observe("thumb_latency_ms", timings['pool_wait_ms'] + timings['rtt_ms'], mode=mode, stage="end_to_end")
+        if self.on_done:
+            try:
+                self.on_done({'id': req_id, 'path': path, 'mode': mode, 'status': status,
+                              'ok': status == "done", 'error': error, 'timings': timings, 'shm_slot': shm_slot})
+            except Exception:
+                logger.exception("on_done callback failed for %s", path)
+        elif shm_slot is not None:
+            self.release_shm(shm_slot)
+
+    def _bump(self, key, n=1):
+        with self._lock:
+            self._counters[key] += n
+        REGISTRY.inc(f"thumb_pool_{key}_total", n)
+
+    def _bump_restart(self, reason):
+        with self._lock:
+            self._restarts[reason] += 1
+        REGISTRY.inc("thumb_worker_restarts_total", reason=reason)
+
+    def metrics(self, window=60):
+        """Snapshot of counters, throughput (tasks/s over `window` seconds), median timings and per-worker stats."""
+        now = time.time()
+        with self._lock:
+            m = dict(self._counters)
+            recent = sum(1 for t in self._done_times if now - t <= window)
+            m['in_flight_or_queued'] = len(self._pending)
+            m['restarts'] = dict(self._restarts)
+            timings = list(self._timings)
+        m['queue_depth'] = self._queue.qsize()
+        m['throughput_per_s'] = round(recent / window, 3)
+        REGISTRY.sample("thumb_queue_depth", m['queue_depth'])
+        REGISTRY.set("thumb_in_flight_or_queued", m['in_flight_or_queued'])
+        REGISTRY.set("thumb_throughput_per_s", m['throughput_per_s'])
+        keys = sorted({k for t in timings for k in t})
+        m['median_ms'] = {k: round(statistics.median(t[k] for t in timings if k in t), 1) for k in keys}
+        m['workers'] = [{
+            'index': s.index, 'pid': s.proc.pid if s.proc else None, 'completed': s.completed,
+            'failed': s.failed, 'restarts': s.restarts, 'last_restart': s.last_restart,
+            'tasks_run': s.tasks_run, 'rss_mb': s.rss_mb,
+            'utilization': round(s.busy_s / max(1e-6, now - s.started_at), 3),
+            'storyboard_fps': round(s.frames / s.frame_s, 1) if s.frame_s else None,
+        } for s in self.slots]
+        for w in m['workers']:
+            REGISTRY.set("thumb_worker_utilization", w['utilization'], worker=w['index'])
+            if w['rss_mb'] is not None:
+                REGISTRY.set("thumb_worker_rss_mb", w['rss_mb'], worker=w['index'])
+        return m
+
+    def shutdown(self):
+        self._stopping = True
+        for _ in self.slots:
+            try:
+                self._queue.put_nowait((float('inf'), next(self._seq), None))
+            except Exception:
+                pass
+        for slot in self.slots:
+            try:
+                if slot.sock is not None:
+                    slot._send({"type": "quit"})
+            except Exception:
+                pass
+            slot.stop()
+        if self.shm is not None:
+            self.shm.close()
@@ -0,0 +1,99 @@
+"""Benchmark representative-frame scoring (app/util/frame_score.py).
+
+Run from repository root:
+
+python scripts/bench_frame_score.py
+python scripts/bench_frame_score.py F:/Thumbs --size 320x180   # real images (needs Qt)
+
+Without arguments a synthetic sample set is scored: black/fade/white frames,
+flat title cards, a logo on black and a few textured "scenes". Image files or
+folders (.jpg/.png) are decoded with QImage and converted to RV32 first.
+Each frame is timed with NumPy (if installed) and with the pure-Python
+fallback, and reported as kept (good) or rejected.
+"""
+import sys, time, random, statistics, argparse
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.util import frame_score
+from app.util.logger import setup_app_logger
+
+logger = setup_app_logger("BENCH_SCORE")
+
+
+def synth(w, h, f):
+    buf = bytearray(w * h * 4)
+    for y in range(h):
+        for x in range(w):
+            v = max(0, min(255, int(f(x, y))))
+            o = (y * w + x) * 4
+            buf[o] = buf[o + 1] = buf[o + 2] = v
+    return bytes(buf)
+
+
+def synthetic_set(w, h):
+    rnd = random.Random(1)
+    return {
+        "black": synth(w, h, lambda x, y: 4),
+        "fade": synth(w, h, lambda x, y: 12 + rnd.randint(0, 6)),
+        "white": synth(w, h, lambda x, y: 250),
+        "title card": synth(w, h, lambda x, y: 200 if h // 3 < y < h // 3 + 8 else 40),
+        "logo on black": synth(w, h, lambda x, y: 240 if abs(x - w / 2) < w / 10 and abs(y - h / 2) < h / 8 else 8),
+        "scene (gradient)": synth(w, h, lambda x, y: 60 + 120 * x / w + rnd.randint(-10, 10)),
+        "scene (texture)": synth(w, h, lambda x, y: 90 + 50 * ((x // 12 + y // 9) % 2) + rnd.randint(0, 40)),
+        "scene (dark)": synth(w, h, lambda x, y: 35 + 30 * ((x // 25) % 2) + rnd.randint(0, 20)),
+    }
+
+
+def image_set(args, w, h):
+    from qtpy.QtGui import QImage
+    from qtpy.QtCore import Qt
+    files = []
+    for a in args:
+        p = Path(a)
+        files.extend(sorted(f for f in p.rglob("*") if f.suffix.lower() in ('.jpg', '.jpeg', '.png')) if p.is_dir() else [p])
+    frames = {}
+    for f in files:
+        img = QImage(str(f))
+        if img.isNull():
+            continue
+        img = img.scaled(w, h, Qt.IgnoreAspectRatio, Qt.SmoothTransformation).convertToFormat(QImage.Format_RGB32)
+        frames[f.name] = bytes(img.constBits())
+    return frames
+
+
+def time_score(buf, w, h, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        value = frame_score.score_frame(buf, w, h)
+        times.append((time.perf_counter() - t0) * 1000)
+    return value, statistics.median(times)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("paths", nargs="*")
+    ap.add_argument("--size", default="320x180")
+    ap.add_argument("--repeat", type=int, default=20)
+    a = ap.parse_args()
+    w, h = map(int, a.size.split("x"))
+    frames = image_set(a.paths, w, h) if a.paths else synthetic_set(w, h)
+    modes = [("numpy", frame_score.np)] if frame_score.np is not None else []
+    modes.append(("python", None))
+    numpy_mod, budget = frame_score.np, frame_score.SAMPLE_BUDGET
+    for name, mod in modes:
+        frame_score.np = mod
+        frame_score.SAMPLE_BUDGET = budget if mod is not None else 1200
+        total = []
+        logger.info("--- %s scoring, %d frames at %dx%d ---", name, len(frames), w, h)
+        for label, buf in frames.items():
+            value, ms = time_score(buf, w, h, a.repeat)
+            total.append(ms)
+            logger.info("%-20s score %7.1f  %-8s %.3f ms", label, value,
+                        "keep" if frame_score.is_good(value) else "reject", ms)
+        logger.info("%s: median %.3f ms, max %.3f ms per frame", name, statistics.median(total), max(total))
+    frame_score.np, frame_score.SAMPLE_BUDGET = numpy_mod, budget
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Microbenchmark of worker IPC round-trip time (framed JSON over localhost TCP).
+
+Run from repository root:
+
+python scripts/bench_ipc_rtt.py -n 5000
+python scripts/bench_ipc_rtt.py -n 500 --worker   # against a real app/util/worker.py process
+
+Without `--worker` an in-process echo server answers `ping` with `pong` and
+`req` with an immediate `done`, so the numbers are pure protocol overhead.
+With `--worker` pings go to a real thumbnail worker (requires python-vlc).
+"""
+import sys, time, socket, threading, statistics, subprocess, argparse
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from app.util.ipc import send_msg, recv_msg
+from app.util.logger import setup_app_logger
+
+logger = setup_app_logger("BENCH_IPC")
+
+
+def echo_server(srv):
+    conn, _ = srv.accept()
+    with conn:
+        while True:
+            msg = recv_msg(conn)
+            if msg is None or msg.get("type") == "quit":
+                break
+            if msg["type"] == "ping":
+                send_msg(conn, {"type": "pong", "id": msg["id"], "t": msg["t"]})
+            elif msg["type"] == "req":
+                send_msg(conn, {"type": "done", "id": msg["id"], "status": "done", "ok": True,
+                                "error": None, "timings": {"queue_ms": 0, "work_ms": 0}})
+
+
+def connect(port, timeout=10):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return socket.create_connection(("127.0.0.1", port), timeout=3)
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def measure(sock, n, kind):
+    rtts = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        if kind == "ping":
+            send_msg(sock, {"type": "ping", "id": i, "t": t0})
+        else:
+            send_msg(sock, {"type": "req", "id": i, "path": f"C:/Videos/Show | Part {i}.mkv",
+                            "preview": 120, "mode": "thumb", "priority": 1})
+        recv_msg(sock)
+        rtts.append((time.perf_counter() - t0) * 1e6)
+    rtts.sort()
+    return {"mean_us": statistics.fmean(rtts), "p50_us": rtts[len(rtts) // 2],
+            "p99_us": rtts[int(len(rtts) * 0.99) - 1], "msgs_per_s": n / (sum(rtts) / 1e6)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=2000, help="round trips per measurement")
+    ap.add_argument("--worker", action="store_true", help="ping a real worker process instead of an echo thread")
+    opts = ap.parse_args()
+    proc = None
+    if opts.worker:
+        s = socket.socket()
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+        s.close()
+        proc = subprocess.Popen([sys.executable, str(ROOT / "app" / "util" / "worker.py"), f"--ipc-port={port}"], cwd=ROOT)
+        kinds = ["ping"]
+    else:
+        srv = socket.socket()
+        srv.bind(("127.0.0.1", 0))
+        srv.listen(1)
+        port = srv.getsockname()[1]
+        threading.Thread(target=echo_server, args=(srv,), daemon=True).start()
+        kinds = ["ping", "req"]
+    sock = connect(port)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    try:
+        for kind in kinds:
+            r = measure(sock, opts.n, kind)
+            logger.info("%s x%d: mean %.0f us, p50 %.0f us, p99 %.0f us, %.0f msgs/s (old line protocol slept 50000 us per send)",
+                        kind, opts.n, r["mean_us"], r["p50_us"], r["p99_us"], r["msgs_per_s"])
+        send_msg(sock, {"type": "quit"})
+    finally:
+        sock.close()
+        if proc:
+            proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# Widget tests need no display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# App loggers write app_debug*.log and MetadataDB defaults to metadata.db in the
+# working directory; keep test runs out of the source tree.
+os.chdir(tempfile.mkdtemp(prefix="vibe-tests-"))
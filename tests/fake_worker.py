@@ -0,0 +1,53 @@
+"""Stand-in for app/util/worker.py speaking the framed IPC protocol, for pool tests.
+
+File names control the behaviour: a path containing "crash-once" kills the process
+the first time it is seen (a marker file next to it remembers that), "fail"
+replies with a failed status, "hang" goes silent without heartbeats, "slow"
+keeps sending heartbeats but never finishes, "fat" succeeds but reports a
+large RSS, anything else succeeds at once. Every request appends the worker's
+pid to <path>.seen, so tests can count attempts and tell processes apart.
+"""
+import os
+import sys
+import time
+import socket
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.util.ipc import send_msg, recv_msg  # noqa: E402
+
+
+def main():
+    port = int(sys.argv[1].split("=", 1)[1])
+    srv = socket.socket()
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind(("127.0.0.1", port))
+    srv.listen(1)
+    conn, _ = srv.accept()
+    while True:
+        msg = recv_msg(conn)
+        if msg is None or msg["type"] == "quit":
+            return
+        if msg["type"] != "req":
+            continue
+        path = msg["path"]
+        name = os.path.basename(path)
+        with open(path + ".seen", "a") as f:
+            f.write(f"{os.getpid()}\n")
+        if "crash-once" in name and not os.path.exists(path + ".crashed"):
+            open(path + ".crashed", "w").close()
+            os._exit(1)
+        if "hang" in name:
+            time.sleep(60)
+        if "slow" in name:
+            for _ in range(600):
+                send_msg(conn, {"type": "hb", "id": msg["id"], "rss_mb": 10})
+                time.sleep(0.1)
+        ok = "fail" not in name
+        send_msg(conn, {"type": "done", "id": msg["id"], "status": "done" if ok else "failed", "ok": ok,
+                        "error": None if ok else "no video track", "timings": {"work_ms": 1},
+                        "rss_mb": 10000 if "fat" in name else 10})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import sqlite3
+from pathlib import PureWindowsPath
+
+import pytest
+
+from app.util import file_identity, metadata_db
+from app.util.file_identity import CHUNK, relink_moved
+from app.util.metadata_db import MetadataDB
+from app.util.thumb_store import ThumbStore
+
+
+@pytest.fixture
+def db(tmp_path):
+    return MetadataDB(str(tmp_path / "metadata.db"))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ThumbStore(tmp_path / "thumbs.db")
+    monkeypatch.setattr(file_identity, "get_store", lambda: store)
+    return store
+
+
+def test_identity_covers_size_head_and_tail(tmp_path):
+    a, b = tmp_path / "a.mkv", tmp_path / "b.mkv"
+    body = bytearray(b"x" * (3 * CHUNK))
+    a.write_bytes(body)
+    body[CHUNK + 10] = ord("y")  # the unhashed middle
+    b.write_bytes(body)
+    assert file_identity.file_identity(a) == file_identity.file_identity(b)
+    body[-1] = ord("y")
+    b.write_bytes(body)
+    assert file_identity.file_identity(a) != file_identity.file_identity(b)
+    b.write_bytes(bytes(body) + b"x")
+    assert file_identity.file_identity(b)[0] == 3 * CHUNK + 1
+
+
+def test_small_and_empty_files_have_identities(tmp_path):
+    empty, small = tmp_path / "empty.mkv", tmp_path / "small.mkv"
+    empty.write_bytes(b"")
+    small.write_bytes(b"abc")
+    assert file_identity.file_identity(empty)[0] == 0
+    assert file_identity.file_identity(small) != file_identity.file_identity(empty)
+
+
+def test_moved_file_is_relinked(tmp_path, db, store):
+    old = tmp_path / "a.mkv"
+    old.write_bytes(b"video")
+    assert relink_moved(db, old) is None
+    db.add_video(old.as_posix(), title="A", episode_id=7)
+    store.put(old.as_posix(), b"jpeg")
+    new = tmp_path / "moved" / "a.mkv"
+    new.parent.mkdir()
+    old.rename(new)
+    assert relink_moved(db, new) == old.as_posix()
+    assert db.get_video(old.as_posix()) is None
+    assert db.get_video(new.as_posix())[2] == "A"
+    assert store.get(new.as_posix()) == b"jpeg"
+
+
+def test_copy_is_not_relinked(tmp_path, db, store):
+    a, b = tmp_path / "a.mkv", tmp_path / "b.mkv"
+    a.write_bytes(b"video")
+    b.write_bytes(b"video")
+    relink_moved(db, a)
+    assert relink_moved(db, b) is None
+    assert db.find_identical_videos(a.as_posix()) == [b.as_posix()]
+
+
+def test_backslash_paths_are_normalised_once(tmp_path, monkeypatch):
+    path = str(tmp_path / "metadata.db")
+    MetadataDB(path)
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO videos (path, title, episode_id) VALUES ('F:\\Shows\\a.mkv', 'A', 3)")
+        conn.execute("INSERT INTO videos (path, file_size, content_hash) VALUES ('F:/Shows/a.mkv', 10, 'h')")
+        conn.execute("INSERT INTO videos (path) VALUES ('F:\\Shows\\b.mkv')")
+        conn.execute("INSERT INTO media_info (path, duration_ms) VALUES ('F:\\Shows\\b.mkv', 1000)")
+        conn.execute("PRAGMA user_version = 0")
+    monkeypatch.setattr(metadata_db, "Path", PureWindowsPath)  # backslashes are separators on Windows only
+    db = MetadataDB(path)
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT path, title, episode_id, file_size, content_hash FROM videos ORDER BY path").fetchall()
+    assert rows == [("F:/Shows/a.mkv", "A", 3, 10, "h"), ("F:/Shows/b.mkv", None, None, None, None)]
+    assert db.get_media_info("F:/Shows/b.mkv") is not None
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO videos (path) VALUES ('F:\\Shows\\c.mkv')")
+    MetadataDB(path)  # already migrated
+    assert db.get_video("F:\\Shows\\c.mkv") is not None
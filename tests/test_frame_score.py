@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+from app.util import frame_score
+from app.util.frame_score import is_good, luma_stats, score_frame
+
+W, H = 160, 90
+
+
+def frame(f, width=W, height=H, pitch=None):
+    pitch = pitch or width * 4
+    buf = bytearray(pitch * height)
+    for y in range(height):
+        for x in range(width):
+            v = max(0, min(255, int(f(x, y))))
+            o = y * pitch + x * 4
+            buf[o] = buf[o + 1] = buf[o + 2] = v
+    return bytes(buf)
+
+
+rnd = random.Random(3)
+BLACK = frame(lambda x, y: 4)
+WHITE = frame(lambda x, y: 250)
+FLAT = frame(lambda x, y: 120)
+SCENE = frame(lambda x, y: 90 + 50 * ((x // 12 + y // 9) % 2) + rnd.randint(0, 40))
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        if frame_score.np is None:
+            pytest.skip("numpy not installed")
+    else:
+        monkeypatch.setattr(frame_score, "np", None)
+        monkeypatch.setattr(frame_score, "SAMPLE_BUDGET", 1200)
+    return request.param
+
+
+def test_stats_of_a_flat_frame(backend):
+    mean, std, edge = luma_stats(FLAT, W, H)
+    assert mean == pytest.approx(120, abs=0.5)
+    assert std == pytest.approx(0, abs=1e-6) and edge == pytest.approx(0, abs=1e-6)
+
+
+@pytest.mark.parametrize("buf", [BLACK, WHITE, FLAT], ids=["black", "white", "flat"])
+def test_blank_frames_are_rejected(backend, buf):
+    assert not is_good(score_frame(buf, W, H))
+
+
+def test_textured_scene_is_kept(backend):
+    assert is_good(score_frame(SCENE, W, H))
+    assert score_frame(SCENE, W, H) > score_frame(FLAT, W, H)
+
+
+def test_row_padding_is_ignored(backend):
+    padded = frame(lambda x, y: 90 + 50 * ((x // 12 + y // 9) % 2), pitch=W * 4 + 64)
+    plain = frame(lambda x, y: 90 + 50 * ((x // 12 + y // 9) % 2))
+    assert score_frame(padded, W, H, W * 4 + 64) == pytest.approx(score_frame(plain, W, H))
+
+
+def test_backends_make_the_same_decision():
+    # The pure-Python path samples a coarser grid, so scores differ; keep/reject must not
+    if frame_score.np is None:
+        pytest.skip("numpy not installed")
+    frames = [BLACK, WHITE, FLAT, SCENE]
+    fast = [is_good(score_frame(f, W, H)) for f in frames]
+    np_mod, budget = frame_score.np, frame_score.SAMPLE_BUDGET
+    try:
+        frame_score.np, frame_score.SAMPLE_BUDGET = None, 1200
+        slow = [is_good(score_frame(f, W, H)) for f in frames]
+    finally:
+        frame_score.np, frame_score.SAMPLE_BUDGET = np_mod, budget
+    assert slow == fast == [False, False, False, True]
+
+
+class TestBetterTime:
+    @pytest.fixture
+    def worker(self, monkeypatch):
+        pytest.importorskip("vlc")
+        from app.util import worker
+        self.calls = []
+
+        def fake_find(inst, vpath, length, baseline, cancelled=None, stats=None):
+            self.calls.append((length, baseline))
+            return 4242
+
+        monkeypatch.setattr(worker, "find_better_frame", fake_find)
+        return worker
+
+    def test_good_frame_is_kept(self, worker):
+        stats = {}
+        assert worker._better_time(None, "/v/a.mkv", 60000, SCENE, W, H, None, None, stats) is None
+        assert self.calls == [] and is_good(stats["frame_score"])
+
+    def test_black_frame_searches_candidates(self, worker):
+        stats = {}
+        assert worker._better_time(None, "/v/a.mkv", 60000, BLACK, W, H, None, None, stats) == 4242
+        assert self.calls == [(60000, pytest.approx(stats["frame_score"], abs=0.1))]
+
+    def test_unknown_length_does_not_search(self, worker):
+        assert worker._better_time(None, "/v/a.mkv", 0, BLACK, W, H, None, None, None) is None
+        assert self.calls == []
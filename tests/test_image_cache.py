@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+pytest.importorskip("PySide6")
+pytest.importorskip("requests")
+from qtpy.QtGui import QImage  # noqa: E402
+
+from app.util import image_cache  # noqa: E402
+from app.util.image_cache import POSTER_SIZES, PosterCache  # noqa: E402
+from app.util.metadata_db import MetadataDB  # noqa: E402
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_cache, "CACHE_DIR", tmp_path / "posters")
+    cache = PosterCache(MetadataDB(str(tmp_path / "metadata.db")))
+    yield cache
+    cache._pool.shutdown(wait=True)
+
+
+def poster(tmp_path, name="poster.png"):
+    img = QImage(680, 1000, QImage.Format_RGB32)
+    img.fill(0xff336699)
+    path = tmp_path / name
+    img.save(str(path))
+    return str(path)
+
+
+def test_prefetch_builds_card_sized_variants(cache, tmp_path):
+    src = poster(tmp_path)
+    cache.prefetch([('show', src), ('episode', src), ('season', None), ('banner', src)])
+    cache._pool.shutdown(wait=True)
+    for kind in ('show', 'episode'):
+        img = QImage(cache.get(kind, src))
+        w, h = POSTER_SIZES[kind]
+        assert img.width() <= w and img.height() <= h and (img.width() == w or img.height() == h)
+    assert cache.get('season', src) is None
+
+
+def test_prefetch_skips_cached_variants(cache, tmp_path, monkeypatch):
+    src = poster(tmp_path)
+    cache.variant_path('show', src).write_bytes(b"cached")
+    monkeypatch.setattr(cache, "request", lambda *a: pytest.fail("cached variant rebuilt"))
+    cache.prefetch([('show', src)])
+
+
+def test_concurrent_evictions_stop_at_the_budget(cache):
+    for i in range(20):
+        path = image_cache.CACHE_DIR / f"show_{i}.jpg"
+        path.write_bytes(b"\0" * 1000)
+        cache.db.add_cached_image(str(path), 'show', 1000, i)
+    cache.budget_bytes = 5000
+    threads = [threading.Thread(target=cache._evict) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert cache.db.get_image_cache_usage() == 5000
+    assert sorted(p.name for p in image_cache.CACHE_DIR.iterdir()) == sorted(f"show_{i}.jpg" for i in range(15, 20))
+
+
+def test_scanner_prefetches_artwork_when_storing_a_show(tmp_path, monkeypatch):
+    from app.util import robust_scanner
+    seasons = [{'id': 11, 'number': 1, 'image': {'medium': "http://img/s1.jpg"}}]
+    episodes = [{'number': 1, 'name': "Pilot", 'image': {'medium': "http://img/e1.jpg"}}, {'number': 2, 'name': "Two"}]
+    monkeypatch.setattr(robust_scanner.TVMazeAPI, "get_show_seasons", staticmethod(lambda show_id: seasons))
+    monkeypatch.setattr(robust_scanner.TVMazeAPI, "get_season_episodes", staticmethod(lambda season_id: episodes))
+
+    class Recorder:
+        def prefetch(self, items):
+            self.items = list(items)
+
+    recorder = Recorder()
+    scanner = robust_scanner.RobustMetadataScanner(MetadataDB(str(tmp_path / "metadata.db")), poster_cache=recorder)
+    scanner._api_delay = 0
+    scanner._store_show_metadata({'tvmaze_id': 1, 'name': "Show", 'image_url': "http://img/show.jpg"})
+    assert recorder.items == [('show', "http://img/show.jpg"), ('season', "http://img/s1.jpg"),
+                              ('episode', "http://img/e1.jpg"), ('episode', None)]
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+pytest.importorskip("PySide6")
+from qtpy.QtCore import QBuffer, QByteArray, QIODevice  # noqa: E402
+from qtpy.QtGui import QImage  # noqa: E402
+from qtpy.QtWidgets import QApplication  # noqa: E402
+
+from app.ui import image_decoder  # noqa: E402
+from app.ui.image_decoder import ImageDecoder  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def decoder(qapp):
+    decoder = ImageDecoder()
+    yield decoder
+    decoder.shutdown()
+
+
+def jpeg(w=64, h=36):
+    img = QImage(w, h, QImage.Format_RGB32)
+    img.fill(0xff808080)
+    data = QByteArray()
+    buf = QBuffer(data)
+    buf.open(QIODevice.WriteOnly)
+    img.save(buf, "JPG")
+    return bytes(data)
+
+
+def run_until(qapp, done, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        qapp.processEvents()
+        if done():
+            return
+        threading.Event().wait(0.01)
+    pytest.fail("decoder did not deliver in time")
+
+
+def test_callbacks_run_on_the_gui_thread(qapp, decoder, tmp_path):
+    path = tmp_path / "poster.jpg"
+    path.write_bytes(jpeg(96, 54))
+    got = []
+
+    def on_pixmap(pixmap):
+        got.append((pixmap.width(), pixmap.height(), threading.current_thread() is threading.main_thread()))
+
+    decoder.decode(jpeg(), on_pixmap)
+    decoder.decode(str(path), on_pixmap)
+    run_until(qapp, lambda: len(got) == 2)
+    assert sorted(got) == [(64, 36, True), (96, 54, True)]
+
+
+def test_undecodable_images_are_counted_not_delivered(qapp, decoder):
+    decoder.decode(b"not a jpeg", lambda pixmap: pytest.fail("delivered a broken image"))
+    run_until(qapp, lambda: decoder.stats()['failed'] == 1)
+    assert decoder.stats()['delivered'] == 0
+
+
+def test_backlog_is_spread_over_several_iterations(qapp, decoder, monkeypatch):
+    monkeypatch.setattr(image_decoder, "FRAME_BUDGET_MS", 0)  # one pixmap per iteration
+    got = []
+    for _ in range(20):
+        decoder.decode(jpeg(), got.append)
+    run_until(qapp, lambda: len(got) == 20)
+    assert decoder.stats()['backlog'] == 0 and decoder.stats()['delivered'] == 20
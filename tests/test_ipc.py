@@ -0,0 +1,58 @@
+import socket
+
+import pytest
+
+from app.util.ipc import HEADER, MAX_FRAME, encode, recv_msg, send_msg
+
+
+@pytest.fixture
+def pair():
+    a, b = socket.socketpair()
+    yield a, b
+    a.close()
+    b.close()
+
+
+def test_round_trip_keeps_any_path_characters(pair):
+    a, b = pair
+    msg = {"type": "req", "id": 7, "path": "F:/Shows/A|B ünïcode 日本.mkv", "preview": 120, "mode": "thumb"}
+    send_msg(a, msg)
+    assert recv_msg(b) == msg
+
+
+def test_frame_is_length_prefixed():
+    frame = encode({"type": "ping", "id": 1})
+    (size,) = HEADER.unpack(frame[:HEADER.size])
+    assert size == len(frame) - HEADER.size
+
+
+def test_frames_split_across_reads_are_reassembled(pair):
+    a, b = pair
+    data = encode({"type": "ping", "id": 1}) + encode({"type": "ping", "id": 2})
+    for i in range(len(data)):
+        a.sendall(data[i:i + 1])
+    assert recv_msg(b)["id"] == 1
+    assert recv_msg(b)["id"] == 2
+
+
+def test_clean_eof_between_frames_returns_none(pair):
+    a, b = pair
+    send_msg(a, {"type": "quit"})
+    a.close()
+    assert recv_msg(b) == {"type": "quit"}
+    assert recv_msg(b) is None
+
+
+def test_eof_mid_frame_raises(pair):
+    a, b = pair
+    a.sendall(encode({"type": "ping", "id": 1})[:-2])
+    a.close()
+    with pytest.raises(ConnectionError):
+        recv_msg(b)
+
+
+def test_oversized_frame_is_rejected(pair):
+    a, b = pair
+    a.sendall(HEADER.pack(MAX_FRAME + 1))
+    with pytest.raises(ValueError):
+        recv_msg(b)
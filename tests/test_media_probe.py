@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+pytest.importorskip("vlc")
+from app.util.media_probe import ensure_probed, format_duration, fourcc, is_fresh, tracks  # noqa: E402
+from app.util.metadata_db import MetadataDB  # noqa: E402
+
+INFO = {'duration_ms': 1000, 'width': 1920, 'height': 1080, 'video_codec': "h264", 'audio_codec': "mp4a",
+        'audio_tracks': [{'codec': "mp4a", 'language': "en"}], 'subtitle_tracks': []}
+
+
+@pytest.mark.parametrize("ms, text", [
+    (None, "0:00"), (-5, "0:00"), (999, "0:00"), (61000, "1:01"), (3599999, "59:59"),
+    (3600000, "1:00:00"), (36061000, "10:01:01"),
+])
+def test_format_duration(ms, text):
+    assert format_duration(ms) == text
+
+
+def test_fourcc_and_track_columns():
+    assert fourcc(0x34363268) == "h264"
+    assert tracks(None) == [] and tracks("not json") == [] and tracks('[{"codec": "aac"}]') == [{'codec': "aac"}]
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "a.mkv"
+    path.write_bytes(b"\0" * 100)
+    return str(path)
+
+
+def stored(tmp_path, video):
+    db = MetadataDB(str(tmp_path / "metadata.db"))
+    st = os.stat(video)
+    db.set_media_info(video, dict(INFO, file_size=st.st_size, mtime=int(st.st_mtime)))
+    return db
+
+
+def test_row_is_fresh_until_the_file_changes(tmp_path, video):
+    db = stored(tmp_path, video)
+    assert is_fresh(db.get_media_info(video), video)
+    st = os.stat(video)
+    os.utime(video, (st.st_atime, st.st_mtime + 60))
+    assert not is_fresh(db.get_media_info(video), video)
+    assert not is_fresh(None, video)
+    os.remove(video)
+    assert not is_fresh(db.get_media_info(video), video)
+
+
+def test_fresh_row_is_used_without_probing(tmp_path, video):
+    db = stored(tmp_path, video)
+    assert ensure_probed(None, db, video)[3] == 1000  # inst=None: libvlc is never touched
@@ -0,0 +1,63 @@
+import sqlite3
+from app.util.metadata_db import MetadataDB, same_file_key
+
+
+def make_db(tmp_path):
+    return MetadataDB(str(tmp_path / "metadata.db"))
+
+
+def test_identity_rows_use_posix_paths(tmp_path):
+    db = make_db(tmp_path)
+    db.set_video_identity(tmp_path / "a.mkv", 10, "h")
+    db.set_video_identity((tmp_path / "a.mkv").as_posix(), 10, "h")
+    assert len(db.find_videos_by_identity(10, "h")) == 1
+
+
+def test_identical_videos_are_grouped(tmp_path):
+    db = make_db(tmp_path)
+    db.set_video_identity("/lib/a.mkv", 10, "h")
+    db.set_video_identity("/backup/a.mkv", 10, "h")
+    db.set_video_identity("/lib/other.mkv", 11, "h")
+    groups = [g for g in db.get_duplicate_groups() if g['reason'] == 'identical']
+    assert [g['paths'] for g in groups] == [["/backup/a.mkv", "/lib/a.mkv"]]
+    assert db.find_identical_videos("/lib/a.mkv") == ["/backup/a.mkv"]
+
+
+def test_aliases_of_one_file_are_not_duplicates(tmp_path):
+    db = make_db(tmp_path)
+    db.set_video_identity("/lib/a.mkv", 10, "h")
+    db.add_video("/lib/./a.mkv")  # a legacy, non-normalised spelling of the same file
+    with sqlite3.connect(db.db_path) as conn:
+        conn.execute("UPDATE videos SET file_size = 10, content_hash = 'h' WHERE path = '/lib/./a.mkv'")
+    assert same_file_key("/lib/./a.mkv") == same_file_key("/lib/a.mkv")
+    assert db.find_identical_videos("/lib/a.mkv") == []
+    assert [g for g in db.get_duplicate_groups() if g['reason'] == 'identical'] == []
+
+
+def _episode(db, season_number, episode_number, name):
+    db.add_show(1, "Show")
+    show_id = db.get_show(1)[0]
+    db.add_season(show_id, season_number)
+    with sqlite3.connect(db.db_path) as conn:
+        season_id = conn.execute("SELECT id FROM seasons WHERE show_id = ? AND season_number IS ?",
+                                 (show_id, season_number)).fetchone()[0]
+    db.add_episode(season_id, episode_number, name)
+    with sqlite3.connect(db.db_path) as conn:
+        return conn.execute("SELECT id FROM episodes WHERE season_id = ?", (season_id,)).fetchone()[0]
+
+
+def test_episode_duplicates_are_labelled(tmp_path):
+    db = make_db(tmp_path)
+    episode_id = _episode(db, 2, 5, "Pilot")
+    db.add_video("/lib/a.mkv", episode_id=episode_id)
+    db.add_video("/backup/a.mkv", episode_id=episode_id)
+    assert [(g['label'], g['paths']) for g in db.get_duplicate_groups()] == [
+        ("Show - S02E05 Pilot", ["/backup/a.mkv", "/lib/a.mkv"])]
+
+
+def test_specials_without_numbers_are_labelled(tmp_path):
+    db = make_db(tmp_path)
+    episode_id = _episode(db, None, None, "Christmas Special")
+    db.add_video("/lib/special.mkv", episode_id=episode_id)
+    db.add_video("/backup/special.mkv", episode_id=episode_id)
+    assert [g['label'] for g in db.get_duplicate_groups()] == ["Show - S??E?? Christmas Special"]
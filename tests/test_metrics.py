@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from app.util.metrics import PREFIX, Histogram, MetricsRegistry
+
+
+@pytest.fixture
+def reg():
+    r = MetricsRegistry()
+    r.inc("thumb_tasks_total", mode="thumb", status="done")
+    r.inc("thumb_tasks_total", 2, mode="thumb", status="done")
+    r.inc("thumb_tasks_total", mode="probe", status="failed")
+    r.set("pixmap_cache_mb", 12.5)
+    for v in (3, 7, 40, 400):
+        r.observe("thumb_latency_ms", v, stage="rtt")
+    r.sample("thumb_queue_depth", 4)
+    r.sample("thumb_queue_depth", 6)
+    return r
+
+
+def test_counters_are_per_label_set(reg):
+    assert reg.counter("thumb_tasks_total", mode="thumb", status="done") == 3
+    assert reg.counter("thumb_tasks_total", status="failed", mode="probe") == 1
+    assert reg.counter("thumb_tasks_total", mode="storyboard", status="done") == 0
+
+
+def test_histogram_summary(reg):
+    s = reg.histogram("thumb_latency_ms", stage="rtt")
+    assert (s['count'], s['sum'], s['mean']) == (4, 450, 112.5)
+    assert 5 <= s['p50'] <= 10
+    assert reg.histogram("thumb_latency_ms", stage="missing") is None
+
+
+def test_quantiles_interpolate_within_buckets():
+    h = Histogram(buckets=(10, 20))
+    for v in (12, 14, 16, 18):
+        h.observe(v)
+    assert h.quantile(0.5) == pytest.approx(15)
+    assert Histogram().quantile(0.5) is None
+
+
+def test_json_snapshot(reg):
+    snap = json.loads(reg.to_json())
+    assert snap['counters']["thumb_tasks_total{mode=thumb,status=done}"] == 3
+    assert snap['gauges']["thumb_queue_depth"] == 6
+    assert [v for _, v in snap['series']["thumb_queue_depth"]] == [4, 6]
+    assert snap['histograms']["thumb_latency_ms{stage=rtt}"]['count'] == 4
+
+
+def test_prometheus_text(reg):
+    lines = reg.to_prometheus().splitlines()
+    assert f"# TYPE {PREFIX}thumb_tasks_total counter" in lines
+    assert lines.count(f"# TYPE {PREFIX}thumb_tasks_total counter") == 1
+    assert f'{PREFIX}thumb_tasks_total{{mode="thumb",status="done"}} 3' in lines
+    assert f"{PREFIX}pixmap_cache_mb 12.5" in lines
+    assert f"# TYPE {PREFIX}thumb_latency_ms histogram" in lines
+    buckets = [ln for ln in lines if ln.startswith(f"{PREFIX}thumb_latency_ms_bucket")]
+    counts = [int(ln.rsplit(" ", 1)[1]) for ln in buckets]
+    assert counts == sorted(counts) and counts[-1] == 4
+    assert buckets[-1].startswith(f'{PREFIX}thumb_latency_ms_bucket{{stage="rtt",le="+Inf"}}')
+    assert f'{PREFIX}thumb_latency_ms_count{{stage="rtt"}} 4' in lines
+
+
+def test_label_values_cannot_break_the_format():
+    r = MetricsRegistry()
+    r.inc("thumb_failures_total", reason='bad "codec"')
+    assert "{reason=\"bad 'codec'\"}" in r.to_prometheus()
+
+
+def test_dump_picks_format_by_suffix(reg, tmp_path):
+    reg.dump(tmp_path / "m.prom")
+    reg.dump(tmp_path / "m.json")
+    assert (tmp_path / "m.prom").read_text().startswith("# TYPE")
+    assert json.loads((tmp_path / "m.json").read_text())['gauges']["pixmap_cache_mb"] == 12.5
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_reset(reg):
+    reg.reset()
+    assert reg.snapshot()['counters'] == {} and reg.to_prometheus() == "\n"
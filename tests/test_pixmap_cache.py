@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("PySide6")
+from qtpy.QtCore import QSize  # noqa: E402
+from qtpy.QtGui import QImage  # noqa: E402
+
+from app.ui.pixmap_cache import ScaledPixmapCache  # noqa: E402
+
+SIZE = QSize(320, 180)
+ENTRY_BYTES = 320 * 180 * 4
+
+
+def image(color=0xff202020):
+    # QImage has the QPixmap API the cache uses and needs no QGuiApplication
+    img = QImage(640, 360, QImage.Format_RGB32)
+    img.fill(color)
+    return img
+
+
+def test_hit_returns_the_cached_scale():
+    cache = ScaledPixmapCache(budget_mb=1)
+    src = image()
+    first = cache.scaled("/v/a.mkv", src, SIZE)
+    assert (first.width(), first.height()) == (320, 180)
+    assert cache.scaled("/v/a.mkv", src, SIZE).cacheKey() == first.cacheKey()
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_new_source_or_size_misses():
+    cache = ScaledPixmapCache(budget_mb=1)
+    src = image()
+    cache.scaled("/v/a.mkv", src, SIZE)
+    cache.scaled("/v/a.mkv", image(0xff404040), SIZE)
+    cache.scaled("/v/a.mkv", src, QSize(160, 90))
+    assert cache.misses == 3
+
+
+def test_least_recently_used_is_evicted_over_budget():
+    cache = ScaledPixmapCache(budget_mb=1)  # room for 4 entries of 320x180x4 bytes
+    srcs = [image() for _ in range(5)]
+    for i, src in enumerate(srcs[:4]):
+        cache.scaled(f"/v/{i}.mkv", src, SIZE)
+    cache.scaled("/v/0.mkv", srcs[0], SIZE)  # touch 0 so 1 is the oldest
+    cache.scaled("/v/4.mkv", srcs[4], SIZE)
+    assert cache.evictions == 1
+    assert cache.bytes == 4 * ENTRY_BYTES <= cache.budget_bytes
+    hits = cache.hits
+    cache.scaled("/v/0.mkv", srcs[0], SIZE)
+    assert cache.hits == hits + 1
+    cache.scaled("/v/1.mkv", srcs[1], SIZE)
+    assert cache.hits == hits + 1  # 1 was evicted
+
+
+def test_oversized_entries_are_not_cached():
+    cache = ScaledPixmapCache(budget_mb=0)
+    cache.scaled("/v/a.mkv", image(), SIZE)
+    assert cache.stats()['entries'] == 0 and cache.bytes == 0
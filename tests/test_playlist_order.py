@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("PySide6")
+pytest.importorskip("vlc")  # main_window pulls in media_probe
+pytest.importorskip("requests")  # and the TVmaze client
+from app.ui import main_window  # noqa: E402
+
+next_index = main_window.MainWindow._next_index
+
+
+def window(count, row, repeat_mode='none', shuffle=False):
+    plist = SimpleNamespace(count=lambda: count, currentRow=lambda: row)
+    return SimpleNamespace(plist=plist, repeat_mode=repeat_mode, shuffle=shuffle, _shuffle_next=None)
+
+
+def test_empty_playlist_has_no_next():
+    assert next_index(window(0, -1)) is None
+
+
+def test_advances_and_stops_at_the_end():
+    assert next_index(window(3, 0)) == 1
+    assert next_index(window(3, 2)) is None
+
+
+def test_repeat_all_wraps():
+    assert next_index(window(3, 2, 'all')) == 0
+
+
+def test_repeat_one_replays_the_current_item():
+    assert next_index(window(3, 1, 'one')) == 1
+    assert next_index(window(3, 2, 'one', shuffle=True)) == 2
+
+
+def test_shuffle_pick_is_fixed_until_reset(monkeypatch):
+    picks = iter([2, 0])
+    monkeypatch.setattr(main_window.random, "randint", lambda a, b: next(picks))
+    w = window(3, 1, shuffle=True)
+    assert next_index(w) == 2
+    assert next_index(w) == 2  # the preloaded pick is the one that plays
+    w._shuffle_next = None
+    assert next_index(w) == 0
+
+
+def test_stale_shuffle_pick_is_replaced(monkeypatch):
+    monkeypatch.setattr(main_window.random, "randint", lambda a, b: 1)
+    w = window(2, 0, shuffle=True)
+    w._shuffle_next = 5  # the playlist shrank since it was picked
+    assert next_index(w) == 1
@@ -0,0 +1,77 @@
+import functools
+import time
+from pathlib import Path
+
+import pytest
+
+from app.util import prebuild, storyboard, thumb_store
+from app.util.thumb_store import GIVE_UP_ATTEMPTS, ThumbStore
+from app.util.worker_pool import ThumbWorkerPool
+
+FAKE_WORKER = Path(__file__).with_name("fake_worker.py")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ThumbStore(tmp_path / "thumbs.db")
+    monkeypatch.setattr(prebuild, "get_store", lambda: store)
+    monkeypatch.setattr(storyboard, "STORYBOARD_DIR", tmp_path / "storyboards")
+    storyboard.STORYBOARD_DIR.mkdir()
+    return store
+
+
+@pytest.fixture
+def library(tmp_path):
+    root = tmp_path / "library"
+    for rel in ("b/2.mkv", "b/1.MP4", "a/3.avi", "a/notes.txt", "c.mkv"):
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_bytes(b"\0" * 100)
+    return root
+
+
+def test_walk_is_stable_and_filters_extensions(library):
+    names = [p[len(library.as_posix()) + 1:] for p in prebuild.walk_videos([library])]
+    assert names == ["c.mkv", "a/3.avi", "b/1.MP4", "b/2.mkv"]
+
+
+def test_plan_skips_built_and_backing_off_files(store, library, monkeypatch):
+    built, failing, given_up, retry_due = [(library / n).as_posix() for n in ("c.mkv", "a/3.avi", "b/1.MP4", "b/2.mkv")]
+    store.put(built, b"jpeg")
+    store.record_failure(failing, "corrupt")
+    for _ in range(GIVE_UP_ATTEMPTS):
+        store.record_failure(given_up, "corrupt")
+    an_hour_ago = time.time() - 3600
+    with monkeypatch.context() as m:
+        m.setattr(thumb_store.time, "time", lambda: an_hour_ago)
+        store.record_failure(retry_due, "timeout")  # its backoff has run out since
+    tasks, skipped = prebuild.plan(prebuild.walk_videos([library]))
+    assert tasks == [(retry_due, "thumb")] and skipped == 3
+    tasks, skipped = prebuild.plan(prebuild.walk_videos([library]), retry_failed=True)
+    assert [p for p, _ in tasks] == [failing, given_up, retry_due] and skipped == 1
+
+
+def test_plan_skips_up_to_date_storyboards(store, library):
+    video = (library / "c.mkv").as_posix()
+    store.put(video, b"jpeg")
+    sheet, _ = storyboard.storyboard_paths(video)
+    sheet.write_bytes(b"jpeg")
+    storyboard.write_index(video, {})
+    tasks, skipped = prebuild.plan([video], storyboards=True)
+    assert (tasks, skipped) == ([], 2)
+    with open(video, "ab") as f:
+        f.write(b"changed")
+    tasks, _ = prebuild.plan([video], storyboards=True)
+    assert tasks == [(video, "thumb"), (video, "storyboard")]
+
+
+def test_failures_are_recorded_so_a_rerun_skips_them(store, tmp_path, monkeypatch):
+    root = tmp_path / "library"
+    root.mkdir()
+    for name in ("good.mkv", "fail.mkv"):
+        (root / name).write_bytes(b"\0" * 100)
+    monkeypatch.setattr(prebuild.config, "load", lambda: {"folders": [], "preview_start": 120, "thumb_workers": 1})
+    monkeypatch.setattr(prebuild, "ThumbWorkerPool", functools.partial(ThumbWorkerPool, worker_script=FAKE_WORKER))
+    assert prebuild.prebuild([str(root)]) == {'done': 1, 'failed': 1, 'skipped': 0}
+    tasks, skipped = prebuild.plan(prebuild.walk_videos([root]))
+    assert tasks == [((root / "good.mkv").as_posix(), "thumb")]  # the fake worker stores no thumbnail
+    assert skipped == 1
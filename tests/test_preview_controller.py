@@ -0,0 +1,129 @@
+import logging
+import threading
+
+import pytest
+
+pytest.importorskip("vlc")
+pytest.importorskip("PySide6")
+from app.core import vlc_backend  # noqa: E402
+from app.core.vlc_backend import PreviewController  # noqa: E402
+from app.util.metrics import REGISTRY  # noqa: E402
+
+
+class FakeInstance:
+    def media_new(self, path):
+        return path
+
+
+class FakePreviewPlayer:
+    """Media named "slow*" never report a length; play() blocks while `gate` is closed."""
+
+    def __init__(self):
+        self.media = None
+        self.opened, self.seeks = [], []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.playing = threading.Event()
+        self.seeked = threading.Event()
+        self.stops = 0
+
+    def set_media(self, media):
+        self.media = media
+
+    def audio_set_mute(self, mute):
+        pass
+
+    def play(self):
+        self.opened.append(self.media)
+        self.playing.set()
+        self.gate.wait(5)
+
+    def get_length(self):
+        return 0 if self.media.startswith("slow") else 60000
+
+    def set_time(self, ms):
+        self.seeks.append((self.media, ms))
+        self.seeked.set()
+
+    def stop(self):
+        self.stops += 1
+
+
+@pytest.fixture
+def preview():
+    player = FakePreviewPlayer()
+    ctl = PreviewController(FakeInstance(), player, logging.getLogger("test"))
+    yield ctl, player
+    player.gate.set()
+    assert ctl.quit()
+
+
+def outcome(name):
+    return REGISTRY.counter("preview_requests_total", outcome=name)
+
+
+def wait_for(player, media):
+    for _ in range(100):
+        if (media, 120000) in player.seeks:
+            return
+        player.seeked.wait(0.05)
+        player.seeked.clear()
+    pytest.fail(f"{media} never started: {player.seeks}")
+
+
+def test_only_the_latest_queued_request_runs(preview):
+    ctl, player = preview
+    superseded = outcome("superseded")
+    player.gate.clear()
+    ctl.open("a.mkv", 120)
+    assert player.playing.wait(2)
+    ctl.open("b.mkv", 120)
+    ctl.open("c.mkv", 120)
+    player.gate.set()
+    wait_for(player, "c.mkv")
+    assert player.opened == ["a.mkv", "c.mkv"]
+    assert outcome("superseded") == superseded + 1
+
+
+def test_a_newer_request_cancels_an_open_in_progress(preview, monkeypatch):
+    monkeypatch.setattr(vlc_backend, "PREVIEW_OPEN_TIMEOUT", 10)
+    ctl, player = preview
+    cancelled = outcome("cancelled")
+    ctl.open("slow.mkv", 120)
+    assert player.playing.wait(2)
+    ctl.open("fast.mkv", 120)
+    wait_for(player, "fast.mkv")
+    assert [m for m, _ in player.seeks] == ["fast.mkv"]
+    assert outcome("cancelled") == cancelled + 1
+
+
+def test_seeks_anyway_when_the_length_never_arrives(preview, monkeypatch):
+    monkeypatch.setattr(vlc_backend, "PREVIEW_OPEN_TIMEOUT", 0.1)
+    ctl, player = preview
+    ctl.open("slow.mkv", 120)
+    wait_for(player, "slow.mkv")
+
+
+def test_stop_and_quit(preview):
+    ctl, player = preview
+    assert ctl.quit()  # never started
+    ctl.stop()
+    for _ in range(100):
+        if player.stops:
+            break
+        player.seeked.wait(0.01)
+    assert ctl.quit()
+    assert player.stops == 2  # each command stops the current preview first
+
+
+def test_quit_replaces_a_pending_stop(preview):
+    ctl, player = preview
+    player.gate.clear()
+    ctl.open("a.mkv", 120)
+    assert player.playing.wait(2)
+    ctl.stop()
+    ctl._post(("quit",))
+    player.gate.set()
+    ctl._thread.join(2)
+    assert not ctl._thread.is_alive()
+    assert player.stops == 2  # before "a.mkv" and before quitting; the stop itself never ran
@@ -0,0 +1,83 @@
+import pytest
+
+pytest.importorskip("PySide6")
+from qtpy.QtCore import QPoint  # noqa: E402
+from qtpy.QtGui import QColor, QImage, QPainter, QPixmap  # noqa: E402
+from qtpy.QtWidgets import QApplication  # noqa: E402
+
+from app.ui.seek_preview import SeekPreview  # noqa: E402
+from app.util import storyboard  # noqa: E402
+
+TILE_W, TILE_H, COLS = 16, 9, 2
+COLORS = [0xffff0000, 0xff00ff00, 0xff0000ff, 0xffffff00]
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def video(tmp_path, monkeypatch):
+    monkeypatch.setattr(storyboard, "STORYBOARD_DIR", tmp_path / "storyboards")
+    storyboard.STORYBOARD_DIR.mkdir()
+    path = tmp_path / "episode.mkv"
+    path.write_bytes(b"\0" * 1000)
+    return str(path)
+
+
+def build(video, times):
+    sheet = QImage(TILE_W * COLS, TILE_H * 2, QImage.Format_RGB32)
+    p = QPainter(sheet)
+    for i, color in enumerate(COLORS):
+        p.fillRect((i % COLS) * TILE_W, (i // COLS) * TILE_H, TILE_W, TILE_H, QColor.fromRgb(color))
+    p.end()
+    sheet.save(str(storyboard.storyboard_paths(video)[0]), "PNG")
+    storyboard.write_index(video, {"times_ms": times, "tile_w": TILE_W, "tile_h": TILE_H, "cols": COLS})
+
+
+def tile_color(preview):
+    return preview.img.pixmap().toImage().pixel(TILE_W // 2, TILE_H // 2)
+
+
+def test_nearest_captured_tile_is_shown(qapp, video):
+    build(video, [5000, -1, 25000, 35000])  # tile 1 was not captured
+    preview = SeekPreview()
+    assert preview.load(video) and preview.has_storyboard(video)
+    for t_ms, color in ((0, COLORS[0]), (14000, COLORS[0]), (16000, COLORS[2]), (31000, COLORS[3]),
+                        (99000, COLORS[3])):
+        preview.show_at(QPoint(100, 100), t_ms)
+        assert tile_color(preview) == color, t_ms
+    assert preview.time.text() == "1:39"
+    preview.clear()
+
+
+def test_missing_or_stale_storyboards_are_not_loaded(qapp, video):
+    preview = SeekPreview()
+    assert not preview.load(video)
+    build(video, [-1, -1])
+    assert not preview.load(video)  # nothing captured
+    build(video, [5000])
+    with open(video, "ab") as f:
+        f.write(b"changed")
+    assert not preview.load(video)
+
+
+def test_sheet_decoded_for_a_previous_video_is_ignored(qapp, video, tmp_path):
+    class Decoder:
+        def decode(self, source, callback):
+            self.pending = callback
+
+    other = tmp_path / "other.mkv"
+    other.write_bytes(b"\0" * 10)
+    build(video, [5000])
+    build(str(other), [5000])
+    decoder = Decoder()
+    preview = SeekPreview(decoder=decoder)
+    preview.load(video)
+    stale = decoder.pending
+    preview.load(str(other))
+    stale(QPixmap(str(storyboard.storyboard_paths(video)[0])))
+    assert not preview.has_storyboard(str(other))
+    decoder.pending(QPixmap(str(storyboard.storyboard_paths(str(other))[0])))
+    assert preview.has_storyboard(str(other))
@@ -0,0 +1,29 @@
+from app.util.shm_ring import ShmRing
+
+
+def test_slots_are_handed_out_once_until_released():
+    ring = ShmRing(slots=3, width=32, height=18)
+    try:
+        slots = {ring.acquire() for _ in range(3)}
+        assert slots == {0, 1, 2} and ring.acquire() is None
+        ring.release(1)
+        ring.release(1)
+        assert ring.acquire() == 1 and ring.acquire() is None
+    finally:
+        ring.close()
+
+
+def test_worker_side_sees_frames_written_into_a_slot():
+    owner = ShmRing(slots=2, width=32, height=18)
+    worker = ShmRing(name=owner.name, width=32, height=18)
+    try:
+        assert worker.slots == 2 and not worker.owner
+        frame = bytes(range(256)) * (owner.frame_bytes // 256)
+        worker.view(1)[:] = frame
+        assert bytes(owner.view(1)) == frame
+        assert bytes(owner.view(0)) == bytes(owner.frame_bytes)
+        assert worker.address(1) - worker.address(0) == owner.frame_bytes
+        assert worker.address(1) % 32 == worker.address(0) % 32
+    finally:
+        worker.close()
+        owner.close()
@@ -0,0 +1,141 @@
+import threading
+
+import pytest
+
+vlc = pytest.importorskip("vlc")
+from app.util import snapshot  # noqa: E402
+from app.util.snapshot import EventSnapshotter, SnapshotError  # noqa: E402
+
+EVENTS = {vlc.EventType.MediaPlayerLengthChanged: 'length', vlc.EventType.MediaPlayerVout: 'vout',
+          vlc.EventType.MediaPlayerPositionChanged: 'position', vlc.EventType.MediaPlayerSnapshotTaken: 'snapshot',
+          vlc.EventType.MediaPlayerEncounteredError: 'error'}
+
+
+class FakeInstance:
+    def media_new(self, path, *options):
+        return (path, options)
+
+
+class FakePlayer:
+    """Fires the libvlc events of a snapshot run; names in `withhold` never fire.
+
+    Like libvlc, a playing player keeps sending PositionChanged events.
+    """
+
+    def __init__(self, withhold=(), length=600000, lands_at=None):
+        self.withhold = set(withhold)
+        self.length = length
+        self.lands_at = lands_at  # where a seek actually ends up (default: the target)
+        self.handlers = {}
+        self.time = 0
+        self.calls = []
+        self.stopped = threading.Event()
+
+    def event_manager(self):
+        return self
+
+    def event_attach(self, etype, callback):
+        self.handlers[EVENTS[etype]] = callback
+
+    def fire(self, name):
+        if name not in self.withhold:
+            self.handlers[name](None)
+
+    def set_media(self, media):
+        self.calls.append(("set_media", media))
+        if media and media[1]:
+            self.time = round(float(media[1][0].split("=")[1]) * 1000)
+
+    def play(self):
+        self.fire('length')
+        self.fire('vout')
+        if 'error_on_play' in self.withhold:
+            self.handlers['error'](None)
+        self.stopped.clear()
+        threading.Thread(target=self._tick, daemon=True).start()
+
+    def _tick(self):
+        while not self.stopped.wait(0.02):
+            self.fire('position')
+
+    def get_length(self):
+        return self.length
+
+    def set_time(self, ms):
+        self.calls.append(("set_time", ms))
+        self.time = ms if self.lands_at is None else self.lands_at
+        self.fire('position')
+
+    def get_time(self):
+        return self.time
+
+    def video_take_snapshot(self, num, out_path, width, height):
+        self.calls.append(("snapshot", out_path, width, height))
+        self.fire('snapshot')
+        return 0
+
+    def stop(self):
+        self.stopped.set()
+        self.calls.append("stop")
+
+
+@pytest.fixture(autouse=True)
+def short_timeouts(monkeypatch):
+    monkeypatch.setattr(snapshot, "STEP_TIMEOUTS", dict.fromkeys(snapshot.STEP_TIMEOUTS, 0.2))
+
+
+def test_snapshot_at_a_known_time():
+    player = FakePlayer()
+    timings = EventSnapshotter(player).take(FakeInstance(), "a.mkv", "out.jpg", t_ms=90000)
+    assert set(timings) == {'vout_ms', 'seek_ms', 'snapshot_ms', 'total_ms'}
+    assert ("snapshot", "out.jpg", 320, 180) in player.calls
+    assert player.calls[-2:] == ["stop", ("set_media", None)]
+
+
+def test_snapshot_seeks_to_the_picked_time_once_the_length_is_known():
+    player = FakePlayer(length=100000)
+    timings = EventSnapshotter(player).take(FakeInstance(), "a.mkv", "out.jpg", pick=lambda n: n // 2)
+    assert ("set_time", 50000) in player.calls
+    assert 'length_ms' in timings
+
+
+@pytest.mark.parametrize("withhold, step", [
+    ('vout', 'vout'), ('snapshot', 'snapshot'), ('position', 'seek'),
+])
+def test_missing_event_fails_at_its_step(withhold, step):
+    player = FakePlayer(withhold={withhold})
+    with pytest.raises(SnapshotError) as err:
+        EventSnapshotter(player).take(FakeInstance(), "a.mkv", "out.jpg", t_ms=90000)
+    assert err.value.step == step
+    assert "no event within 0.2 s" in str(err.value)
+    assert player.calls[-2:] == ["stop", ("set_media", None)]
+
+
+def test_missing_length_fails_at_the_length_step():
+    with pytest.raises(SnapshotError) as err:
+        EventSnapshotter(FakePlayer(withhold={'length'})).take(FakeInstance(), "a.mkv", "out.jpg", pick=lambda n: n)
+    assert err.value.step == 'length'
+
+
+def test_position_within_tolerance_counts_as_arrived():
+    player = FakePlayer(lands_at=50000 + snapshot.SEEK_TOLERANCE_MS)
+    EventSnapshotter(player).take(FakeInstance(), "a.mkv", "out.jpg", pick=lambda n: 50000)
+
+
+def test_position_stuck_away_from_the_target_fails_the_seek():
+    player = FakePlayer(lands_at=50000 + snapshot.SEEK_TOLERANCE_MS + 1)
+    with pytest.raises(SnapshotError) as err:
+        EventSnapshotter(player).take(FakeInstance(), "a.mkv", "out.jpg", pick=lambda n: 50000)
+    assert err.value.step == 'seek'
+    assert "position stuck" in str(err.value)
+
+
+def test_playback_error_and_cancellation_name_the_step():
+    with pytest.raises(SnapshotError, match="playback error") as err:
+        EventSnapshotter(FakePlayer(withhold={'position', 'error_on_play'})).take(
+            FakeInstance(), "a.mkv", "out.jpg", t_ms=1000)
+    assert err.value.step == 'seek'
+    with pytest.raises(SnapshotError, match="cancelled") as err:
+        EventSnapshotter(FakePlayer(withhold={'vout'})).take(
+            FakeInstance(), "a.mkv", "out.jpg", t_ms=1000, cancelled=lambda: True)
+    assert err.value.step == 'vout'
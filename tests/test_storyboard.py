@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from app.util import storyboard
+from app.util.storyboard import MAX_FRAMES, MIN_STEP_MS, frame_times, load_index, write_index
+
+
+@pytest.fixture
+def video(tmp_path, monkeypatch):
+    monkeypatch.setattr(storyboard, "STORYBOARD_DIR", tmp_path / "storyboards")
+    storyboard.STORYBOARD_DIR.mkdir()
+    path = tmp_path / "episode.mkv"
+    path.write_bytes(b"\0" * 1000)
+    return str(path)
+
+
+def test_short_video_is_sampled_every_step():
+    times = frame_times(60000)
+    assert times == list(range(MIN_STEP_MS // 2, 60000, MIN_STEP_MS))
+
+
+def test_long_video_is_capped_and_spread():
+    times = frame_times(4 * 3600 * 1000)
+    assert len(times) == MAX_FRAMES
+    assert times == sorted(times) and times[-1] < 4 * 3600 * 1000
+    assert times[1] - times[0] > MIN_STEP_MS
+
+
+@pytest.mark.parametrize("duration", [0, -1, None])
+def test_unknown_duration_has_no_frames(duration):
+    assert frame_times(duration) == []
+
+
+def test_index_round_trip(video):
+    sheet, _ = storyboard.storyboard_paths(video)
+    sheet.write_bytes(b"jpeg")
+    write_index(video, {"tile_w": 160, "tile_h": 90, "cols": 10, "times_ms": [5000]})
+    assert load_index(video)["times_ms"] == [5000]
+
+
+def test_index_without_sheet_is_missing(video):
+    write_index(video, {"cols": 10, "times_ms": []})
+    assert load_index(video) is None
+
+
+def test_changed_video_invalidates_the_index(video):
+    storyboard.storyboard_paths(video)[0].write_bytes(b"jpeg")
+    write_index(video, {"cols": 10, "times_ms": [5000]})
+    with open(video, "ab") as f:
+        f.write(b"re-encoded")
+    assert load_index(video) is None
+    write_index(video, {"cols": 10, "times_ms": [5000]})
+    st = os.stat(video)
+    os.utime(video, (st.st_atime, st.st_mtime + 60))
+    assert load_index(video) is None
@@ -0,0 +1,114 @@
+import pytest
+
+pytest.importorskip("PySide6")
+from qtpy.QtCore import Qt  # noqa: E402
+from qtpy.QtWidgets import QApplication, QTreeWidget, QTreeWidgetItem  # noqa: E402
+
+from app.ui.thumb_scheduler import ThumbScheduler  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+
+class Pool:
+    def __init__(self):
+        self.requests, self.cancels = [], []
+        self.accept = True
+
+    def request(self, path, mode, pri):
+        if self.accept:
+            self.requests.append((path, mode, pri))
+        return self.accept
+
+    def cancel(self, path, mode):
+        self.cancels.append((path, mode))
+
+
+@pytest.fixture
+def tree(qapp):
+    tree = QTreeWidget()
+    tree.setHeaderHidden(True)
+    for i in range(300):
+        it = QTreeWidgetItem(tree, [f"video {i}"])
+        it.setData(0, Qt.UserRole, f"/v/{i:03}.mkv")
+    tree.resize(300, 200)
+    tree.show()
+    qapp.processEvents()
+    yield tree
+    tree.close()
+
+
+def rows_per_page(tree):
+    return tree.viewport().height() // tree.visualItemRect(tree.topLevelItem(0)).height()
+
+
+def test_visible_rows_go_first_and_far_rows_wait(tree):
+    pool = Pool()
+    sched = ThumbScheduler(tree, pool.request, pool.cancel, in_flight=1000)
+    for i in reversed(range(300)):
+        sched.want(f"/v/{i:03}.mkv", pri=1)
+    sched.want("/v/000.mkv", mode="probe", pri=2)
+    sched.schedule()
+    page = rows_per_page(tree)
+    paths = [p for p, _, _ in pool.requests]
+    # visible rows top to bottom (thumbs before the lower-priority probe), then one page of prefetch
+    assert paths[:page] == [f"/v/{i:03}.mkv" for i in range(page)]
+    assert pool.requests[0][2] < pool.requests[page + 1][2]  # prefetched rows rank below visible ones
+    assert ("/v/000.mkv", "probe", 2) in pool.requests
+    assert "/v/299.mkv" not in paths and len(paths) < 3 * page + 4
+
+
+def test_in_flight_window_is_topped_up_as_results_arrive(tree):
+    pool = Pool()
+    sched = ThumbScheduler(tree, pool.request, pool.cancel, in_flight=2)
+    for i in range(10):
+        sched.want(f"/v/{i:03}.mkv")
+    sched.schedule()
+    assert [p for p, _, _ in pool.requests] == ["/v/000.mkv", "/v/001.mkv"]
+    sched.finished("/v/000.mkv", "thumb", "done")
+    sched.schedule()
+    assert pool.requests[-1][0] == "/v/002.mkv"
+    sched.schedule()
+    assert len(pool.requests) == 3  # nothing is requested twice
+
+
+def test_scrolled_away_rows_are_cancelled_and_requeued_on_return(tree, qapp):
+    pool = Pool()
+    sched = ThumbScheduler(tree, pool.request, pool.cancel, in_flight=1000)
+    sched.want("/v/000.mkv")
+    sched.schedule()
+    tree.scrollToItem(tree.topLevelItem(299))
+    qapp.processEvents()
+    sched.schedule()
+    assert pool.cancels == [("/v/000.mkv", "thumb")]
+    sched.finished("/v/000.mkv", "thumb", "cancelled")  # still wanted
+    tree.scrollToItem(tree.topLevelItem(0))
+    qapp.processEvents()
+    sched.schedule()
+    assert [p for p, _, _ in pool.requests] == ["/v/000.mkv", "/v/000.mkv"]
+
+
+def test_refused_request_stays_wanted(tree):
+    pool = Pool()
+    sched = ThumbScheduler(tree, pool.request, pool.cancel)
+    pool.accept = False
+    sched.want("/v/000.mkv")
+    sched.schedule()
+    pool.accept = True
+    sched.schedule()
+    assert pool.requests == [("/v/000.mkv", "thumb", 1)]
+
+
+def test_wanted_again_while_running_runs_once_more(tree):
+    pool = Pool()
+    sched = ThumbScheduler(tree, pool.request, pool.cancel)
+    sched.want("/v/000.mkv")
+    sched.schedule()
+    sched.want("/v/000.mkv", pri=2)  # e.g. a larger thumbnail level is needed now
+    sched.finished("/v/000.mkv", "thumb", "done")
+    sched.schedule()
+    sched.finished("/v/000.mkv", "thumb", "done")
+    sched.schedule()
+    assert len(pool.requests) == 2
@@ -0,0 +1,152 @@
+import os
+
+import pytest
+
+from app.util import thumb_store
+from app.util.thumb_store import GIVE_UP_ATTEMPTS, LEVELS, RETRY_BASE, ThumbStore, level_for
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ThumbStore(tmp_path / "thumbs.db")
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "broken.mkv"
+    path.write_bytes(b"\0" * 100)
+    return path.as_posix()
+
+
+@pytest.mark.parametrize("card, dpr, level", [
+    (100, 1.0, 160), (160, 1.0, 160), (161, 1.0, 320), (220, 1.0, 320),
+    (220, 2.0, 480), (450, 1.0, 480), (450, 2.0, LEVELS[-1]),
+])
+def test_level_for_picks_the_smallest_sufficient_level(card, dpr, level):
+    assert level_for(card, dpr) == level
+
+
+def test_failures_back_off_exponentially(store, video, monkeypatch):
+    monkeypatch.setattr(thumb_store.time, "time", lambda: 1000.0)
+    for attempt in range(1, GIVE_UP_ATTEMPTS):
+        assert store.record_failure(video, "no video track") == (attempt, False)
+        attempts, reason, next_retry = store.failures_many([video])[video]
+        assert (attempts, reason) == (attempt, "no video track")
+        assert next_retry == 1000.0 + RETRY_BASE * 2 ** (attempt - 1)
+
+
+def test_gives_up_until_the_file_changes(store, video):
+    for _ in range(GIVE_UP_ATTEMPTS):
+        attempts, permanent = store.record_failure(video, "corrupt")
+    assert (attempts, permanent) == (GIVE_UP_ATTEMPTS, True)
+    assert store.failures_many([video])[video][2] is None
+    assert store.failure_counts() == {'failed': 1, 'given_up': 1}
+    with open(video, "ab") as f:
+        f.write(b"fixed")
+    assert store.failures_many([video]) == {}
+    assert store.record_failure(video, "corrupt") == (1, False)
+
+
+def test_successful_thumbnail_clears_the_failure(store, video):
+    store.record_failure(video, "timeout")
+    store.put(video, b"jpeg", 320)
+    assert store.failures_many([video]) == {}
+    assert store.get(video, 320) == b"jpeg"
+
+
+def test_thumbnail_of_a_replaced_file_is_stale(store, video):
+    store.put(video, b"jpeg", 160)
+    assert store.has(video, 160) and not store.has(video, 320)
+    st = os.stat(video)
+    os.utime(video, (st.st_atime, st.st_mtime + 60))
+    assert not store.has(video, 160)
+
+
+def _legacy_dir(tmp_path, count):
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    for i in range(count):
+        (legacy / f"{i:032x}.jpg").write_bytes(b"jpeg%d" % i)
+    return legacy
+
+
+def test_import_legacy_moves_files_into_the_store(store, tmp_path):
+    legacy = _legacy_dir(tmp_path, 3)
+    assert store.import_legacy(legacy) == 3
+    assert list(legacy.iterdir()) == []
+
+
+def test_failed_legacy_batch_keeps_its_files(store, tmp_path):
+    legacy = _legacy_dir(tmp_path, 250)
+    with store._connect() as conn:
+        # The second batch of 200 hits a write error
+        conn.execute("CREATE TRIGGER full BEFORE INSERT ON thumbs WHEN (SELECT COUNT(*) FROM thumbs) >= 200 "
+                     "BEGIN SELECT RAISE(ABORT, 'disk full'); END")
+    with pytest.raises(Exception):
+        store.import_legacy(legacy)
+    with store._connect() as conn:
+        stored = {k for k, in conn.execute("SELECT key FROM thumbs")}
+    left = {f.stem for f in legacy.iterdir()}
+    assert len(stored) == 200 and len(left) == 50
+    assert not stored & left
+
+
+def _library(tmp_path):
+    root = tmp_path / "library"
+    root.mkdir()
+    video = root / "a.mkv"
+    video.write_bytes(b"\0" * 100)
+    return root, video
+
+
+def test_compact_drops_replaced_files(store, tmp_path):
+    root, video = _library(tmp_path)
+    store.put(video.as_posix(), b"jpeg")
+    video.write_bytes(b"\0" * 200)
+    assert store.compact([root.as_posix()]) == 1
+
+
+def test_compact_keeps_thumbnails_under_an_offline_root(store, tmp_path, monkeypatch):
+    root, video = _library(tmp_path)
+    store.put(video.as_posix(), b"jpeg")
+    root_moved = tmp_path / "unplugged"
+    root.rename(root_moved)  # the disk is unplugged
+    monkeypatch.setattr(thumb_store.time, "time", lambda: 1e12)
+    assert store.compact([root.as_posix()]) == 0
+    assert store.compact([root.as_posix()]) == 0
+    root_moved.rename(root)
+    assert store.get(video.as_posix()) == b"jpeg"
+
+
+def test_compact_waits_before_dropping_missing_files(store, tmp_path, monkeypatch):
+    root, video = _library(tmp_path)
+    store.put(video.as_posix(), b"jpeg")
+    video.unlink()
+    now = [1000.0]
+    monkeypatch.setattr(thumb_store.time, "time", lambda: now[0])
+    assert store.compact([root.as_posix()]) == 0  # only marked missing
+    now[0] += thumb_store.MISSING_GRACE - 1
+    assert store.compact([root.as_posix()]) == 0
+    now[0] += 1
+    assert store.compact([root.as_posix()]) == 1
+
+
+def test_moved_file_is_relinked_after_compaction(store, tmp_path, monkeypatch):
+    from app.util import file_identity
+    from app.util.metadata_db import MetadataDB
+    monkeypatch.setattr(file_identity, "get_store", lambda: store)
+    db = MetadataDB(str(tmp_path / "metadata.db"))
+    root, video = _library(tmp_path)
+    file_identity.relink_moved(db, video)
+    store.put(video.as_posix(), b"jpeg")
+    moved = root / "sub" / "a (renamed).mkv"
+    moved.parent.mkdir()
+    video.rename(moved)
+    now = [1000.0]
+    monkeypatch.setattr(thumb_store.time, "time", lambda: now[0])
+    assert store.compact([root.as_posix()]) == 0
+    assert file_identity.relink_moved(db, moved) == video.as_posix()
+    assert store.get(moved.as_posix()) == b"jpeg"
+    now[0] += thumb_store.MISSING_GRACE
+    assert store.compact([root.as_posix()]) == 0
+    assert store.get(moved.as_posix()) == b"jpeg"
@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+pytest.importorskip("vlc")
+pytest.importorskip("PySide6")
+from app.core.vlc_backend import VLCBackend  # noqa: E402
+from app.util.metrics import REGISTRY  # noqa: E402
+
+
+class FakePlayer:
+    """Records main-player calls; pause() blocks until released so commands pile up behind it."""
+
+    def __init__(self):
+        self.calls = []
+        self.time = 50000
+        self.gate = threading.Event()
+        self.drained = threading.Event()
+
+    def pause(self):
+        self.calls.append("pause")
+        self.gate.wait(5)
+
+    def play(self):
+        self.calls.append("play")
+        self.drained.set()
+
+    def set_time(self, ms):
+        self.calls.append(("seek", ms))
+        self.time = ms
+
+    def get_time(self):
+        return self.time
+
+    def audio_set_volume(self, v):
+        self.calls.append(("volume", v))
+
+    def stop(self):
+        self.calls.append("stop")
+
+
+@pytest.fixture
+def backend():
+    b = VLCBackend()
+    if not b.ready:
+        pytest.skip("libvlc could not be initialised")
+    b.main_player = FakePlayer()
+    yield b
+    b.main_player.gate.set()
+    b.release()
+
+
+def run_queued(backend, *commands):
+    """Enqueue `commands` behind a blocked pause(), then let the control thread drain them."""
+    backend.pause()
+    for cmd in commands:
+        cmd()
+    backend.main_player.gate.set()
+    backend.play()
+    assert backend.main_player.drained.wait(5)
+    return backend.main_player.calls[1:-1]
+
+
+def test_consecutive_seeks_and_volume_changes_collapse(backend):
+    before = REGISTRY.counter("player_commands_total", cmd="seek", status="coalesced")
+    calls = run_queued(backend, *[lambda t=t: backend.set_time(t) for t in range(0, 5000, 1000)],
+                       lambda: backend.set_vol(40), lambda: backend.set_vol(45))
+    assert calls == [("seek", 4000), ("volume", 45)]
+    assert REGISTRY.counter("player_commands_total", cmd="seek", status="coalesced") == before + 4
+
+
+def test_order_is_kept_across_command_kinds(backend):
+    calls = run_queued(backend, lambda: backend.set_time(1000), lambda: backend.set_vol(10),
+                       lambda: backend.set_time(2000))
+    assert calls == [("seek", 1000), ("volume", 10), ("seek", 2000)]
+
+
+def test_relative_seeks_apply_in_order_and_clamp(backend):
+    calls = run_queued(backend, lambda: backend.seek_by(10000, 55000), lambda: backend.seek_by(-70000))
+    assert calls == [("seek", 55000), ("seek", 0)]
+
+
+def test_commands_only_enqueue(backend):
+    backend.pause()  # blocks the control thread, not the caller
+    backend.set_time(1000)
+    assert ("seek", 1000) not in backend.main_player.calls
@@ -0,0 +1,157 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.util import worker_pool
+from app.util.worker_pool import ThumbWorkerPool
+
+FAKE_WORKER = Path(__file__).with_name("fake_worker.py")
+
+
+class Results:
+    def __init__(self):
+        self.items = []
+        self.cond = threading.Condition()
+
+    def __call__(self, res):
+        with self.cond:
+            self.items.append(res)
+            self.cond.notify_all()
+
+    def wait(self, n, timeout=20):
+        with self.cond:
+            assert self.cond.wait_for(lambda: len(self.items) >= n, timeout), self.items
+            return list(self.items)
+
+
+def make_pool(size=1, **kw):
+    results = Results()
+    return ThumbWorkerPool(size=size, worker_script=FAKE_WORKER, on_done=results, **kw), results
+
+
+def test_submit_dedups_per_path_mode_and_width():
+    pool, _ = make_pool()
+    first = pool.submit("/v/a.mkv", 120, "thumb", width=160)
+    assert first is not None
+    assert pool.submit("/v/a.mkv", 120, "thumb", width=160) is None
+    assert pool.submit("/v/a.mkv", 120, "thumb", width=480) not in (None, first)
+    assert pool.submit("/v/a.mkv", 120, "probe") is not None
+    assert pool.is_pending("/v/a.mkv", "thumb", 160)
+    assert pool.is_pending("/v/a.mkv", "thumb", 480)
+    assert not pool.is_pending("/v/a.mkv", "thumb", 320)
+
+
+def test_full_queue_drops_and_forgets_the_request():
+    pool, _ = make_pool(maxsize=1)
+    assert pool.submit("/v/a.mkv", 120) is not None
+    assert pool.submit("/v/b.mkv", 120) is None
+    assert not pool.is_pending("/v/b.mkv")
+    assert pool.metrics()['dropped'] == 1
+
+
+def test_cancel_covers_every_width_and_reports_cancelled(tmp_path):
+    pool, results = make_pool()
+    pool.submit("/v/a.mkv", 120, width=160)
+    pool.submit("/v/a.mkv", 120, width=480)
+    assert pool.cancel("/v/a.mkv")
+    assert not pool.cancel("/v/other.mkv")
+    pool.start()
+    try:
+        done = results.wait(2)
+    finally:
+        pool.shutdown()
+    assert {r['status'] for r in done} == {"cancelled"}
+    assert not pool.is_pending("/v/a.mkv", "thumb", 160)
+
+
+def test_results_and_failures_are_delivered(tmp_path):
+    pool, results = make_pool()
+    pool.start()
+    try:
+        pool.submit(str(tmp_path / "good.mkv"), 120)
+        pool.submit(str(tmp_path / "fail.mkv"), 120)
+        done = {Path(r['path']).name: r for r in results.wait(2)}
+    finally:
+        pool.shutdown()
+    assert done["good.mkv"]['ok'] and done["good.mkv"]['status'] == "done"
+    assert done["fail.mkv"]['status'] == "failed"
+    assert done["fail.mkv"]['error'] == "no video track"
+
+
+def test_task_is_requeued_after_its_worker_crashes(tmp_path):
+    pool, results = make_pool()
+    pool.start()
+    try:
+        path = str(tmp_path / "crash-once.mkv")
+        pool.submit(path, 120)
+        (res,) = results.wait(1)
+        restarts = pool.metrics()['restarts']
+    finally:
+        pool.shutdown()
+    assert res['status'] == "done"
+    assert restarts['crash'] == 1
+    assert not pool.is_pending(path)
+
+
+def seen_pids(path):
+    with open(path + ".seen") as f:
+        return f.read().split()
+
+
+@pytest.mark.parametrize("name, reason", [("hang.mkv", "hung"), ("slow.mkv", "deadline")])
+def test_stuck_worker_is_killed_and_the_task_not_retried(tmp_path, monkeypatch, name, reason):
+    monkeypatch.setattr(worker_pool, "HEARTBEAT_TIMEOUT", 0.5)
+    monkeypatch.setitem(worker_pool.TASK_DEADLINES, "thumb", 1)
+    pool, results = make_pool()
+    pool.start()
+    try:
+        stuck, good = str(tmp_path / name), str(tmp_path / "good.mkv")
+        pool.submit(stuck, 120)
+        (res,) = results.wait(1)
+        old = pool.slots[0].proc
+        pool.submit(good, 120)
+        res2 = results.wait(2)[1]
+        m = pool.metrics()
+    finally:
+        pool.shutdown()
+    assert res['status'] == "failed" and res['error'].startswith("worker hung")
+    assert old.poll() is not None  # killed
+    assert len(seen_pids(stuck)) == 1  # not retried on another worker
+    assert res2['status'] == "done" and seen_pids(good) != seen_pids(stuck)  # served by a respawned process
+    assert m['restarts'][reason] == 1
+    assert sum(m['restarts'].values()) == 1
+
+
+def test_worker_is_recycled_after_max_tasks(tmp_path):
+    pool, results = make_pool(max_tasks=2)
+    pool.start()
+    try:
+        paths = [str(tmp_path / f"v{i}.mkv") for i in range(3)]
+        for p in paths:
+            pool.submit(p, 120)
+        done = results.wait(3)
+        m = pool.metrics()
+    finally:
+        pool.shutdown()
+    assert all(r['status'] == "done" for r in done)
+    pids = [seen_pids(p)[0] for p in paths]
+    assert pids[0] == pids[1] != pids[2]
+    assert m['restarts'] == dict.fromkeys(worker_pool.RESTART_REASONS, 0) | {'max_tasks': 1}
+
+
+def test_worker_is_recycled_above_max_rss(tmp_path):
+    pool, results = make_pool(max_rss_mb=500)
+    pool.start()
+    try:
+        fat, good = str(tmp_path / "fat.mkv"), str(tmp_path / "good.mkv")
+        pool.submit(fat, 120)
+        results.wait(1)
+        pool.submit(good, 120)
+        done = results.wait(2)
+        m = pool.metrics()
+    finally:
+        pool.shutdown()
+    assert all(r['status'] == "done" for r in done)
+    assert seen_pids(fat) != seen_pids(good)
+    assert m['restarts']['max_rss'] == 1 and m['restarts']['crash'] == 0